@@ -0,0 +1,433 @@
+import atexit
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+# fcntl is only available on Unix. Elsewhere, the files of processes which
+# have exited are kept as they are.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Metrics exported by MetricsView. Every metric has a type, a help text and,
+# for histograms, the upper bounds of its buckets.
+
+METRICS = {
+    "http_requests_total" : {
+        "type" : "counter",
+        "help" : "Requests served, by view, method and status code.",
+        },
+    "http_request_duration_seconds" : {
+        "type" : "histogram",
+        "help" : "Time spent serving requests, by view.",
+        "buckets" : (
+            0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+            ),
+        },
+    "db_queries_total" : {
+        "type" : "counter",
+        "help" : "Database queries run while serving requests, by view.",
+        },
+    "rrule_occurrences_expanded_total" : {
+        "type" : "counter",
+        "help" : "Occurrences expanded from the recurrence rules of time slots.",
+        },
+    "time_slot_intersection_result_size" : {
+        "type" : "histogram",
+        "help" : (
+            "Number of common one hour time slots returned by the time slot "
+            "intersections endpoint."
+            ),
+        "buckets" : (0, 1, 10, 100, 1000, 10000, 100000),
+        },
+    }
+
+def is_process_alive(pid):
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def read_states(paths):
+    """
+    Input: A list of paths of files written by MetricsRegistry.flush().
+    Output: A list of the states in these files. Missing or partial files
+            are skipped.
+    """
+
+    states = []
+
+    for path in paths:
+        try:
+            with open(path) as metrics_file:
+                states.append(json.load(metrics_file))
+        except (OSError, ValueError):
+            continue
+
+    return states
+
+
+def add_up_states(states):
+    """
+    Add up the registries of several processes.
+
+    Input: A list of dictionaries as returned by MetricsRegistry.get_state().
+    Output: A tuple of two dictionaries, mapping (name, labels) keys to
+            counter values, and to histograms with non-cumulative bucket
+            counts, a sum and a count.
+    """
+
+    counters = {}
+    histograms = {}
+
+    for state in states:
+        for name, labels, value in state["counters"]:
+            if name not in METRICS:
+                continue
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, histogram in state["histograms"]:
+            if name not in METRICS or len(histogram["buckets"]) != len(
+                    METRICS[name]["buckets"]):
+                continue
+            key = (name, tuple(tuple(label) for label in labels))
+            if key not in histograms:
+                histograms[key] = {
+                    "buckets" : [0] * len(histogram["buckets"]),
+                    "sum" : 0,
+                    "count" : 0,
+                    }
+            total = histograms[key]
+            for i, count in enumerate(histogram["buckets"]):
+                total["buckets"][i] += count
+            total["sum"] += histogram["sum"]
+            total["count"] += histogram["count"]
+
+    return counters, histograms
+
+
+def format_state(counters, histograms):
+    """
+    Inverse of add_up_states().
+
+    Input: Dictionaries of counters and histograms.
+    Output: A dictionary which can be serialized as JSON.
+    """
+
+    return {
+        "counters" : [
+            [name, list(labels), value]
+            for (name, labels), value in counters.items()
+            ],
+        "histograms" : [
+            [name, list(labels), dict(histogram,
+                buckets = list(histogram["buckets"]))]
+            for (name, labels), histogram in histograms.items()
+            ],
+        }
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of the current process.
+
+    Under gunicorn, every worker process has its own registry. If a
+    directory is given, the registry is written to a file of that directory,
+    one file per process, at most once per flush interval and when the
+    process exits. collect() adds up the files of all processes. The files
+    of processes which have exited are merged into a single file, so
+    counters never go down while the directory is kept, and the number of
+    files does not grow with worker restarts.
+
+    Samples are keyed by the metric name and a tuple of (label, value) pairs.
+    """
+
+    merged_file_name = "merged-metrics.json"
+
+    def __init__(self, directory = None, flush_interval = 0):
+
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+
+        self.pid = os.getpid()
+        self.file_name = "metrics-{0}-{1}.json".format(
+            self.pid, uuid.uuid4().hex[:8]
+            )
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = None
+
+    def check_process(self):
+
+        # A registry created before gunicorn forks its workers would
+        # otherwise be shared by all of them, under the same file name.
+
+        if self.pid != os.getpid():
+            self.reset()
+
+    def increment(self, name, labels = (), amount = 1):
+        """
+        Add to a counter.
+
+        Input: The name of the metric, a tuple of (label, value) pairs and
+               the amount to add.
+        """
+
+        with self.lock:
+            self.check_process()
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels = ()):
+        """
+        Record a value in a histogram.
+
+        Input: The name of the metric, the value and a tuple of
+               (label, value) pairs.
+        """
+
+        buckets = METRICS[name]["buckets"]
+
+        with self.lock:
+            self.check_process()
+            key = (name, labels)
+            if key not in self.histograms:
+                self.histograms[key] = {
+                    "buckets" : [0] * len(buckets),
+                    "sum" : 0,
+                    "count" : 0,
+                    }
+            histogram = self.histograms[key]
+            for i, upper_bound in enumerate(buckets):
+                if value <= upper_bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def get_state(self):
+        """
+        Output: The counters and histograms of the process, as a dictionary
+                which can be serialized as JSON.
+        """
+
+        with self.lock:
+            self.check_process()
+            return format_state(self.counters, self.histograms)
+
+    def flush(self):
+        """
+        Write the registry of the process to the metrics directory, if any.
+        The file is replaced atomically, so collect() never reads a partial
+        file.
+        """
+
+        if self.directory is None:
+            return
+
+        os.makedirs(self.directory, exist_ok = True)
+
+        state = self.get_state()
+        path = os.path.join(self.directory, self.file_name)
+
+        with open(path + ".tmp", "w") as metrics_file:
+            json.dump(state, metrics_file)
+
+        os.replace(path + ".tmp", path)
+
+        self.last_flush = time.monotonic()
+
+    def flush_periodically(self):
+        """
+        Call flush() if the flush interval has passed since the last flush.
+        Called after every request, so that writing the file does not add to
+        the latency of every request.
+        """
+
+        if self.directory is None:
+            return
+
+        if (self.pid == os.getpid() and self.last_flush is not None and
+                time.monotonic() - self.last_flush < self.flush_interval):
+            return
+
+        self.flush()
+
+    @contextlib.contextmanager
+    def lock_directory(self):
+        """
+        Hold an exclusive lock on the metrics directory, so that processes
+        collecting the metrics at the same time don't merge the same files
+        twice, or read the files while they are merged.
+        """
+
+        if fcntl is None:
+            yield
+            return
+
+        lock_path = os.path.join(self.directory, "metrics.lock")
+
+        # The lock is released when the file is closed.
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def merge_exited_processes(self):
+        """
+        Merge the files of the processes which have exited into a single
+        file, and delete them. Processes are identified by the process id in
+        the file name, so the metrics directory must not be shared between
+        hosts. Must be called with the directory locked.
+        """
+
+        if fcntl is None:
+            return
+
+        paths = [
+            path for path in glob.glob(
+                os.path.join(self.directory, "metrics-*.json")
+                )
+            if not is_process_alive(int(os.path.basename(path).split("-")[1]))
+            ]
+
+        if not paths:
+            return
+
+        merged_path = os.path.join(self.directory, self.merged_file_name)
+        counters, histograms = add_up_states(
+            read_states(paths + [merged_path])
+            )
+
+        with open(merged_path + ".tmp", "w") as metrics_file:
+            json.dump(format_state(counters, histograms), metrics_file)
+
+        os.replace(merged_path + ".tmp", merged_path)
+
+        for path in paths:
+            os.remove(path)
+
+    def collect(self):
+        """
+        Add up the registries of all processes.
+
+        Output: A tuple of two dictionaries, mapping (name, labels) keys to
+                counter values, and to histograms with non-cumulative bucket
+                counts, a sum and a count.
+        """
+
+        if self.directory is None:
+            return add_up_states([self.get_state()])
+
+        self.flush()
+
+        with self.lock_directory():
+            self.merge_exited_processes()
+            return add_up_states(
+                read_states(
+                    glob.glob(os.path.join(self.directory, "*metrics*.json"))
+                    )
+                )
+
+
+def format_labels(labels):
+    """
+    Format labels for the Prometheus text format.
+
+    Input: A tuple of (label, value) pairs e.g. (("view", "welcome_view"),)
+    Output: A string e.g. '{view="welcome_view"}', or "" without labels.
+    """
+
+    if not labels:
+        return ""
+
+    return "{{{0}}}".format(
+        ",".join(
+            '{0}="{1}"'.format(
+                label,
+                str(value).replace("\\", "\\\\").replace('"', '\\"').replace(
+                    "\n", "\\n"
+                    )
+                )
+            for label, value in labels
+            )
+        )
+
+
+def format_number(value):
+
+    if isinstance(value, float) and value == int(value):
+        value = int(value)
+
+    return str(value)
+
+
+def generate_prometheus_text(counters, histograms):
+    """
+    Format collected metrics in the Prometheus text exposition format, see
+    https://prometheus.io/docs/instrumenting/exposition_formats/.
+
+    Input: The two dictionaries returned by MetricsRegistry.collect().
+    Output: A generator of lines.
+    """
+
+    for name, metric in METRICS.items():
+
+        yield "# HELP {0} {1}".format(name, metric["help"])
+        yield "# TYPE {0} {1}".format(name, metric["type"])
+
+        if metric["type"] == "counter":
+            for (sample_name, labels), value in sorted(counters.items()):
+                if sample_name == name:
+                    yield "{0}{1} {2}".format(
+                        name, format_labels(labels), format_number(value)
+                        )
+            continue
+
+        for (sample_name, labels), histogram in sorted(
+                histograms.items(), key = lambda item: item[0]):
+            if sample_name != name:
+                continue
+            cumulative_count = 0
+            for upper_bound, count in zip(
+                    metric["buckets"], histogram["buckets"]):
+                cumulative_count += count
+                yield "{0}_bucket{1} {2}".format(
+                    name,
+                    format_labels(labels + (("le", format_number(upper_bound)),)),
+                    cumulative_count
+                    )
+            yield "{0}_bucket{1} {2}".format(
+                name, format_labels(labels + (("le", "+Inf"),)),
+                histogram["count"]
+                )
+            yield "{0}_sum{1} {2}".format(
+                name, format_labels(labels), format_number(histogram["sum"])
+                )
+            yield "{0}_count{1} {2}".format(
+                name, format_labels(labels), histogram["count"]
+                )
+
+
+metrics_registry = MetricsRegistry(
+    settings.METRICS_DIRECTORY, settings.METRICS_FLUSH_INTERVAL
+    )
+
+# Write the metrics which were not flushed yet when a worker exits.
+atexit.register(metrics_registry.flush)
@@ -0,0 +1,219 @@
+import cProfile
+import io
+import os
+import pstats
+import timeit
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils import timezone
+
+from ki_labs_backend.metrics import metrics_registry
+from utils.timing_ops import (
+    add_timing, format_server_timing, start_timing, stop_timing
+    )
+
+class QueryTimer:
+    """
+    Database execute wrapper counting the queries of a request and the time
+    spent running them.
+    """
+
+    def __init__(self):
+
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+
+        started = timeit.default_timer()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += timeit.default_timer() - started
+            self.count += 1
+
+
+class ServerTimingMiddleware:
+    """
+    Add a Server-Timing header to every response, with the time spent in
+    database queries, in the phases recorded with
+    utils.timing_ops.timing_phase(), in rendering and in total. Browsers
+    show it in the network panel of their developer tools.
+
+    Requests with an X-Profile header are run under cProfile, if DEBUG is on
+    or the user is staff. The stats are written to PROFILING_DIRECTORY if it
+    is set, and the file name is returned in the X-Profile-Stats header.
+    Otherwise, the response is replaced by the stats as plain text.
+
+    Must be placed after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+
+        profiler = None
+
+        if "HTTP_X_PROFILE" in request.META and (
+                settings.DEBUG or getattr(request, "user", None) is not None
+                and request.user.is_staff):
+            profiler = cProfile.Profile()
+
+        query_timer = QueryTimer()
+        start_timing()
+        started = timeit.default_timer()
+
+        try:
+            with connection.execute_wrapper(query_timer):
+                if profiler is None:
+                    response = self.get_response(request)
+                else:
+                    response = profiler.runcall(self.get_response, request)
+        finally:
+            phases = stop_timing()
+
+        total = timeit.default_timer() - started
+
+        server_timing = {
+            "db" : (
+                query_timer.duration,
+                "{0} {1}".format(
+                    query_timer.count,
+                    "query" if query_timer.count == 1 else "queries"
+                    )
+                ),
+            }
+
+        for name, (duration, count) in phases.items():
+            server_timing[name] = (
+                duration,
+                "{0} calls".format(count) if count > 1 else None
+                )
+
+        server_timing["total"] = (total, None)
+
+        if profiler is not None:
+            response = self.get_profile_response(request, response, profiler)
+
+        response["Server-Timing"] = format_server_timing(server_timing)
+
+        return response
+
+    def process_template_response(self, request, response):
+
+        # Responses of Django REST framework views are rendered after the
+        # view returns. Time it as the render phase.
+
+        started = timeit.default_timer()
+
+        def add_render_timing(response):
+            add_timing("render", timeit.default_timer() - started)
+
+        response.add_post_render_callback(add_render_timing)
+
+        return response
+
+    def get_profile_response(self, request, response, profiler):
+        """
+        Store the stats of a profiled request, or return them instead of
+        the response.
+
+        Input: The request, its response and the cProfile.Profile object
+               which ran the view.
+        Output: An HttpResponse object.
+        """
+
+        if settings.PROFILING_DIRECTORY is not None:
+            file_name = "{0}-{1}.prof".format(
+                timezone.now().strftime("%Y%m%dT%H%M%S%f"),
+                request.path.strip("/").replace("/", "-") or "root"
+                )
+            os.makedirs(settings.PROFILING_DIRECTORY, exist_ok = True)
+            profiler.dump_stats(
+                os.path.join(settings.PROFILING_DIRECTORY, file_name)
+                )
+            response["X-Profile-Stats"] = file_name
+            return response
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream = stream)
+        stats.sort_stats("cumulative").print_stats(50)
+
+        return HttpResponse(
+            stream.getvalue(), content_type = "text/plain; charset=utf-8"
+            )
+
+
+class MetricsMiddleware:
+    """
+    Count the requests and database queries of every view, and record how
+    long requests take, for the metrics endpoint. The duration of streaming
+    responses only covers the time until streaming starts.
+
+    Should be placed first, so the time spent in the other middleware is
+    included.
+    """
+
+    def __init__(self, get_response):
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+
+        query_timer = QueryTimer()
+        started = timeit.default_timer()
+
+        with connection.execute_wrapper(query_timer):
+            response = self.get_response(request)
+
+        duration = timeit.default_timer() - started
+
+        # Requests are labelled by the name of the url pattern, so that
+        # e.g. /time-slots/1/ and /time-slots/2/ are counted together.
+
+        resolver_match = getattr(request, "resolver_match", None)
+        view = (
+            resolver_match.view_name if resolver_match is not None
+            else "unresolved"
+            )
+
+        metrics_registry.increment(
+            "http_requests_total",
+            (
+                ("view", view), ("method", request.method),
+                ("status", str(response.status_code))
+                )
+            )
+        metrics_registry.observe(
+            "http_request_duration_seconds", duration, (("view", view),)
+            )
+        metrics_registry.increment(
+            "db_queries_total", (("view", view),), query_timer.count
+            )
+        metrics_registry.flush_periodically()
+
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses with gzip when the client accepts it, except HTML
+    pages. Pages of the browsable API contain the CSRF token, which could
+    be guessed from the size of compressed responses (the BREACH attack).
+    API responses are JSON or MessagePack, and compress well.
+    """
+
+    def process_response(self, request, response):
+
+        if response.get("Content-Type", "").startswith("text/html"):
+            return response
+
+        return super(CompressionMiddleware, self).process_response(
+            request, response
+            )
@@ -0,0 +1,65 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+# msgpack is an optional dependency, only needed for MessagePack responses.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class CompactJSONRenderer(JSONRenderer):
+    """
+    JSON renderer for the compact representation of time slots, selected
+    with the Accept header application/vnd.ki-labs.compact+json or with
+    ?format=compact. Views check the compact_representation attribute of
+    the accepted renderer, and return datetimes as Unix timestamps and runs
+    of one hour time slots as [start, number of hours] pairs.
+    """
+
+    media_type = "application/vnd.ki-labs.compact+json"
+    format = "compact"
+    compact_representation = True
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack renderer, selected with the Accept header
+    application/msgpack or with ?format=msgpack. Uses the compact
+    representation, like CompactJSONRenderer.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    compact_representation = True
+
+    def render(self, data, accepted_media_type = None, renderer_context = None):
+
+        if data is None:
+            return b""
+
+        return msgpack.packb(data, use_bin_type = True)
+
+
+def is_compact(request):
+    """
+    Input: A request of a view using COMPACT_RENDERER_CLASSES.
+    Output: True if the response should use the compact representation.
+    """
+
+    # JSONRenderer already has a compact attribute, for its separators.
+    return getattr(
+        request.accepted_renderer, "compact_representation", False
+        )
+
+
+# Renderers of the views returning many time slots. MessagePack is only
+# offered if msgpack is installed.
+
+COMPACT_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES) + [
+    CompactJSONRenderer
+    ]
+
+if msgpack is not None:
+    COMPACT_RENDERER_CLASSES.append(MessagePackRenderer)
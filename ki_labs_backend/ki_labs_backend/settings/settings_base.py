@@ -54,11 +54,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ki_labs_backend.middleware.MetricsMiddleware',
+    'ki_labs_backend.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ki_labs_backend.middleware.ServerTimingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -141,3 +144,70 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = (
     BASE_DIR.child("static"),
 )
+
+
+# Recurring time slots
+
+# Every occurrence of a time slot is stored when the time slot is saved, so
+# the number of rows written grows with the time span the time slot repeats
+# over. Time slots may only repeat until this many days after the day they
+# start. Longer rules are rejected by the API and skipped by the iCalendar
+# import.
+
+MAXIMUM_RECURRENCE_DAYS = 730
+
+
+# Time slot intersections
+
+# Backend used by TimeSlotIntersectionView to intersect the availability of
+# users. 'intervals' merges and intersects (start, end) intervals with a
+# sweep line. 'bitmap' represents every user as a row of one hour bits and
+# intersects them with numpy, which must be installed separately.
+
+TIME_SLOT_INTERSECTION_BACKEND = "intervals"
+
+# Time slots are expanded into their occurrences when they are saved. With
+# 'process', bulk creation, iCalendar imports and the
+# backfill_time_slot_occurrences command expand batches of at least
+# SCHEDULE_EXPANSION_MINIMUM time slots in a pool of
+# SCHEDULE_EXPANSION_WORKERS processes (by default one per CPU), since
+# recurrence rule expansion is CPU bound. Smaller batches, like the time
+# slots created one at a time, are always expanded serially. The pool relies
+# on worker processes being forked.
+
+SCHEDULE_EXPANSION_EXECUTOR = "serial"
+SCHEDULE_EXPANSION_WORKERS = None
+SCHEDULE_EXPANSION_MINIMUM = 200
+
+# Maximum number of users whose merged availability is kept in the
+# per-process schedule cache. Set to 0 to disable the cache.
+
+SCHEDULE_CACHE_SIZE = 1024
+
+
+# Profiling
+
+# Requests sent with an X-Profile header by staff users, or by anyone when
+# DEBUG is on, are run under cProfile. If this is set to a directory, the
+# stats are written there and can be read with pstats or snakeviz. The
+# directory is created if it doesn't exist. Otherwise the stats are returned
+# as plain text instead of the response.
+
+PROFILING_DIRECTORY = None
+
+
+# Metrics
+
+# Directory where every worker process writes its metrics, so that /metrics
+# reports the metrics of all workers. It is created if it doesn't exist and
+# should be emptied when the server is deployed. If None, /metrics only
+# reports the metrics of the process serving the request, which is enough
+# for the development server.
+
+METRICS_DIRECTORY = None
+
+# Minimum number of seconds between two writes of the metrics of a worker
+# process to METRICS_DIRECTORY. /metrics may miss the requests served by
+# the other workers during this interval.
+
+METRICS_FLUSH_INTERVAL = 10
@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 
@@ -19,3 +22,7 @@ except ImproperlyConfigured:
 
 SECRET_KEY = get_environment_variable('DJANGO_SECRET_KEY')
 ALLOWED_HOSTS = ['ki-labs.herokuapp.com']
+
+# The file system of a dyno is emptied when it restarts, which also resets
+# the metrics.
+METRICS_DIRECTORY = os.path.join(tempfile.gettempdir(), "ki-labs-metrics")
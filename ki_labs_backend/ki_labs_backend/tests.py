@@ -0,0 +1,69 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+class ProfilingTest(TestCase):
+
+    def setUp(self):
+
+        self.url = reverse("schedule_cache_view")
+
+    @override_settings(DEBUG = True)
+    def test_stats_are_returned_as_text(self):
+
+        response = self.client.get(self.url, HTTP_X_PROFILE = "1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Type"], "text/plain; charset=utf-8"
+            )
+        self.assertIn("function calls", response.content.decode())
+        self.assertIn("Server-Timing", response)
+
+    def test_stats_are_written_to_directory(self):
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        # The directory is created when the first stats are written
+        profiling_directory = os.path.join(directory, "profiles")
+
+        with override_settings(
+                DEBUG = True, PROFILING_DIRECTORY = profiling_directory):
+            response = self.client.get(self.url, HTTP_X_PROFILE = "1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(
+            os.listdir(profiling_directory), [response["X-Profile-Stats"]]
+            )
+        self.assertTrue(
+            response["X-Profile-Stats"].endswith("-schedule-cache.prof")
+            )
+
+        stats = pstats.Stats(
+            os.path.join(profiling_directory, response["X-Profile-Stats"])
+            )
+
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_only_staff_users_are_profiled(self):
+
+        response = self.client.get(self.url, HTTP_X_PROFILE = "1")
+
+        self.assertEqual(response["Content-Type"], "application/json")
+
+        self.client.force_login(
+            User.objects.create(username = "admin", is_staff = True)
+            )
+
+        response = self.client.get(self.url, HTTP_X_PROFILE = "1")
+
+        self.assertEqual(
+            response["Content-Type"], "text/plain; charset=utf-8"
+            )
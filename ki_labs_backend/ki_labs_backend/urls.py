@@ -16,8 +16,12 @@ Including another URLconf
 from django.urls import path, re_path, include
 from rest_framework.documentation import include_docs_urls
 
-from .views import WelcomeView
-from time_slots.views import TimeSlotIntersectionView
+from .views import MetricsView, WelcomeView
+from time_slots.views import (
+    AvailabilityView, ScheduleCacheView, TimeSlotIntersectionView,
+    TimeSlotNextIntersectionView, TimeSlotOverlapRankingView,
+    TimeSlotQuorumView
+    )
 
 urlpatterns = [
     re_path(
@@ -30,5 +34,28 @@ urlpatterns = [
         "time-slot-intersections/", TimeSlotIntersectionView.as_view(),
         name = "time_slot_intersection_view"
         ),
+    path(
+        "time-slot-intersections/next/",
+        TimeSlotNextIntersectionView.as_view(),
+        name = "time_slot_next_intersection_view"
+        ),
+    path(
+        "time-slot-intersections/quorum/", TimeSlotQuorumView.as_view(),
+        name = "time_slot_quorum_view"
+        ),
+    path(
+        "time-slot-intersections/ranking/",
+        TimeSlotOverlapRankingView.as_view(),
+        name = "time_slot_overlap_ranking_view"
+        ),
+    path(
+        "availability/", AvailabilityView.as_view(),
+        name = "availability_view"
+        ),
+    path(
+        "schedule-cache/", ScheduleCacheView.as_view(),
+        name = "schedule_cache_view"
+        ),
+    path("metrics", MetricsView.as_view(), name = "metrics_view"),
     path("docs/", include_docs_urls(title = "KI Labs Calendar")),
 ]
@@ -1,6 +1,10 @@
+from django.http import HttpResponse
+from django.views import View
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ki_labs_backend.metrics import generate_prometheus_text, metrics_registry
+
 class WelcomeView(APIView):
     """
     get:
@@ -31,3 +35,25 @@ class WelcomeView(APIView):
             }
 
         return Response(response)
+
+
+class MetricsView(View):
+    """
+    get:
+    Returns request counts, latency histograms, database query counts, the
+    number of recurrence rule occurrences expanded and the sizes of time slot
+    intersections, in the Prometheus text format. The metrics of all worker
+    processes are added up when METRICS_DIRECTORY is set.
+    """
+
+    def get(self, request):
+
+        counters, histograms = metrics_registry.collect()
+
+        return HttpResponse(
+            "".join(
+                line + "\n"
+                for line in generate_prometheus_text(counters, histograms)
+                ),
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            )
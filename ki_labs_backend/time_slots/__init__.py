@@ -0,0 +1 @@
+default_app_config = 'time_slots.apps.TimeSlotsConfig'
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TimeSlotsConfig(AppConfig):
     name = 'time_slots'
+
+    def ready(self):
+        import time_slots.signals
@@ -0,0 +1,384 @@
+from datetime import datetime, time, timedelta
+import json
+import random
+import statistics
+import subprocess
+import timeit
+
+from django.conf import settings
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from time_slots.bulk import bulk_create_time_slots
+from time_slots.models import CalendarTimeSlot
+from time_slots.schedule_cache import schedule_cache
+from users.models import CalendarUser
+from utils.datetime_ops import get_rrule_format
+
+DEFAULT_FREQUENCY_MIX = {
+    None : 0.25,
+    "DAILY" : 0.25,
+    "WEEKLY" : 0.35,
+    "MONTHLY" : 0.15,
+    }
+
+# Users created by generate_calendar_data() get an email address in this
+# reserved domain, so that they can be told apart from real users with the
+# same username prefix.
+GENERATED_USER_EMAIL_DOMAIN = "generated.invalid"
+
+def get_generated_username(username_prefix, i):
+
+    return "{0}{1}".format(username_prefix, i)
+
+
+def get_generated_users(username_prefix):
+    """
+    Input: The prefix of the generated usernames.
+    Output: A queryset of the users created by generate_calendar_data() with
+            this prefix.
+    """
+
+    return CalendarUser.objects.filter(
+        username__startswith = username_prefix,
+        email__endswith = "@" + GENERATED_USER_EMAIL_DOMAIN
+        )
+
+
+def generate_calendar_data(
+    number_of_users, number_of_time_slots, seed = 0,
+    frequency_mix = DEFAULT_FREQUENCY_MIX, username_prefix = "bench",
+    start_date = datetime(2018, 7, 1), horizon_in_days = 365,
+    batch_size = 1000
+    ):
+    """
+    Create a deterministic synthetic data set of users and time slots. The
+    same arguments always produce the same users and time slots.
+
+    Input: The number of users and time slots to create, the random seed,
+           the share of each recurrence frequency (None for time slots which
+           don't repeat), the prefix of the generated usernames, the first
+           date and the number of days over which time slots are spread, and
+           the number of time slots written per transaction.
+    Output: A dictionary with the number of users and time slots created.
+    """
+
+    random_generator = random.Random(seed)
+
+    # CalendarUser extends User, and Django can't bulk create models with a
+    # parent table, so users are created one by one. Time slots, their
+    # occurrences and their one hour time slots are written in batches.
+
+    with transaction.atomic():
+        calendar_users = []
+        for i in range(number_of_users):
+            username = get_generated_username(username_prefix, i)
+            calendar_users.append(
+                CalendarUser.objects.create(
+                    username = username,
+                    email = "{0}@{1}".format(
+                        username, GENERATED_USER_EMAIL_DOMAIN
+                        ),
+                    is_interviewer = random_generator.random() < 0.5,
+                    )
+                )
+
+    frequencies = list(frequency_mix)
+    weights = [frequency_mix[frequency] for frequency in frequencies]
+
+    batch = []
+
+    for i in range(number_of_time_slots):
+
+        start_datetime = timezone.make_aware(
+            start_date + timedelta(
+                days = random_generator.randrange(horizon_in_days),
+                hours = random_generator.randrange(7, 18),
+                )
+            )
+        end_datetime = start_datetime + timedelta(
+            hours = random_generator.randint(1, 8)
+            )
+
+        frequency = random_generator.choices(frequencies, weights)[0]
+        rrule = None
+
+        if frequency is not None:
+            until = datetime.combine(
+                start_datetime.date() + timedelta(
+                    days = random_generator.randint(7, horizon_in_days)
+                    ),
+                time(hour = 23, minute = 59, second = 59)
+                )
+            rrule = "FREQ={0};INTERVAL={1};UNTIL={2}".format(
+                frequency, random_generator.randint(1, 3),
+                get_rrule_format(until)
+                )
+
+        batch.append(
+            CalendarTimeSlot(
+                creator = random_generator.choice(calendar_users),
+                start_datetime = start_datetime,
+                end_datetime = end_datetime,
+                rrule = rrule,
+                )
+            )
+
+        if len(batch) == batch_size:
+            bulk_create_time_slots(batch)
+            batch = []
+
+    if batch:
+        bulk_create_time_slots(batch)
+
+    return {
+        "users" : number_of_users,
+        "time_slots" : number_of_time_slots,
+        }
+
+
+def time_function(function, repetitions):
+    """
+    Call a function several times and summarize how long the calls took.
+
+    Input: A function without arguments, and the number of calls.
+    Output: A dictionary with the minimum, median, mean and maximum duration
+            in seconds, and the number of queries of the last call.
+    """
+
+    durations = []
+
+    for _ in range(repetitions):
+        reset_queries()
+        with CaptureQueriesContext(connection) as context:
+            started = timeit.default_timer()
+            function()
+            durations.append(timeit.default_timer() - started)
+
+    return {
+        "repetitions" : repetitions,
+        "min" : min(durations),
+        "median" : statistics.median(durations),
+        "mean" : statistics.mean(durations),
+        "max" : max(durations),
+        "queries" : len(context.captured_queries),
+        }
+
+
+def get_benchmark_client():
+    """
+    Return a test client which sends requests with a host accepted by
+    ALLOWED_HOSTS, so that the benchmarks can run against any settings.
+    """
+
+    hosts = [
+        host for host in settings.ALLOWED_HOSTS
+        if host and not host.startswith(".") and host != "*"
+        ]
+
+    return Client(HTTP_HOST = hosts[0] if hosts else "localhost")
+
+
+def run_benchmarks(
+    username_prefix = "bench", group_sizes = (2, 5, 20), repetitions = 5,
+    seed = 0
+    ):
+    """
+    Time the expensive operations of the API against the data set created by
+    generate_calendar_data(). Nothing is written to the database: requests
+    creating time slots are rolled back.
+
+    Input: The prefix of the usernames to benchmark with, the numbers of
+           users to intersect, the number of repetitions of each benchmark,
+           and the random seed used to pick users and time slots.
+    Output: A dictionary which can be serialized as JSON e.g.
+
+        {
+            "meta" : {
+                "commit" : Git commit of the code, if available,
+                "database" : Database vendor,
+                "users" : Number of benchmark users,
+                "time_slots" : Number of time slots of benchmark users,...
+                },
+            "results" : [
+                {
+                    "name" : Name of the benchmark,
+                    "scale" : Number of users or time slots involved,
+                    "repetitions" : Number of repetitions,
+                    "min" : Shortest duration in seconds,
+                    "median" : Median duration in seconds,
+                    "mean" : Mean duration in seconds,
+                    "max" : Longest duration in seconds,
+                    "queries" : Number of database queries,
+                    },...
+                ],
+            }
+    """
+
+    random_generator = random.Random(seed)
+    client = get_benchmark_client()
+
+    calendar_users = list(
+        CalendarUser.objects.filter(
+            username__startswith = username_prefix
+            ).order_by("id")
+        )
+
+    if len(calendar_users) < max(group_sizes):
+        raise ValueError(
+            "At least {0} users with the prefix {1} are needed".format(
+                max(group_sizes), username_prefix
+                )
+            )
+
+    calendar_time_slots = CalendarTimeSlot.objects.filter(
+        creator__in = calendar_users
+        )
+
+    results = []
+
+    def add_result(name, scale, function):
+        result = {"name" : name, "scale" : scale}
+        result.update(time_function(function, repetitions))
+        results.append(result)
+
+    # Expansion of recurrence rules
+
+    sample = list(calendar_time_slots.exclude(rrule = None).order_by("id")[:100])
+
+    add_result(
+        "get_all_one_hour_time_slots", len(sample),
+        lambda: [
+            calendar_time_slot.get_all_one_hour_time_slots()
+            for calendar_time_slot in sample
+            ]
+        )
+    add_result(
+        "get_one_hour_time_slot_intervals", len(sample),
+        lambda: [
+            calendar_time_slot.get_one_hour_time_slot_intervals()
+            for calendar_time_slot in sample
+            ]
+        )
+
+    # Intersections, with an empty and with a filled schedule cache
+
+    intersection_url = reverse("time_slot_intersection_view")
+
+    for group_size in group_sizes:
+        usernames = ",".join(
+            calendar_user.username for calendar_user in
+            random_generator.sample(calendar_users, group_size)
+            )
+
+        def intersect_with_cold_cache():
+            schedule_cache.clear()
+            client.get(intersection_url, {"users" : usernames})
+
+        add_result("intersection_cold_cache", group_size,
+            intersect_with_cold_cache)
+        add_result("intersection_warm_cache", group_size,
+            lambda: client.get(intersection_url, {"users" : usernames}))
+
+    # Time slot list
+
+    list_url = reverse("calendar_time_slot_view")
+    creator = random_generator.choice(calendar_users)
+
+    add_result("time_slot_list", 1, lambda: client.get(list_url))
+    add_result(
+        "time_slot_list_by_creator", 1,
+        lambda: client.get(list_url, {"creator" : creator.username})
+        )
+
+    # Time slot creation, rolled back
+
+    def get_time_slot_data():
+        start_datetime = datetime(2018, 7, 2, 9) + timedelta(
+            days = random_generator.randrange(365)
+            )
+        return {
+            "creator" : creator.username,
+            "start_datetime" : start_datetime.isoformat(),
+            "end_datetime" : (start_datetime + timedelta(hours = 2)).isoformat(),
+            "frequency" : "WEEKLY",
+            "interval" : 1,
+            "until" : (start_datetime + timedelta(days = 90)).date().isoformat(),
+            }
+
+    def post_and_roll_back(url, data):
+        with transaction.atomic():
+            client.post(url, json.dumps(data), content_type = "application/json")
+            transaction.set_rollback(True)
+        schedule_cache.invalidate(creator.id)
+
+    add_result(
+        "time_slot_create", 1,
+        lambda: post_and_roll_back(list_url, get_time_slot_data())
+        )
+    add_result(
+        "time_slot_bulk_create", 100,
+        lambda: post_and_roll_back(
+            reverse("calendar_time_slot_bulk_view"),
+            [get_time_slot_data() for _ in range(100)]
+            )
+        )
+
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr = subprocess.DEVNULL
+            ).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "meta" : {
+            "commit" : commit,
+            "database" : connection.vendor,
+            "users" : len(calendar_users),
+            "time_slots" : calendar_time_slots.count(),
+            "repetitions" : repetitions,
+            "seed" : seed,
+            },
+        "results" : results,
+        }
+
+
+def compare_benchmark_results(baseline, current):
+    """
+    Compare the median durations of two benchmark runs.
+
+    Input: Two dictionaries as returned by run_benchmarks().
+    Output: A list of dictionaries with the name and scale of each benchmark
+            present in both runs, the two medians, and their ratio (current
+            divided by baseline).
+    """
+
+    baseline_medians = dict(
+        ((result["name"], result["scale"]), result["median"])
+        for result in baseline["results"]
+        )
+
+    comparison = []
+
+    for result in current["results"]:
+        key = (result["name"], result["scale"])
+        if key not in baseline_medians:
+            continue
+        comparison.append(
+            {
+                "name" : result["name"],
+                "scale" : result["scale"],
+                "baseline" : baseline_medians[key],
+                "current" : result["median"],
+                "ratio" : (
+                    result["median"] / baseline_medians[key]
+                    if baseline_medians[key] else None
+                    ),
+                }
+            )
+
+    return comparison
@@ -0,0 +1,100 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from time_slots.models import CalendarTimeSlot
+from time_slots.occurrences import (
+    get_batch_size, materialize_time_slot_occurrences
+    )
+from time_slots.schedule_cache import schedule_cache
+from users.models import CalendarUser
+
+def insert_time_slots(calendar_time_slots, batch_size):
+    """
+    Insert time slots with bulk_create() and set their ids. Must be called
+    inside a transaction.
+
+    Input: A list of unsaved CalendarTimeSlot objects, and the batch size.
+    Output: True if the time slots were inserted, False if the database
+            can't tell their ids.
+    """
+
+    can_return_ids = connection.features.can_return_ids_from_bulk_insert
+
+    # SQLite does not return the ids of the inserted rows (e.g. PostgreSQL
+    # does). Its AutoFields are AUTOINCREMENT columns however, so ids are
+    # never reused, and the transaction holds the write lock from the first
+    # insert until the commit. The time slots therefore get the highest ids
+    # of the table, in the order in which they were inserted.
+
+    if not can_return_ids and connection.vendor != "sqlite":
+        return False
+
+    # bulk_create() does not call save(), which derives the rrule string.
+    for calendar_time_slot in calendar_time_slots:
+        calendar_time_slot.update_rrule()
+
+    CalendarTimeSlot.objects.bulk_create(
+        calendar_time_slots, batch_size = batch_size
+        )
+
+    if can_return_ids:
+        return True
+
+    ids = CalendarTimeSlot.objects.order_by("-id").values_list(
+        "id", flat = True
+        )[:len(calendar_time_slots)]
+
+    for calendar_time_slot, pk in zip(
+        calendar_time_slots, reversed(list(ids))
+        ):
+        calendar_time_slot.pk = pk
+        calendar_time_slot._state.adding = False
+        calendar_time_slot._state.db = CalendarTimeSlot.objects.db
+
+    return True
+
+
+def bulk_create_time_slots(calendar_time_slots, batch_size = None):
+    """
+    Save many time slots in one transaction, and do what the signal
+    handlers in time_slots/signals.py do for a single time slot: store the
+    occurrences and increment the schedule version of the creators.
+
+    Input: A list of unsaved CalendarTimeSlot objects, and optionally the
+           number of time slots inserted per query.
+    Output: The same list. The objects have their ids set.
+    """
+
+    if not calendar_time_slots:
+        return calendar_time_slots
+
+    creator_ids = set(
+        calendar_time_slot.creator_id
+        for calendar_time_slot in calendar_time_slots
+        )
+
+    if batch_size is None:
+        batch_size = get_batch_size(
+            [field.name for field in CalendarTimeSlot._meta.concrete_fields],
+            calendar_time_slots
+            )
+
+    with transaction.atomic():
+        # Elsewhere, the time slots are saved one by one, and the signal
+        # handlers take care of the rest.
+        if not insert_time_slots(calendar_time_slots, batch_size):
+            for calendar_time_slot in calendar_time_slots:
+                calendar_time_slot.save()
+            return calendar_time_slots
+
+        materialize_time_slot_occurrences(
+            calendar_time_slots, replace_existing = False
+            )
+        CalendarUser.objects.filter(pk__in = creator_ids).update(
+            schedule_version = F("schedule_version") + 1
+            )
+
+    for creator_id in creator_ids:
+        schedule_cache.invalidate(creator_id)
+
+    return calendar_time_slots
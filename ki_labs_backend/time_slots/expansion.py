@@ -0,0 +1,121 @@
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from time_slots.models import CalendarTimeSlot
+
+# One executor per process, created on first use. Executors are not shared
+# across a fork, e.g. by gunicorn workers forked from a preloaded master.
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def expand_time_slot(time_slot_fields):
+    """
+    Expand a single time slot. Runs in the worker processes of the process
+    executor, so it only receives and returns plain values.
+
+    Input: A (start_datetime, end_datetime, frequency, interval, until)
+           tuple.
+    Output: A list of (start, end) tuples, as returned by
+            CalendarTimeSlot.get_one_hour_time_slot_intervals().
+    """
+
+    start_datetime, end_datetime, frequency, interval, until = (
+        time_slot_fields
+        )
+
+    return CalendarTimeSlot(
+        start_datetime = start_datetime,
+        end_datetime = end_datetime,
+        frequency = frequency,
+        interval = interval,
+        until = until,
+        ).get_one_hour_time_slot_intervals()
+
+
+def get_expansion_workers():
+
+    return settings.SCHEDULE_EXPANSION_WORKERS or os.cpu_count() or 1
+
+
+def get_expansion_executor():
+    """
+    Return the executor configured by SCHEDULE_EXPANSION_EXECUTOR, or None
+    for serial expansion.
+    """
+
+    global _executor, _executor_pid
+
+    mode = settings.SCHEDULE_EXPANSION_EXECUTOR
+
+    if mode == "serial":
+        return None
+
+    if mode != "process":
+        raise ImproperlyConfigured(
+            "Unknown SCHEDULE_EXPANSION_EXECUTOR {0}".format(mode)
+            )
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers = get_expansion_workers()
+                )
+            _executor_pid = os.getpid()
+
+    return _executor
+
+
+def expand_time_slots(calendar_time_slots):
+    """
+    Expand several time slots, in a pool of worker processes if
+    SCHEDULE_EXPANSION_EXECUTOR is set to 'process' and there are at least
+    SCHEDULE_EXPANSION_MINIMUM time slots. Smaller groups are expanded
+    serially, because handing them to the workers costs more than it saves.
+
+    Input: A list of CalendarTimeSlot objects.
+    Output: An iterator of the results of get_one_hour_time_slot_intervals()
+            for each time slot, in the order of calendar_time_slots. Time
+            slots are expanded serially as the iterator is consumed. The
+            process executor expands all of them at once, so their results
+            may pile up until they are consumed.
+    """
+
+    if len(calendar_time_slots) < settings.SCHEDULE_EXPANSION_MINIMUM:
+        executor = None
+    else:
+        executor = get_expansion_executor()
+
+    if executor is None:
+        return (
+            calendar_time_slot.get_one_hour_time_slot_intervals()
+            for calendar_time_slot in calendar_time_slots
+            )
+
+    # Send the time slots to the workers in a few chunks per worker, so the
+    # cost of each round trip is shared by many time slots while the work
+    # stays evenly spread.
+
+    chunksize = max(
+        math.ceil(len(calendar_time_slots) / (get_expansion_workers() * 4)), 1
+        )
+
+    return executor.map(
+        expand_time_slot,
+        [
+            (
+                calendar_time_slot.start_datetime,
+                calendar_time_slot.end_datetime,
+                calendar_time_slot.frequency,
+                calendar_time_slot.interval,
+                calendar_time_slot.until,
+                )
+            for calendar_time_slot in calendar_time_slots
+            ],
+        chunksize = chunksize
+        )
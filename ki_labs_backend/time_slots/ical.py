@@ -0,0 +1,272 @@
+from datetime import datetime, time
+import re
+
+import pytz
+from django.utils import timezone
+
+from time_slots.bulk import bulk_create_time_slots
+from time_slots.models import CalendarTimeSlot, get_latest_until
+from utils.datetime_ops import get_rrule_format
+from utils.ical_ops import (
+    fold_ical_content_line, format_ical_datetime, iterate_ical_events,
+    parse_ical_datetime, parse_ical_duration
+    )
+
+def get_rrule_from_ical_rrule(ical_rrule):
+    """
+    Convert the RRULE of an iCalendar event to the recurrence rules stored in
+    CalendarTimeSlot, which only support FREQ, INTERVAL and UNTIL.
+
+    Input: A string e.g. "FREQ=WEEKLY;UNTIL=20180801"
+    Output: A string e.g. "FREQ=WEEKLY;INTERVAL=1;UNTIL=20180801T235959"
+
+    Raises ValueError if the rule uses anything else.
+    """
+
+    parts = {}
+
+    for part in ical_rrule.split(";"):
+        key, _, value = part.partition("=")
+        parts[key.upper()] = value
+
+    # Without BYDAY, the week start does not change any occurrence.
+    parts.pop("WKST", None)
+
+    unsupported_keys = set(parts) - {"FREQ", "INTERVAL", "UNTIL"}
+
+    if unsupported_keys:
+        raise ValueError(
+            "Unsupported recurrence rule keywords: {0}".format(
+                ", ".join(sorted(unsupported_keys))
+                )
+            )
+
+    frequency = parts.get("FREQ", "").upper()
+
+    if frequency not in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY"):
+        raise ValueError("Unsupported recurrence frequency {0}".format(
+            frequency
+            ))
+
+    try:
+        interval = int(parts.get("INTERVAL", "1"))
+    except ValueError:
+        interval = 0
+
+    if interval < 1:
+        raise ValueError("Invalid recurrence interval {0}".format(
+            parts["INTERVAL"]
+            ))
+
+    if "UNTIL" not in parts:
+        raise ValueError("Recurrence rules without UNTIL are not supported")
+
+    # A date is interpreted like the until field of the time slot serializer,
+    # i.e. the time slot repeats until the end of that day. Recurrence rules
+    # are expanded with naive UTC datetimes.
+
+    until = parts["UNTIL"]
+
+    if "T" not in until:
+        until = datetime.combine(
+            datetime.strptime(until, "%Y%m%d"),
+            time(hour = 23, minute = 59, second = 59)
+            )
+    else:
+        until = parse_ical_datetime({}, until).astimezone(pytz.utc).replace(
+            tzinfo = None
+            )
+
+    return "FREQ={0};INTERVAL={1};UNTIL={2}".format(
+        frequency, interval, get_rrule_format(until)
+        )
+
+
+def get_time_slot_from_ical_event(event, calendar_user):
+    """
+    Map a VEVENT to an unsaved CalendarTimeSlot, applying the same rules as
+    the time slot serializer.
+
+    Input: A dictionary as generated by utils.ical_ops.iterate_ical_events(),
+           and the CalendarUser object who will own the time slot.
+    Output: An unsaved CalendarTimeSlot object.
+
+    Raises ValueError if the event can't be represented as a time slot.
+    """
+
+    if "DTSTART" not in event:
+        raise ValueError("DTSTART is missing")
+
+    start_datetime = parse_ical_datetime(*event["DTSTART"])
+
+    if "DTEND" in event:
+        end_datetime = parse_ical_datetime(*event["DTEND"])
+    elif "DURATION" in event:
+        end_datetime = start_datetime + parse_ical_duration(
+            event["DURATION"][1]
+            )
+    else:
+        raise ValueError("DTEND and DURATION are missing")
+
+    # Recurrence rules are expanded in UTC, like for the time slots created
+    # through the API.
+    start_datetime = start_datetime.astimezone(pytz.utc)
+    end_datetime = end_datetime.astimezone(pytz.utc)
+
+    for name, value in (("start", start_datetime), ("end", end_datetime)):
+        if value.minute != 0 or value.second != 0:
+            raise ValueError(
+                "The time slot should {0} at the beginning of an hour".format(
+                    name
+                    )
+                )
+
+    duration = end_datetime - start_datetime
+
+    if duration.total_seconds() <= 0:
+        raise ValueError("DTEND is not after DTSTART")
+
+    if duration.days > 0:
+        raise ValueError("Time slots must be shorter than a day")
+
+    rrule = None
+
+    if "RRULE" in event:
+        rrule = get_rrule_from_ical_rrule(event["RRULE"][1])
+
+    calendar_time_slot = CalendarTimeSlot(
+        creator = calendar_user,
+        start_datetime = start_datetime,
+        end_datetime = end_datetime,
+        rrule = rrule,
+        )
+
+    # Derive until from the rrule string
+    calendar_time_slot.update_rrule()
+
+    if calendar_time_slot.until is not None:
+        latest_until = get_latest_until(start_datetime)
+        if calendar_time_slot.until > latest_until:
+            raise ValueError(
+                "Time slots can repeat until {0} at the latest".format(
+                    latest_until.date().isoformat()
+                    )
+                )
+
+    return calendar_time_slot
+
+
+def import_ical_file(
+    ical_file, calendar_user, batch_size = 1000, max_errors = 100
+    ):
+    """
+    Create time slots from the VEVENT components of an iCalendar file.
+
+    The file is read one event at a time and the time slots are written in
+    batches, each in its own transaction. Their occurrences are written in
+    chunks as well (see materialize_time_slot_occurrences()), and time
+    slots can only repeat for a limited time, so memory use depends on
+    batch_size but not on the size of the file. Events which can't be
+    represented as time slots, including those repeating for too long, are
+    skipped.
+
+    Input: An iterable of lines, as bytes or strings e.g. an open file, the
+           CalendarUser object who will own the time slots, the number of
+           time slots written per batch and the maximum number of errors
+           reported.
+    Output: A dictionary e.g.
+
+        {
+            "imported" : Number of time slots created,
+            "skipped" : Number of events skipped,
+            "errors" : [
+                {
+                    "event" : Position of the event in the file, from 1,
+                    "uid" : UID of the event, if any,
+                    "error" : Why the event was skipped,
+                    },...
+                ],
+            }
+    """
+
+    result = {"imported" : 0, "skipped" : 0, "errors" : []}
+
+    batch = []
+
+    for position, event in enumerate(iterate_ical_events(ical_file), 1):
+        try:
+            batch.append(get_time_slot_from_ical_event(event, calendar_user))
+        except ValueError as error:
+            result["skipped"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append(
+                    {
+                        "event" : position,
+                        "uid" : event.get("UID", ({}, None))[1],
+                        "error" : str(error),
+                        }
+                    )
+            continue
+
+        if len(batch) == batch_size:
+            bulk_create_time_slots(batch)
+            result["imported"] += len(batch)
+            batch = []
+
+    if batch:
+        bulk_create_time_slots(batch)
+        result["imported"] += len(batch)
+
+    return result
+
+
+def generate_ical_calendar(calendar_time_slots, calendar_name):
+    """
+    Serialize time slots as an iCalendar object, one VEVENT per time slot.
+    Recurring time slots keep their recurrence rule.
+
+    Input: An iterable of CalendarTimeSlot objects, and the name of the
+           calendar.
+    Output: A generator of strings, one or more lines at a time.
+    """
+
+    yield "".join(
+        fold_ical_content_line(content_line) for content_line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//KI Labs//KI Labs Calendar//EN",
+            "CALSCALE:GREGORIAN",
+            "X-WR-CALNAME:{0}".format(calendar_name),
+            )
+        )
+
+    dtstamp = format_ical_datetime(timezone.now())
+
+    for calendar_time_slot in calendar_time_slots:
+        content_lines = [
+            "BEGIN:VEVENT",
+            "UID:time-slot-{0}@ki-labs-calendar".format(calendar_time_slot.id),
+            "DTSTAMP:{0}".format(dtstamp),
+            "DTSTART:{0}".format(
+                format_ical_datetime(calendar_time_slot.start_datetime)
+                ),
+            "DTEND:{0}".format(
+                format_ical_datetime(calendar_time_slot.end_datetime)
+                ),
+            ]
+        if calendar_time_slot.rrule is not None:
+            # Recurrence rules are stored with a naive UTC UNTIL. With a UTC
+            # DTSTART, RFC 5545 requires UNTIL to be marked as UTC as well.
+            content_lines.append(
+                "RRULE:{0}".format(
+                    re.sub(r"(UNTIL=\d{8}T\d{6})(?!Z)", r"\1Z",
+                        calendar_time_slot.rrule)
+                    )
+                )
+        content_lines += ["SUMMARY:Available", "END:VEVENT"]
+        yield "".join(
+            fold_ical_content_line(content_line)
+            for content_line in content_lines
+            )
+
+    yield fold_ical_content_line("END:VCALENDAR")
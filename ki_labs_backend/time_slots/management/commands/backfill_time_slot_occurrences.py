@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from time_slots.models import CalendarTimeSlot
+from time_slots.occurrences import materialize_time_slot_occurrences
+
+class Command(BaseCommand):
+
+    help = (
+        "Expand all existing time slots and store their occurrences in the "
+        "TimeSlotOccurrence table. Existing occurrences are replaced, so the "
+        "command can safely be run more than once."
+        )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            "--batch-size", type = int, default = 500,
+            help = "Number of time slots expanded per transaction."
+            )
+
+    def handle(self, *args, **options):
+
+        batch_size = options["batch_size"]
+
+        batch = []
+        number_of_time_slots = 0
+        number_of_occurrences = 0
+
+        for calendar_time_slot in CalendarTimeSlot.objects.order_by(
+            "id"
+            ).iterator():
+            batch.append(calendar_time_slot)
+            if len(batch) == batch_size:
+                number_of_occurrences += materialize_time_slot_occurrences(
+                    batch
+                    )
+                number_of_time_slots += len(batch)
+                batch = []
+
+        if batch:
+            number_of_occurrences += materialize_time_slot_occurrences(batch)
+            number_of_time_slots += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Stored {0} occurrences for {1} time slots.".format(
+                    number_of_occurrences, number_of_time_slots
+                    )
+                )
+            )
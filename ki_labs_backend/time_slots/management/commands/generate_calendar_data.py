@@ -0,0 +1,108 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from time_slots.benchmarks import (
+    generate_calendar_data, get_generated_username, get_generated_users
+    )
+from users.models import CalendarUser
+
+class Command(BaseCommand):
+
+    help = (
+        "Create a deterministic synthetic data set of users and time slots "
+        "for benchmarking. The same seed always produces the same data."
+        )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            "--users", type = int, default = 1000,
+            help = "Number of users to create."
+            )
+        parser.add_argument(
+            "--time-slots", type = int, default = 100000,
+            help = "Number of time slots to create."
+            )
+        parser.add_argument(
+            "--seed", type = int, default = 0, help = "Random seed."
+            )
+        parser.add_argument(
+            "--mix", default = "none:25,daily:25,weekly:35,monthly:15",
+            help = (
+                "Relative share of each recurrence frequency, as a comma "
+                "separated list of frequency:weight pairs. Use 'none' for "
+                "time slots which don't repeat."
+                )
+            )
+        parser.add_argument(
+            "--prefix", default = "bench",
+            help = "Prefix of the generated usernames."
+            )
+        parser.add_argument(
+            "--clear", action = "store_true",
+            help = (
+                "Delete the users created by this command with the prefix, "
+                "and their time slots, before creating new ones. Other users "
+                "are never deleted."
+                )
+            )
+
+    def handle(self, *args, **options):
+
+        frequency_mix = {}
+
+        try:
+            for pair in options["mix"].split(","):
+                frequency, weight = pair.split(":")
+                frequency = frequency.strip().upper()
+                if frequency not in ("NONE", "DAILY", "WEEKLY", "MONTHLY",
+                        "YEARLY"):
+                    raise ValueError(frequency)
+                frequency_mix[None if frequency == "NONE" else frequency] = (
+                    float(weight)
+                    )
+        except ValueError:
+            raise CommandError("Invalid --mix {0}".format(options["mix"]))
+
+        generated_users = get_generated_users(options["prefix"])
+
+        if not options["clear"] and generated_users.exists():
+            raise CommandError(
+                "Users with the prefix {0} were already created by this "
+                "command. Use --clear to replace them.".format(
+                    options["prefix"]
+                    )
+                )
+
+        # Users which were not created by this command are never replaced.
+
+        other_usernames = set(
+            CalendarUser.objects.filter(
+                username__startswith = options["prefix"]
+                ).exclude(
+                pk__in = generated_users.values("pk")
+                ).values_list("username", flat = True)
+            )
+
+        for i in range(options["users"]):
+            username = get_generated_username(options["prefix"], i)
+            if username in other_usernames:
+                raise CommandError(
+                    "User {0} already exists and was not created by this "
+                    "command. Use another --prefix.".format(username)
+                    )
+
+        if options["clear"]:
+            generated_users.delete()
+
+        result = generate_calendar_data(
+            options["users"], options["time_slots"], seed = options["seed"],
+            frequency_mix = frequency_mix, username_prefix = options["prefix"]
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Created {0} users and {1} time slots.".format(
+                    result["users"], result["time_slots"]
+                    )
+                )
+            )
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from time_slots.ical import import_ical_file
+from users.models import CalendarUser
+
+class Command(BaseCommand):
+
+    help = (
+        "Create time slots from the events of an iCalendar (.ics) file. "
+        "DTSTART, DTEND (or DURATION) and RRULE of each VEVENT are mapped to "
+        "a time slot. Events which can't be represented as time slots are "
+        "skipped and reported."
+        )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument("path", help = "Path of the .ics file.")
+        parser.add_argument(
+            "--creator", required = True,
+            help = "Username of the user who will own the time slots."
+            )
+        parser.add_argument(
+            "--batch-size", type = int, default = 1000,
+            help = "Number of time slots written per transaction."
+            )
+
+    def handle(self, *args, **options):
+
+        try:
+            calendar_user = CalendarUser.objects.get(
+                username = options["creator"]
+                )
+        except CalendarUser.DoesNotExist:
+            raise CommandError(
+                "User {0} does not exist".format(options["creator"])
+                )
+
+        with open(options["path"], "rb") as ical_file:
+            result = import_ical_file(
+                ical_file, calendar_user, batch_size = options["batch_size"]
+                )
+
+        for error in result["errors"]:
+            self.stderr.write(
+                "Skipped event {0} (UID {1}): {2}".format(
+                    error["event"], error["uid"], error["error"]
+                    )
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported {0} time slots, skipped {1} events.".format(
+                    result["imported"], result["skipped"]
+                    )
+                )
+            )
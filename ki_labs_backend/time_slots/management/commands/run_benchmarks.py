@@ -0,0 +1,80 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from time_slots.benchmarks import compare_benchmark_results, run_benchmarks
+
+class Command(BaseCommand):
+
+    help = (
+        "Time recurrence rule expansion, time slot intersections, the time "
+        "slot list and time slot creation against the data set created by "
+        "generate_calendar_data, and write the results as JSON."
+        )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            "--prefix", default = "bench",
+            help = "Prefix of the usernames to benchmark with."
+            )
+        parser.add_argument(
+            "--group-sizes", default = "2,5,20",
+            help = "Comma separated numbers of users to intersect."
+            )
+        parser.add_argument(
+            "--repetitions", type = int, default = 5,
+            help = "Number of repetitions of each benchmark."
+            )
+        parser.add_argument(
+            "--seed", type = int, default = 0,
+            help = "Random seed used to pick users."
+            )
+        parser.add_argument(
+            "--output", default = None,
+            help = "Path of the JSON file to write. Defaults to stdout."
+            )
+        parser.add_argument(
+            "--compare", default = None,
+            help = (
+                "Path of the JSON file of an earlier run. The ratio of the "
+                "median durations is printed for each benchmark."
+                )
+            )
+
+    def handle(self, *args, **options):
+
+        try:
+            group_sizes = [
+                int(group_size)
+                for group_size in options["group_sizes"].split(",")
+                ]
+            results = run_benchmarks(
+                username_prefix = options["prefix"],
+                group_sizes = group_sizes,
+                repetitions = options["repetitions"],
+                seed = options["seed"],
+                )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        output = json.dumps(results, indent = 2)
+
+        if options["output"] is None:
+            self.stdout.write(output)
+        else:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output)
+
+        if options["compare"] is not None:
+            with open(options["compare"]) as baseline_file:
+                baseline = json.load(baseline_file)
+            for comparison in compare_benchmark_results(baseline, results):
+                self.stdout.write(
+                    "{name} ({scale}): {baseline:.6f}s -> {current:.6f}s, "
+                    "x{ratio:.2f}".format(**comparison)
+                    if comparison["ratio"] is not None else
+                    "{name} ({scale}): {baseline:.6f}s -> {current:.6f}s".format(
+                        **comparison
+                        )
+                    )
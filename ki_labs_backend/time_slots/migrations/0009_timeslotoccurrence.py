@@ -0,0 +1,29 @@
+# Generated by Django 2.0.6 on 2026-10-18 07:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20180622_1218'),
+        ('time_slots', '0008_auto_20180623_1434'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeSlotOccurrence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.CalendarUser')),
+                ('time_slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='time_slots.CalendarTimeSlot')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timeslotoccurrence',
+            index=models.Index(fields=['creator', 'start'], name='time_slots__creator_5cdfd5_idx'),
+        ),
+    ]
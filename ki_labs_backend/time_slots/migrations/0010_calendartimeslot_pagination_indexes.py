@@ -0,0 +1,21 @@
+# Generated by Django 2.0.6 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_slots', '0009_timeslotoccurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendartimeslot',
+            index=models.Index(fields=['start_datetime', 'id'], name='time_slots__start_d_f0370e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calendartimeslot',
+            index=models.Index(fields=['creator', 'start_datetime', 'id'], name='time_slots__creator_e56df7_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.0.6 on 2026-10-18 08:07
+
+from django.db import migrations, models
+import pytz
+
+from utils.datetime_ops import parse_rrule
+
+
+def populate_recurrence_fields(apps, schema_editor):
+
+    CalendarTimeSlot = apps.get_model("time_slots", "CalendarTimeSlot")
+
+    for calendar_time_slot in CalendarTimeSlot.objects.exclude(
+        rrule = None
+        ).iterator():
+        recurrence = parse_rrule(calendar_time_slot.rrule)
+        calendar_time_slot.frequency = recurrence["frequency"]
+        calendar_time_slot.interval = recurrence["interval"]
+        if recurrence["until"] is not None:
+            calendar_time_slot.until = recurrence["until"].replace(
+                tzinfo = pytz.utc
+                )
+        calendar_time_slot.save(
+            update_fields = ["frequency", "interval", "until"]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_slots', '0010_calendartimeslot_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendartimeslot',
+            name='frequency',
+            field=models.CharField(choices=[('DAILY', 'DAILY'), ('WEEKLY', 'WEEKLY'), ('MONTHLY', 'MONTHLY'), ('YEARLY', 'YEARLY')], help_text='How frequently the time slot repeats, if it does.', max_length=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='calendartimeslot',
+            name='interval',
+            field=models.PositiveIntegerField(help_text='Number of frequency periods between two repetitions e.g. 2 with WEEKLY for every other week.', null=True),
+        ),
+        migrations.AddField(
+            model_name='calendartimeslot',
+            name='until',
+            field=models.DateTimeField(db_index=True, help_text='The last datetime at which a repetition of the time slot can start.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='calendartimeslot',
+            name='rrule',
+            field=models.TextField(help_text='Recurrence rule for repeating time slots, in accordance with https://tools.ietf.org/html/rfc5545#section-3.8.5. Supports only FREQ, INTERVAL and UNTIL keywords for the time being. Derived from frequency, interval and until when the time slot is saved.', null=True),
+        ),
+        migrations.RunPython(
+            populate_recurrence_fields, migrations.RunPython.noop
+            ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.0.6 on 2026-10-18 08:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_calendaruser_schedule_version'),
+        ('time_slots', '0011_calendartimeslot_recurrence_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityHour',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.CalendarUser')),
+                ('time_slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_hours', to='time_slots.CalendarTimeSlot')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='availabilityhour',
+            index=models.Index(fields=['start', 'creator'], name='time_slots__start_efccda_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.0.6 on 2026-10-18 08:23
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_effective_end(apps, schema_editor):
+
+    CalendarTimeSlot = apps.get_model("time_slots", "CalendarTimeSlot")
+
+    # See CalendarTimeSlot.update_rrule().
+    CalendarTimeSlot.objects.filter(frequency = None).update(
+        effective_end = F("end_datetime")
+        )
+    CalendarTimeSlot.objects.filter(
+        frequency__isnull = False, until__isnull = False
+        ).update(effective_end = F("until") + timedelta(hours = 1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_slots', '0012_availabilityhour'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendartimeslot',
+            name='effective_end',
+            field=models.DateTimeField(help_text='No occurrence of the time slot ends later than this datetime. Null for time slots repeating forever. Derived from end_datetime and until when the time slot is saved.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='calendartimeslot',
+            index=models.Index(fields=['creator', 'start_datetime', 'effective_end'], name='time_slots__creator_61c6e6_idx'),
+        ),
+        migrations.RunPython(
+            populate_effective_end, migrations.RunPython.noop
+            ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.0.6 on 2026-10-18 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_slots', '0013_calendartimeslot_effective_end'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeslotoccurrence',
+            index=models.Index(fields=['start'], name='time_slots__start_1ae943_idx'),
+        ),
+        migrations.DeleteModel(
+            name='AvailabilityHour',
+        ),
+    ]
@@ -1,10 +1,88 @@
-from datetime import timedelta
-import re
+from datetime import datetime, time, timedelta
 
-from dateutil.rrule import rrulestr
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rrulestr
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+import pytz
+
+from utils.datetime_ops import (
+    get_arithmetic_occurrences, get_rrule_format, parse_rrule
+    )
+from utils.interval_ops import ONE_HOUR
+
+RRULE_FREQUENCIES = {
+    "DAILY" : DAILY,
+    "WEEKLY" : WEEKLY,
+    "MONTHLY" : MONTHLY,
+    "YEARLY" : YEARLY,
+    }
+
+# Occurrences of DAILY and WEEKLY rules are separated by a fixed number of
+# days. MONTHLY and YEARLY rules skip months without the day of DTSTART
+# (e.g. the 31st), so they are left to dateutil.
+ARITHMETIC_FREQUENCY_STEPS = {
+    "DAILY" : timedelta(days = 1),
+    "WEEKLY" : timedelta(weeks = 1),
+    }
+
+def get_latest_until(start_datetime):
+    """
+    Time slots may only repeat for settings.MAXIMUM_RECURRENCE_DAYS after
+    the day they start, which bounds the number of occurrences stored for
+    them.
+
+    Input: The start_datetime of a time slot, as an aware datetime object.
+    Output: The latest until allowed for the time slot, i.e. the end
+            (23:59:59) of the last day in UTC.
+    """
+
+    last_day = start_datetime.astimezone(pytz.utc).date() + timedelta(
+        days = settings.MAXIMUM_RECURRENCE_DAYS
+        )
+
+    return datetime.combine(
+        last_day, time(hour = 23, minute = 59, second = 59)
+        ).replace(tzinfo = pytz.utc)
+
+
+class CalendarTimeSlotQuerySet(models.QuerySet):
+
+    def active(self, at = None):
+        """
+        Leave out the time slots whose last occurrence has ended.
+
+        Input: Optionally, a datetime object. Defaults to now.
+        Output: A queryset.
+        """
+
+        if at is None:
+            at = timezone.now()
+
+        return self.filter(Q(effective_end = None) | Q(effective_end__gt = at))
+
+    def overlapping(self, window_start = None, window_end = None):
+        """
+        Leave out the time slots none of whose occurrences can overlap a
+        window. Either end of the window can be left open by passing None.
+        Repeating time slots are kept if any of their occurrences may
+        overlap the window, without expanding their recurrence rules.
+
+        Input: Optionally, window_start and window_end as datetime objects.
+        Output: A queryset.
+        """
+
+        queryset = self
+
+        if window_start is not None:
+            queryset = queryset.active(at = window_start)
+
+        if window_end is not None:
+            queryset = queryset.filter(start_datetime__lt = window_end)
+
+        return queryset
 
-from utils.datetime_ops import get_rrule_format
 
 class CalendarTimeSlot(models.Model):
 
@@ -24,18 +102,130 @@ class CalendarTimeSlot(models.Model):
             "2018-06-22T17:00:00 is valid, but 2018-06-22T17:30:00 is not."
             )
         )
+    frequency = models.CharField(
+        max_length = 7,
+        null = True,
+        choices = [
+            (frequency, frequency) for frequency in RRULE_FREQUENCIES
+            ],
+        help_text = "How frequently the time slot repeats, if it does."
+        )
+    interval = models.PositiveIntegerField(
+        null = True,
+        help_text = (
+            "Number of frequency periods between two repetitions e.g. 2 with "
+            "WEEKLY for every other week."
+            )
+        )
+    until = models.DateTimeField(
+        null = True,
+        db_index = True,
+        help_text = (
+            "The last datetime at which a repetition of the time slot can "
+            "start."
+            )
+        )
+    effective_end = models.DateTimeField(
+        null = True,
+        help_text = (
+            "No occurrence of the time slot ends later than this datetime. "
+            "Null for time slots repeating forever. Derived from "
+            "end_datetime and until when the time slot is saved."
+            )
+        )
     rrule = models.TextField(
         null = True,
         help_text = (
             "Recurrence rule for repeating time slots, in accordance with "
             "https://tools.ietf.org/html/rfc5545#section-3.8.5. Supports "
-            "only FREQ, INTERVAL and UNTIL keywords for the time being."
+            "only FREQ, INTERVAL and UNTIL keywords for the time being. "
+            "Derived from frequency, interval and until when the time slot "
+            "is saved."
             )
         )
     creator = models.ForeignKey(
         "users.CalendarUser", on_delete = models.CASCADE
         )
 
+    objects = CalendarTimeSlotQuerySet.as_manager()
+
+    class Meta:
+        # Support the cursor pagination of the time slot list, with and
+        # without filtering by creator, and filtering the time slots of a
+        # creator by the window their occurrences overlap.
+        indexes = [
+            models.Index(fields = ["start_datetime", "id"]),
+            models.Index(fields = ["creator", "start_datetime", "id"]),
+            models.Index(
+                fields = ["creator", "start_datetime", "effective_end"]
+                ),
+            ]
+
+    def save(self, *args, **kwargs):
+
+        self.update_rrule()
+        super().save(*args, **kwargs)
+
+    def update_rrule(self):
+        """
+        Derive the rrule string from frequency, interval and until. Time
+        slots built with only an rrule string get their frequency, interval
+        and until from it instead. Also derives effective_end. Must be
+        called before saving the time slot without save(), e.g. with
+        bulk_create().
+        """
+
+        if self.frequency is None and self.rrule is not None:
+            recurrence = parse_rrule(self.rrule)
+            self.frequency = recurrence["frequency"]
+            self.interval = recurrence["interval"]
+            self.until = recurrence["until"] and recurrence["until"].replace(
+                tzinfo = pytz.utc
+                )
+
+        if self.frequency is None:
+            self.rrule = None
+            self.effective_end = self.end_datetime
+            return
+
+        # Occurrences are clipped at UNTIL to the one hour time slots
+        # starting before it, so none of them ends later than an hour after
+        # UNTIL. Recurrence rules without UNTIL never end.
+
+        if self.until is None:
+            self.effective_end = None
+        else:
+            self.effective_end = self.until + ONE_HOUR
+
+        if self.interval is None:
+            self.interval = 1
+
+        self.rrule = "FREQ={0};INTERVAL={1}".format(
+            self.frequency, self.interval
+            )
+
+        if self.until is not None:
+            self.rrule += ";UNTIL={0}".format(
+                get_rrule_format(self.get_naive_until())
+                )
+
+    def get_naive_until(self):
+        """
+        Recurrence rules are expanded with naive datetimes, in the time zone
+        of start_datetime. UNTIL has always been kept as a naive UTC datetime
+        in the rrule string, and until is stored in UTC.
+
+        Output: A naive datetime object, or None.
+        """
+
+        if self.until is None:
+            return None
+
+        if timezone.is_naive(self.until):
+            return self.until
+
+        return self.until.astimezone(pytz.utc).replace(tzinfo = None)
+
     def get_all_one_hour_time_slots(self):
         """
         Expand the recurrence rule to get all one hour time slots corresponding
@@ -88,7 +278,136 @@ class CalendarTimeSlot(models.Model):
 
         return all_one_hour_timeslots
 
+    def get_one_hour_time_slot_intervals(self):
+        """
+        Expand the recurrence rule to get all occurrences of this time slot
+        as intervals. This covers exactly the same one hour time slots as
+        get_all_one_hour_time_slots(), but the recurrence rule is expanded
+        once per calendar day touched by the time slot instead of once per
+        hour.
+
+        Output: List of (start, end) tuples, where each tuple stands for the
+                one hour time slots starting at start, start + 1 hour,... up
+                to end e.g.
+
+            [
+                (
+                    datetime.datetime(2018, 06, 25, 9, 0, 0),
+                    datetime.datetime(2018, 06, 25, 11, 0, 0),
+                    ),
+                (
+                    datetime.datetime(2018, 06, 27, 9, 0, 0),
+                    datetime.datetime(2018, 06, 27, 11, 0, 0),
+                    ),...
+                ]
+        """
+
+        diff = self.end_datetime - self.start_datetime
+        diff_in_hours = diff.seconds // 3600
+
+        if diff_in_hours == 0:
+            return []
+
+        if self.frequency is None and self.rrule is not None:
+            self.update_rrule()
+
+        if self.frequency is None:
+            return [
+                (
+                    self.start_datetime,
+                    self.start_datetime + timedelta(hours = diff_in_hours)
+                    )
+                ]
+
+        # A recurrence rule only depends on the time of DTSTART through
+        # the UNTIL cutoff. All one hour time slots falling on the same
+        # calendar day therefore repeat on the same days (MONTHLY and YEARLY
+        # rules skip days like the 31st, so this does not hold across
+        # midnight). We expand the rule once for each such day and clip the
+        # last occurrences at UNTIL.
+
+        until = self.get_naive_until()
+        tzinfo = self.start_datetime.tzinfo
+
+        segments = []
+
+        for i in range(diff_in_hours):
+            start = self.start_datetime + timedelta(hours = i)
+            if segments and start.date() == segments[-1][0].date():
+                segments[-1][1] += 1
+            else:
+                segments.append([start, 1])
+
+        all_intervals = []
+
+        for segment_start, segment_hours in segments:
+            dtstart = segment_start.replace(tzinfo = None)
+            if self.frequency in ARITHMETIC_FREQUENCY_STEPS:
+                occurrences = get_arithmetic_occurrences(
+                    dtstart,
+                    ARITHMETIC_FREQUENCY_STEPS[self.frequency] * (
+                        self.interval or 1
+                        ),
+                    until
+                    )
+            else:
+                occurrences = rrule(
+                    RRULE_FREQUENCIES[self.frequency],
+                    dtstart = dtstart,
+                    interval = self.interval or 1,
+                    until = until,
+                    )
+            duration = timedelta(hours = segment_hours)
+            for occurrence in occurrences:
+                end = occurrence + duration
+                # Only the one hour time slots starting at or before UNTIL
+                # are kept.
+                if until is not None and end - ONE_HOUR > until:
+                    end = occurrence + (
+                        (until - occurrence) // ONE_HOUR + 1
+                        ) * ONE_HOUR
+                all_intervals.append(
+                    (
+                        occurrence.replace(tzinfo = tzinfo),
+                        end.replace(tzinfo = tzinfo)
+                        )
+                    )
+
+        return all_intervals
+
     def __str__(self):
         return "Start datetime : {0}, End datetime : {1}, RRule : {2}".format(
             self.start_datetime, self.end_datetime, self.rrule
             )
+
+
+class TimeSlotOccurrence(models.Model):
+    """
+    Denormalized occurrences of a CalendarTimeSlot, as returned by
+    CalendarTimeSlot.get_one_hour_time_slot_intervals(). Rows are written
+    when a time slot is saved and deleted along with it, so reading the
+    availability of a user is an indexed range query instead of a
+    recurrence rule expansion.
+    """
+
+    time_slot = models.ForeignKey(
+        CalendarTimeSlot, on_delete = models.CASCADE,
+        related_name = "occurrences"
+        )
+    creator = models.ForeignKey(
+        "users.CalendarUser", on_delete = models.CASCADE
+        )
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+
+    class Meta:
+        # Read the occurrences of some users, and of all users during a
+        # window (see AvailabilityView).
+        indexes = [
+            models.Index(fields = ["creator", "start"]),
+            models.Index(fields = ["start"]),
+            ]
+
+    def __str__(self):
+        return "Start : {0}, End : {1}".format(self.start, self.end)
+
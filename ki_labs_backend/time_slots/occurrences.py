@@ -0,0 +1,225 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from ki_labs_backend.metrics import metrics_registry
+from time_slots.expansion import expand_time_slots
+from time_slots.models import TimeSlotOccurrence
+from utils.interval_ops import clip_intervals
+from utils.timing_ops import timing_phase
+
+MAXIMUM_OCCURRENCE_DURATION = timedelta(days = 1)
+MAXIMUM_BUFFERED_OCCURRENCES = 10000
+
+def get_batch_size(fields, objects):
+
+    # An explicit batch size is used as is by Django, even above the limit of
+    # variables per query of the database (e.g. 999 for SQLite).
+    return max(
+        min(1000, connection.ops.bulk_batch_size(fields, objects)), 1
+        )
+
+
+def insert_rows(model, field_names, rows):
+    """
+    Insert rows into the table of a model with multi-row INSERT statements,
+    without building model instances. bulk_create() spends most of its time
+    building the instances and compiling every value, which dominates
+    writing the many occurrences of recurring time slots.
+
+    Input: A model class, the names of the fields to write, and a list of
+           tuples of values in the same order. The fields must be foreign
+           keys, given as ids, or datetime fields.
+    """
+
+    fields = [model._meta.get_field(field_name) for field_name in field_names]
+
+    adapters = [
+        connection.ops.adapt_datetimefield_value
+        if field.get_internal_type() == "DateTimeField" else None
+        for field in fields
+        ]
+
+    batch_size = get_batch_size(field_names, rows)
+
+    row_placeholder = "({0})".format(", ".join(["%s"] * len(fields)))
+    statement = "INSERT INTO {0} ({1}) VALUES ".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        )
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            parameters = [
+                value if adapter is None else adapter(value)
+                for row in batch
+                for value, adapter in zip(row, adapters)
+                ]
+            cursor.execute(
+                statement + ", ".join([row_placeholder] * len(batch)),
+                parameters
+                )
+
+
+def materialize_time_slot_occurrences(
+    calendar_time_slots, replace_existing = True
+    ):
+    """
+    Expand the given time slots and store their occurrences in the
+    TimeSlotOccurrence table, replacing any occurrences stored before.
+
+    The time slots are expanded one at a time, and their occurrences are
+    written whenever MAXIMUM_BUFFERED_OCCURRENCES of them have piled up, so
+    memory use depends on the number of occurrences of the largest time
+    slot rather than on the size of the batch. The process executor (see
+    expand_time_slots()) expands the whole batch at once instead.
+
+    Input: An iterable of saved CalendarTimeSlot objects. replace_existing
+           can be set to False for time slots which were just inserted and
+           can't have any occurrences yet.
+    Output: The number of occurrences written.
+    """
+
+    calendar_time_slots = list(calendar_time_slots)
+    field_names = ["time_slot", "creator", "start", "end"]
+
+    time_slot_occurrences = []
+    number_of_occurrences = 0
+
+    with transaction.atomic():
+        if replace_existing:
+            TimeSlotOccurrence.objects.filter(
+                time_slot__in = calendar_time_slots
+                ).delete()
+
+        interval_lists = expand_time_slots(calendar_time_slots)
+
+        for calendar_time_slot in calendar_time_slots:
+            with timing_phase("expand"):
+                intervals = next(interval_lists)
+            time_slot_occurrences += [
+                (
+                    calendar_time_slot.id, calendar_time_slot.creator_id,
+                    start, end
+                    )
+                for start, end in intervals
+                ]
+            if len(time_slot_occurrences) >= MAXIMUM_BUFFERED_OCCURRENCES:
+                insert_rows(
+                    TimeSlotOccurrence, field_names, time_slot_occurrences
+                    )
+                number_of_occurrences += len(time_slot_occurrences)
+                time_slot_occurrences = []
+
+        insert_rows(TimeSlotOccurrence, field_names, time_slot_occurrences)
+        number_of_occurrences += len(time_slot_occurrences)
+
+    metrics_registry.increment(
+        "rrule_occurrences_expanded_total", amount = number_of_occurrences
+        )
+
+    return number_of_occurrences
+
+
+def get_time_slot_occurrence_intervals(
+    calendar_user_ids, window_start = None, window_end = None
+    ):
+    """
+    Read the stored occurrences of all time slots of several users with a
+    single query.
+
+    Input: An iterable of CalendarUser ids, and optionally window_start and
+           window_end as datetime objects. If given, only the one hour time
+           slots lying entirely inside the window are returned.
+    Output: A dictionary mapping each user id to a list of (start, end)
+            tuples sorted by start.
+    """
+
+    calendar_user_ids = set(calendar_user_ids)
+
+    time_slot_occurrences = TimeSlotOccurrence.objects.filter(
+        creator__in = calendar_user_ids
+        )
+
+    # Occurrences are always shorter than a day (see
+    # CalendarTimeSlot.get_one_hour_time_slot_intervals()), so bounding start
+    # from below keeps the query a range scan on the (creator, start) index
+    # instead of reading every occurrence before the window.
+
+    if window_start is not None:
+        time_slot_occurrences = time_slot_occurrences.filter(
+            start__gt = window_start - MAXIMUM_OCCURRENCE_DURATION,
+            end__gt = window_start,
+            )
+
+    if window_end is not None:
+        time_slot_occurrences = time_slot_occurrences.filter(
+            start__lt = window_end
+            )
+
+    intervals_by_calendar_user_id = {
+        calendar_user_id : [] for calendar_user_id in calendar_user_ids
+        }
+
+    for calendar_user_id, start, end in time_slot_occurrences.order_by(
+        "start"
+        ).values_list("creator_id", "start", "end"):
+        intervals_by_calendar_user_id[calendar_user_id].append((start, end))
+
+    if window_start is None and window_end is None:
+        return intervals_by_calendar_user_id
+
+    return {
+        calendar_user_id : clip_intervals(intervals, window_start, window_end)
+        for calendar_user_id, intervals in intervals_by_calendar_user_id.items()
+        }
+
+
+def iterate_time_slot_occurrence_intervals(
+    calendar_user_id, after, chunk_size = 50, max_chunk_size = 1000
+    ):
+    """
+    Read the stored occurrences of all time slots of a user lazily, in time
+    order. The occurrences are read in chunks which grow from chunk_size to
+    max_chunk_size, so that callers who only need the first few occurrences
+    only pay for a small query.
+
+    Input: A CalendarUser id, a datetime object, the size of the first chunk
+           and the maximum size of a chunk.
+    Output: A generator of (start, end) tuples sorted by start, for the
+            occurrences ending after the given datetime.
+    """
+
+    time_slot_occurrences = TimeSlotOccurrence.objects.filter(
+        creator_id = calendar_user_id,
+        start__gt = after - MAXIMUM_OCCURRENCE_DURATION,
+        end__gt = after,
+        ).order_by("start", "id")
+
+    last_start = None
+    last_id = None
+
+    while True:
+
+        # Each chunk continues after the last occurrence of the previous
+        # chunk, which is a range scan on the (creator, start) index.
+
+        chunk = time_slot_occurrences
+
+        if last_start is not None:
+            chunk = chunk.filter(
+                Q(start__gt = last_start) | Q(start = last_start, id__gt = last_id)
+                )
+
+        chunk = list(chunk.values_list("id", "start", "end")[:chunk_size])
+
+        for last_id, start, end in chunk:
+            yield (start, end)
+
+        if len(chunk) < chunk_size:
+            return
+
+        last_start = chunk[-1][1]
+        chunk_size = min(chunk_size * 2, max_chunk_size)
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+class CalendarTimeSlotCursorPagination(CursorPagination):
+    """
+    Paginates time slots by a cursor over (start_datetime, id). Unlike
+    offset based pagination, fetching a page costs the same no matter how
+    deep into the list it is, and pages stay consistent while time slots are
+    being created.
+    """
+
+    ordering = ("start_datetime", "id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+import threading
+
+from django.conf import settings
+
+from time_slots.occurrences import get_time_slot_occurrence_intervals
+from utils.interval_ops import (
+    clip_indexed_intervals, get_interval_index,
+    merge_one_hour_time_slot_intervals
+    )
+from utils.timing_ops import timing_phase
+
+class ScheduleCache(object):
+    """
+    A bounded, least recently used cache of the merged availability
+    intervals of users, stored together with their index (see
+    get_interval_index()).
+
+    Entries are stored together with the schedule_version of the user they
+    were computed for. A lookup with a different version is a miss, so
+    entries cached by one worker process never outlive a change made
+    through another one. Signal handlers additionally drop the entries of
+    changed users right away (see time_slots/signals.py).
+    """
+
+    def __init__(self, maxsize):
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, schedule_version):
+        """
+        Return the cached (intervals, interval_index) tuple of a user, or
+        None on a miss.
+        """
+
+        with self._lock:
+            entry = self._entries.get(user_id, None)
+            if entry is None or entry[0] != schedule_version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id, schedule_version, entry):
+
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[user_id] = (schedule_version, entry)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)
+
+    def invalidate(self, user_id):
+
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+
+        with self._lock:
+            return {
+                "hits" : self.hits,
+                "misses" : self.misses,
+                "size" : len(self._entries),
+                "maxsize" : self.maxsize,
+                }
+
+
+schedule_cache = ScheduleCache(settings.SCHEDULE_CACHE_SIZE)
+
+
+def get_availability_interval_lists(
+    calendar_users, window_start = None, window_end = None
+    ):
+    """
+    Return the merged availability intervals of several users, from the
+    schedule cache if possible. The availability of all users missing from
+    the cache is read with a single query.
+
+    Input: A list of CalendarUser objects, and optionally window_start and
+           window_end as datetime objects. If given, only the one hour time
+           slots lying entirely inside the window are returned.
+    Output: A list with one list of (start, end) tuples sorted by start for
+            each user, in the order of calendar_users.
+    """
+
+    windowed = window_start is not None or window_end is not None
+
+    intervals_by_calendar_user_id = {}
+
+    # Cached entries hold all intervals of a user and their index. With a
+    # window, only the intervals found by binary search are clipped.
+
+    for calendar_user in calendar_users:
+        entry = schedule_cache.get(
+            calendar_user.id, calendar_user.schedule_version
+            )
+        if entry is None:
+            continue
+        intervals, interval_index = entry
+        if windowed:
+            intervals = clip_indexed_intervals(
+                intervals, interval_index, window_start, window_end
+                )
+        intervals_by_calendar_user_id[calendar_user.id] = intervals
+
+    missing_calendar_users = [
+        calendar_user for calendar_user in calendar_users
+        if calendar_user.id not in intervals_by_calendar_user_id
+        ]
+
+    if not missing_calendar_users:
+        return [
+            intervals_by_calendar_user_id[calendar_user.id]
+            for calendar_user in calendar_users
+            ]
+
+    # With a window, only the occurrences inside it are read. They are not
+    # cached, since the cache holds the whole availability of each user.
+
+    occurrence_intervals_by_calendar_user_id = (
+        get_time_slot_occurrence_intervals(
+            [calendar_user.id for calendar_user in missing_calendar_users],
+            window_start, window_end
+            )
+        )
+
+    for calendar_user in missing_calendar_users:
+        with timing_phase("merge"):
+            intervals = merge_one_hour_time_slot_intervals(
+                occurrence_intervals_by_calendar_user_id[calendar_user.id]
+                )
+        if not windowed:
+            schedule_cache.set(
+                calendar_user.id, calendar_user.schedule_version,
+                (intervals, get_interval_index(intervals))
+                )
+        intervals_by_calendar_user_id[calendar_user.id] = intervals
+
+    return [
+        intervals_by_calendar_user_id[calendar_user.id]
+        for calendar_user in calendar_users
+        ]
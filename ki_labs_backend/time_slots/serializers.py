@@ -1,11 +1,12 @@
 from datetime import datetime, time, timedelta
 
+import pytz
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
-from time_slots.models import CalendarTimeSlot
+from time_slots.models import CalendarTimeSlot, get_latest_until
 from users.models import CalendarUser
-from utils.datetime_ops import get_rrule_format
 
 class CalendarUserRelatedField(serializers.RelatedField):
 
@@ -17,6 +18,22 @@ class CalendarUserRelatedField(serializers.RelatedField):
             )
 
     def to_internal_value(self, data):
+
+        # When validating many time slots at once, the view resolves all
+        # creators beforehand with a single query and passes them in the
+        # context.
+        calendar_users_by_username = self.context.get(
+            "calendar_users_by_username", None
+            )
+
+        if calendar_users_by_username is not None:
+            try:
+                return calendar_users_by_username[data]
+            except (KeyError, TypeError):
+                raise serializers.ValidationError(
+                    "The username does not exist"
+                    )
+
         try:
             calendar_user = CalendarUser.objects.get(username = data)
         except CalendarUser.DoesNotExist:
@@ -40,6 +57,7 @@ class CalendarTimeSlotSerializer(ModelSerializer):
     interval = serializers.IntegerField(
         required = False,
         write_only = True,
+        min_value = 1,
         help_text = (
             "Integer. When using 'DAILY' frequency, an interval of 2 means "
             "once every two days, but with 'WEEKLY', it means once every two "
@@ -112,9 +130,28 @@ class CalendarTimeSlotSerializer(ModelSerializer):
                 "'frequency', 'interval' and 'until' must be provided."
                 )
 
+        # Every occurrence of the time slot is stored when it is saved, so
+        # the time slot can only repeat for a limited time.
+
+        if "until" in data:
+            latest_until = get_latest_until(start_datetime)
+            if data["until"] > latest_until.date():
+                raise serializers.ValidationError(
+                    "Time slots can repeat for at most {0} days. For this "
+                    "time slot, 'until' can be {1} at the latest.".format(
+                        settings.MAXIMUM_RECURRENCE_DAYS,
+                        latest_until.date().isoformat()
+                        )
+                    )
+
         return data
 
-    def create(self, validated_data):
+    def build_time_slot(self, validated_data):
+        """
+        Build an unsaved CalendarTimeSlot object from validated data.
+        """
+
+        validated_data = dict(validated_data)
 
         are_rrule_parameters_present = [
             "frequency" in validated_data,
@@ -123,33 +160,51 @@ class CalendarTimeSlotSerializer(ModelSerializer):
             ]
 
         # If none of the rrule parameters are present, then the time slot
-        # does not repeat and rrule can be set to null.
+        # does not repeat, and frequency, interval and until stay null.
+        # Otherwise, the time slot repeats until the end of the until day.
+        # Recurrence rules are expanded in UTC, so until is stored in UTC.
+        # The rrule string is derived from these fields when the time slot
+        # is saved.
         if not(all(are_rrule_parameters_present)):
-            validated_data["rrule"] = None
-        # If rrule parameters are present, compute the rrule string.
+            for field in ("frequency", "interval", "until"):
+                validated_data.pop(field, None)
         else:
             validated_data["until"] = datetime.combine(
                 validated_data["until"],
                 time(hour = 23, minute = 59, second = 59)
-                )
-            rrule = "FREQ={0};INTERVAL={1};UNTIL={2}".format(
-                validated_data["frequency"],
-                validated_data["interval"],
-                get_rrule_format(validated_data["until"])
-                )
-            validated_data["rrule"] = rrule
+                ).replace(tzinfo = pytz.utc)
+
+        return CalendarTimeSlot(**validated_data)
+
+    def create(self, validated_data):
 
-            # The model does not have fields for frequency, interval and
-            # until separately, but rather a field for the rrule string.
-            # We get rid of these unnecessary fields before saving the
-            # model object.
-            validated_data.pop("frequency")
-            validated_data.pop("interval")
-            validated_data.pop("until")
+        calendar_time_slot = self.build_time_slot(validated_data)
+        calendar_time_slot.save()
 
-        return CalendarTimeSlot.objects.create(**validated_data)
+        return calendar_time_slot
 
     class Meta:
         model = CalendarTimeSlot
-        fields = "__all__"
+        # effective_end is derived by the model, only to filter time slots.
+        exclude = ("effective_end",)
         read_only_fields = ("rrule",)
+        # The frequency, interval and until model fields are written through
+        # the fields declared above, and represented by rrule in responses.
+
+
+class CompactCalendarTimeSlotSerializer(serializers.BaseSerializer):
+    """
+    Read only representation of time slots for the compact renderers (see
+    ki_labs_backend/renderers.py), with the username of the creator and
+    Unix timestamps.
+    """
+
+    def to_representation(self, calendar_time_slot):
+
+        return {
+            "id" : calendar_time_slot.id,
+            "creator" : calendar_time_slot.creator.username,
+            "start" : int(calendar_time_slot.start_datetime.timestamp()),
+            "end" : int(calendar_time_slot.end_datetime.timestamp()),
+            "rrule" : calendar_time_slot.rrule,
+            }
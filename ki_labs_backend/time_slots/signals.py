@@ -0,0 +1,39 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from time_slots.models import CalendarTimeSlot
+from time_slots.occurrences import materialize_time_slot_occurrences
+from time_slots.schedule_cache import schedule_cache
+from users.models import CalendarUser
+
+@receiver(post_save, sender = CalendarTimeSlot)
+def update_time_slot_occurrences(sender, instance, raw, **kwargs):
+
+    # Fixtures are loaded with raw = True. Their occurrences are written by
+    # the backfill_time_slot_occurrences command instead.
+    if raw:
+        return
+
+    # Occurrences are deleted together with the time slot through the
+    # cascading foreign key, so there is no post_delete counterpart.
+    materialize_time_slot_occurrences([instance])
+
+
+@receiver(post_save, sender = CalendarTimeSlot)
+@receiver(post_delete, sender = CalendarTimeSlot)
+def increment_schedule_version(sender, instance, **kwargs):
+
+    # update() does not send post_save for the user, so this does not
+    # trigger invalidate_schedule_cache() below.
+    CalendarUser.objects.filter(pk = instance.creator_id).update(
+        schedule_version = F("schedule_version") + 1
+        )
+    schedule_cache.invalidate(instance.creator_id)
+
+
+@receiver(post_save, sender = CalendarUser)
+@receiver(post_delete, sender = CalendarUser)
+def invalidate_schedule_cache(sender, instance, **kwargs):
+
+    schedule_cache.invalidate(instance.pk)
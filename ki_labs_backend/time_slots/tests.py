@@ -1,3 +1,1577 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from io import StringIO
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import pytz
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ki_labs_backend.metrics import MetricsRegistry, format_state
+from time_slots.benchmarks import generate_calendar_data
+from time_slots.expansion import expand_time_slots
+from time_slots.models import CalendarTimeSlot
+from time_slots.schedule_cache import (
+    get_availability_interval_lists, schedule_cache
+    )
+from time_slots.views import generate_time_slot_intersection_json
+from users.models import CalendarUser
+from utils.bitmap_ops import (
+    get_common_one_hour_time_slot_intervals_with_bitmaps, numpy
+    )
+from utils.interval_ops import (
+    get_common_one_hour_time_slot_intervals,
+    merge_one_hour_time_slot_intervals, split_into_one_hour_time_slots
+    )
+
+class TimeSlotIntersectionViewQueryCountTest(TestCase):
+
+    def setUp(self):
+
+        schedule_cache.clear()
+
+        start_datetime = timezone.make_aware(datetime(2018, 6, 25, 9, 0, 0))
+
+        self.usernames = []
+
+        for i in range(10):
+            calendar_user = CalendarUser.objects.create(
+                username = "user{0}".format(i), is_interviewer = i > 0
+                )
+            self.usernames.append(calendar_user.username)
+            CalendarTimeSlot.objects.create(
+                creator = calendar_user,
+                start_datetime = start_datetime,
+                end_datetime = start_datetime + timedelta(hours = 8),
+                rrule = "FREQ=DAILY;INTERVAL=1;UNTIL=20180630T235959",
+                )
+            CalendarTimeSlot.objects.create(
+                creator = calendar_user,
+                start_datetime = start_datetime + timedelta(days = 10),
+                end_datetime = start_datetime + timedelta(days = 10, hours = 2),
+                )
+
+        self.url = reverse("time_slot_intersection_view")
+
+    def test_number_of_queries_does_not_depend_on_number_of_users(self):
+
+        for number_of_users in (2, 5, 10):
+            schedule_cache.clear()
+            # One query for the users and one for their occurrences
+            with self.assertNumQueries(2):
+                response = self.client.get(
+                    self.url,
+                    {"users" : ",".join(self.usernames[:number_of_users])}
+                    )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                len(response.data["intersecting one hour time slots"]), 50
+                )
+
+    def test_cached_schedules_are_not_read_again(self):
+
+        self.client.get(self.url, {"users" : ",".join(self.usernames)})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {"users" : ",".join(self.usernames)}
+                )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_windowed_schedules(self):
+
+        parameters = {
+            "users" : ",".join(self.usernames),
+            "from" : "2018-06-26T10:00:00",
+            "to" : "2018-06-28T12:00:00",
+            }
+
+        # A miss only reads the occurrences in the window, and does not
+        # cache the partial schedules
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, parameters)
+        self.assertEqual(schedule_cache.info()["size"], 0)
+        expected = response.data["intersecting one hour time slots"]
+        self.assertEqual(len(expected), 18)
+
+        self.client.get(self.url, {"users" : ",".join(self.usernames)})
+
+        # A hit clips the cached schedules to the window
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, parameters)
+        self.assertEqual(
+            response.data["intersecting one hour time slots"], expected
+            )
+
+    def test_window_bounds_the_occurrences_read(self):
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.url,
+                {
+                    "users" : ",".join(self.usernames),
+                    "from" : "2018-06-26T10:00:00",
+                    "to" : "2018-06-28T12:00:00",
+                    }
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 2)
+
+        # Each user has 7 occurrences, of which the ones starting on the
+        # 26th, 27th and 28th touch the window
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM ({0})".format(queries[1]["sql"])
+                )
+            self.assertEqual(cursor.fetchone()[0], 30)
+
+    def test_streamed_response(self):
+
+        parameters = {"users" : ",".join(self.usernames)}
+
+        response = self.client.get(self.url, parameters)
+        streamed_response = self.client.get(
+            self.url, dict(parameters, stream = "1")
+            )
+
+        self.assertIsInstance(streamed_response, StreamingHttpResponse)
+        self.assertEqual(streamed_response["ETag"], response["ETag"])
+
+        content = b"".join(streamed_response.streaming_content)
+
+        self.assertEqual(content, response.content)
+        self.assertEqual(json.loads(content.decode("utf-8")), response.data)
+
+        # The same document in chunks of 7 one hour time slots
+        self.assertEqual(
+            "".join(
+                generate_time_slot_intersection_json(
+                    self.usernames,
+                    get_common_one_hour_time_slot_intervals(
+                        get_availability_interval_lists(
+                            list(CalendarUser.objects.order_by("id"))
+                            )
+                        ),
+                    chunk_size = 7
+                    )
+                ).encode("utf-8"),
+            response.content
+            )
+
+    def test_next_intersections_stop_early(self):
+
+        response = self.client.get(
+            self.url, {"users" : ",".join(self.usernames[:3])}
+            )
+        expected = response.data["intersecting one hour time slots"][5:8]
+
+        # One query for the users, and one for the first occurrences of each
+        # user
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse("time_slot_next_intersection_view"),
+                {
+                    "users" : ",".join(self.usernames[:3]),
+                    "after" : "2018-06-25T13:30:00",
+                    "limit" : 3,
+                    }
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["intersecting one hour time slots"], expected
+            )
+
+    def test_missing_user(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {"users" : "user0,nobody,user1,ghost"}
+                )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "User nobody does not exist")
+
+
+class TimeSlotIntersectionViewConditionalGetTest(TestCase):
+
+    def setUp(self):
+
+        schedule_cache.clear()
+
+        self.start_datetime = timezone.make_aware(
+            datetime(2018, 6, 25, 9, 0, 0)
+            )
+
+        for username in ("philipp", "carl"):
+            calendar_user = CalendarUser.objects.create(
+                username = username, is_interviewer = username == "philipp"
+                )
+            CalendarTimeSlot.objects.create(
+                creator = calendar_user,
+                start_datetime = self.start_datetime,
+                end_datetime = self.start_datetime + timedelta(hours = 2),
+                )
+
+        self.url = reverse("time_slot_intersection_view")
+        self.parameters = {"users" : "philipp,carl"}
+
+    def test_unchanged_result_is_not_computed_again(self):
+
+        response = self.client.get(self.url, self.parameters)
+        etag = response["ETag"]
+
+        # Only the users are read
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, self.parameters, HTTP_IF_NONE_MATCH = etag
+                )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_with_schedule(self):
+
+        etag = self.client.get(self.url, self.parameters)["ETag"]
+
+        CalendarTimeSlot.objects.create(
+            creator = CalendarUser.objects.get(username = "carl"),
+            start_datetime = self.start_datetime + timedelta(days = 1),
+            end_datetime = self.start_datetime + timedelta(days = 1, hours = 1),
+            )
+
+        response = self.client.get(
+            self.url, self.parameters, HTTP_IF_NONE_MATCH = etag
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_window(self):
+
+        etag = self.client.get(self.url, self.parameters)["ETag"]
+
+        response = self.client.get(
+            self.url,
+            dict(self.parameters, **{"from" : "2018-06-25T10:00:00"}),
+            HTTP_IF_NONE_MATCH = etag
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.data["intersecting one hour time slots"]), 1
+            )
+
+
+class TimeSlotIntersectionViewRangesTest(TestCase):
+
+    def setUp(self):
+
+        schedule_cache.clear()
+
+        # philipp is available from 9 to 17, carl from 9 to 12 and from 14
+        # to 15.
+
+        for username, hours in (
+                ("philipp", [(9, 17)]), ("carl", [(9, 12), (14, 15)])):
+            calendar_user = CalendarUser.objects.create(
+                username = username, is_interviewer = username == "philipp"
+                )
+            for start_hour, end_hour in hours:
+                CalendarTimeSlot.objects.create(
+                    creator = calendar_user,
+                    start_datetime = timezone.make_aware(
+                        datetime(2018, 6, 25, start_hour, 0, 0)
+                        ),
+                    end_datetime = timezone.make_aware(
+                        datetime(2018, 6, 25, end_hour, 0, 0)
+                        ),
+                    )
+
+        self.url = reverse("time_slot_intersection_view")
+
+    def test_ranges(self):
+
+        response = self.client.get(
+            self.url, {"users" : "philipp,carl", "output" : "ranges"}
+            )
+
+        self.assertEqual(
+            response.data["intersecting ranges"],
+            [
+                {
+                    "start" : "2018-06-25T09:00:00+00:00",
+                    "end" : "2018-06-25T12:00:00+00:00",
+                    },
+                {
+                    "start" : "2018-06-25T14:00:00+00:00",
+                    "end" : "2018-06-25T15:00:00+00:00",
+                    },
+                ]
+            )
+
+    def test_min_duration(self):
+
+        for output, key, expected_length in (
+                ("ranges", "intersecting ranges", 1),
+                ("hours", "intersecting one hour time slots", 3)):
+            response = self.client.get(
+                self.url,
+                {
+                    "users" : "philipp,carl",
+                    "output" : output,
+                    "min_duration" : "02:00:00",
+                    }
+                )
+            self.assertEqual(len(response.data[key]), expected_length)
+
+    def test_compact_representation(self):
+
+        response = self.client.get(
+            self.url,
+            {"users" : "philipp,carl", "format" : "compact"}
+            )
+
+        self.assertEqual(
+            response["Content-Type"], "application/vnd.ki-labs.compact+json"
+            )
+        self.assertEqual(
+            response.data["slots"],
+            [[1529917200, 3], [1529935200, 1]]
+            )
+
+
+class TimeSlotQuorumViewTest(TestCase):
+
+    def setUp(self):
+
+        schedule_cache.clear()
+
+        start_datetime = timezone.make_aware(datetime(2018, 6, 25, 9, 0, 0))
+
+        # philipp is available from 9 to 12, sarah from 10 to 13 and carl
+        # from 11 to 14.
+
+        for offset, username in enumerate(("philipp", "sarah", "carl")):
+            calendar_user = CalendarUser.objects.create(
+                username = username, is_interviewer = username != "carl"
+                )
+            CalendarTimeSlot.objects.create(
+                creator = calendar_user,
+                start_datetime = start_datetime + timedelta(hours = offset),
+                end_datetime = start_datetime + timedelta(hours = offset + 3),
+                )
+
+        self.url = reverse("time_slot_quorum_view")
+
+    def test_available_users_are_listed(self):
+
+        response = self.client.get(
+            self.url,
+            {
+                "users" : "philipp,sarah,carl",
+                "required" : "carl",
+                "min_users" : 2,
+                }
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (time_slot["start"], time_slot["available users"])
+                for time_slot in response.data["one hour time slots"]
+                ],
+            [
+                ("Mon Jun 25 11:00:00 2018", ["philipp", "sarah", "carl"]),
+                ("Mon Jun 25 12:00:00 2018", ["sarah", "carl"]),
+                ]
+            )
+
+    def test_invalid_min_users(self):
+
+        response = self.client.get(
+            self.url, {"users" : "philipp,sarah", "min_users" : 3}
+            )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TimeSlotOverlapRankingViewTest(TestCase):
+
+    def setUp(self):
+
+        schedule_cache.clear()
+
+        start_datetime = timezone.make_aware(datetime(2018, 6, 25, 9, 0, 0))
+
+        # carl is available from 9 to 17, and the interviewers for 1, 2, ...
+        # hours of that, except for the last one.
+
+        for hours, username in enumerate(
+                ["carl", "anna", "philipp", "sarah", "tom"]):
+            calendar_user = CalendarUser.objects.create(
+                username = username, is_interviewer = username != "carl"
+                )
+            if username == "carl":
+                hours = 8
+            elif username == "tom":
+                start_datetime -= timedelta(days = 1)
+            CalendarTimeSlot.objects.create(
+                creator = calendar_user,
+                start_datetime = start_datetime,
+                end_datetime = start_datetime + timedelta(hours = hours),
+                )
+
+        self.url = reverse("time_slot_overlap_ranking_view")
+
+    def test_interviewers_are_ranked(self):
+
+        # One query for the users, and one for their occurrences
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.url, {"candidate" : "carl", "limit" : 2}
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["interviewers"],
+            [
+                {"username" : "sarah", "overlapping hours" : 3},
+                {"username" : "philipp", "overlapping hours" : 2},
+                ]
+            )
+
+
+class AvailabilityViewTest(TestCase):
+
+    def setUp(self):
+
+        # philipp and sarah are available from 9 to 12, carl from 11 to 12.
+
+        for username, start_hour in (
+                ("philipp", 9), ("sarah", 9), ("carl", 11)):
+            calendar_user = CalendarUser.objects.create(
+                username = username, is_interviewer = username != "carl"
+                )
+            CalendarTimeSlot.objects.create(
+                creator = calendar_user,
+                start_datetime = timezone.make_aware(
+                    datetime(2018, 6, 25, start_hour, 0, 0)
+                    ),
+                end_datetime = timezone.make_aware(
+                    datetime(2018, 6, 25, 12, 0, 0)
+                    ),
+                )
+
+        self.url = reverse("availability_view")
+
+    def test_available_users(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {"at" : "2018-06-25T11:00:00"}
+                )
+
+        self.assertEqual(response.data["users"], ["carl", "philipp", "sarah"])
+
+        response = self.client.get(
+            self.url,
+            {
+                "from" : "2018-06-25T10:00:00",
+                "to" : "2018-06-25T12:00:00",
+                "type" : "interviewer",
+                }
+            )
+
+        self.assertEqual(response.data["users"], ["philipp", "sarah"])
+
+    def test_window_must_start_on_the_hour(self):
+
+        for parameters, name in (
+                ({"at" : "2018-06-25T11:30:00"}, "at"),
+                ({"at" : "2018-06-25T16:00:00+05:30"}, "at"),
+                (
+                    {
+                        "from" : "2018-06-25T10:30:00",
+                        "to" : "2018-06-25T11:30:00",
+                        },
+                    "from"
+                    )):
+            response = self.client.get(self.url, parameters)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(
+                "Invalid value for the '{0}' url parameter".format(name),
+                response.data["error"]
+                )
+
+        response = self.client.get(
+            self.url, {"at" : "2018-06-25T16:30:00+05:30"}
+            )
+
+        self.assertEqual(response.data["users"], ["carl", "philipp", "sarah"])
+
+    def test_window_covered_by_several_time_slots(self):
+
+        sarah = CalendarUser.objects.get(username = "sarah")
+        carl = CalendarUser.objects.get(username = "carl")
+
+        CalendarTimeSlot.objects.create(
+            creator = sarah,
+            start_datetime = timezone.make_aware(datetime(2018, 6, 25, 12)),
+            end_datetime = timezone.make_aware(datetime(2018, 6, 25, 14)),
+            )
+
+        # One hour time slots starting at half past don't cover the window
+        CalendarTimeSlot.objects.create(
+            creator = carl,
+            start_datetime = timezone.make_aware(
+                datetime(2018, 6, 25, 11, 30)
+                ),
+            end_datetime = timezone.make_aware(datetime(2018, 6, 25, 13, 30)),
+            )
+
+        response = self.client.get(
+            self.url,
+            {"from" : "2018-06-25T11:00:00", "to" : "2018-06-25T13:00:00"}
+            )
+
+        self.assertEqual(response.data["users"], ["sarah"])
+
+    def test_deleted_time_slots_are_removed(self):
+
+        CalendarTimeSlot.objects.filter(creator__username = "carl").delete()
+
+        response = self.client.get(self.url, {"at" : "2018-06-25T11:00:00"})
+
+        self.assertEqual(response.data["users"], ["philipp", "sarah"])
+
+
+class ServerTimingMiddlewareTest(TestCase):
+
+    def test_intersection_phases_are_reported(self):
+
+        schedule_cache.clear()
+
+        for username in ("philipp", "carl"):
+            CalendarUser.objects.create(
+                username = username, is_interviewer = username == "philipp"
+                )
+
+        response = self.client.get(
+            reverse("time_slot_intersection_view"), {"users" : "philipp,carl"}
+            )
+
+        phases = [
+            metric.split(";")[0]
+            for metric in response["Server-Timing"].split(", ")
+            ]
+
+        self.assertEqual(phases[0], "db")
+        self.assertEqual(phases[-1], "total")
+        for phase in ("availability", "intersect", "serialize", "render"):
+            self.assertIn(phase, phases)
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+
+
+class MetricsViewTest(TestCase):
+
+    def test_intersection_requests_are_counted(self):
+
+        for username in ("philipp", "carl"):
+            CalendarUser.objects.create(
+                username = username, is_interviewer = username == "philipp"
+                )
+
+        self.client.get(
+            reverse("time_slot_intersection_view"), {"users" : "philipp,carl"}
+            )
+
+        response = self.client.get(reverse("metrics_view"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{view="time_slot_intersection_view",'
+            'method="GET",status="200"}',
+            response.content.decode("utf-8")
+            )
+        self.assertIn(
+            "# TYPE http_request_duration_seconds histogram",
+            response.content.decode("utf-8")
+            )
+
+
+class MetricsRegistryTest(SimpleTestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        self.key = ("rrule_occurrences_expanded_total", ())
+
+    def write_exited_process_file(self, value):
+
+        # The process id of a process which has exited
+        process = subprocess.Popen([sys.executable, "-c", ""])
+        process.wait()
+
+        with open(
+                os.path.join(
+                    self.directory, "metrics-{0}-0.json".format(process.pid)
+                    ),
+                "w") as metrics_file:
+            json.dump(format_state({self.key : value}, {}), metrics_file)
+
+    def test_metrics_are_flushed_periodically(self):
+
+        metrics_registry = MetricsRegistry(
+            self.directory, flush_interval = 3600
+            )
+
+        for _ in range(2):
+            metrics_registry.increment(self.key[0])
+            metrics_registry.flush_periodically()
+
+        with open(
+                os.path.join(self.directory, metrics_registry.file_name)
+                ) as metrics_file:
+            self.assertEqual(
+                json.load(metrics_file)["counters"],
+                [[self.key[0], [], 1]]
+                )
+
+        # Collecting the metrics always writes those of the process
+        self.assertEqual(metrics_registry.collect()[0], {self.key : 2})
+
+    def test_files_of_exited_processes_are_merged(self):
+
+        metrics_registry = MetricsRegistry(self.directory)
+        metrics_registry.increment(self.key[0])
+
+        for value, total in ((5, 6), (2, 8)):
+            self.write_exited_process_file(value)
+            self.assertEqual(metrics_registry.collect()[0], {self.key : total})
+            self.assertEqual(
+                sorted(os.listdir(self.directory)),
+                sorted(
+                    [
+                        metrics_registry.file_name,
+                        MetricsRegistry.merged_file_name, "metrics.lock"
+                        ]
+                    )
+                )
+
+
+class CalendarTimeSlotRecurrenceFieldsTest(TestCase):
+
+    def setUp(self):
+
+        self.calendar_user = CalendarUser.objects.create(
+            username = "philipp", is_interviewer = True
+            )
+
+    def test_rrule_is_derived_from_recurrence_fields(self):
+
+        response = self.client.post(
+            reverse("calendar_time_slot_view"),
+            {
+                "creator" : "philipp",
+                "start_datetime" : "2018-06-25T09:00:00",
+                "end_datetime" : "2018-06-25T11:00:00",
+                "frequency" : "WEEKLY",
+                "interval" : 2,
+                "until" : "2018-08-01",
+                "effective_end" : "2030-01-01T00:00:00",
+                }
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.data["rrule"],
+            "FREQ=WEEKLY;INTERVAL=2;UNTIL=20180801T235959"
+            )
+        self.assertNotIn("effective_end", response.data)
+
+        calendar_time_slot = CalendarTimeSlot.objects.get()
+
+        self.assertEqual(calendar_time_slot.frequency, "WEEKLY")
+        self.assertEqual(calendar_time_slot.interval, 2)
+        self.assertEqual(
+            calendar_time_slot.until,
+            timezone.make_aware(datetime(2018, 8, 1, 23, 59, 59))
+            )
+        self.assertEqual(
+            calendar_time_slot.effective_end,
+            timezone.make_aware(datetime(2018, 8, 2, 0, 59, 59))
+            )
+
+    def test_interval_must_be_positive(self):
+
+        for interval in (0, -1):
+            response = self.client.post(
+                reverse("calendar_time_slot_view"),
+                {
+                    "creator" : "philipp",
+                    "start_datetime" : "2018-06-25T09:00:00",
+                    "end_datetime" : "2018-06-25T11:00:00",
+                    "frequency" : "WEEKLY",
+                    "interval" : interval,
+                    "until" : "2018-08-01",
+                    }
+                )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("interval", response.data)
+
+        self.assertFalse(CalendarTimeSlot.objects.exists())
+
+    def test_active_time_slots(self):
+
+        start_datetime = timezone.make_aware(datetime(2018, 6, 25, 9, 0, 0))
+
+        ended = CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = start_datetime,
+            end_datetime = start_datetime + timedelta(hours = 2),
+            rrule = "FREQ=DAILY;INTERVAL=1;UNTIL=20180630T235959",
+            )
+        repeating = CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = start_datetime,
+            end_datetime = start_datetime + timedelta(hours = 2),
+            rrule = "FREQ=DAILY;INTERVAL=1;UNTIL=20180731T235959",
+            )
+        single = CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = start_datetime + timedelta(days = 10),
+            end_datetime = start_datetime + timedelta(days = 10, hours = 1),
+            )
+
+        self.assertEqual(ended.frequency, "DAILY")
+        self.assertEqual(
+            set(
+                CalendarTimeSlot.objects.active(
+                    timezone.make_aware(datetime(2018, 7, 1, 12, 0, 0))
+                    )
+                ),
+            {repeating, single}
+            )
+        self.assertEqual(
+            set(
+                CalendarTimeSlot.objects.active(
+                    timezone.make_aware(datetime(2018, 7, 10, 12, 0, 0))
+                    )
+                ),
+            {repeating}
+            )
+
+    def test_overlapping_time_slots(self):
+
+        start_datetime = timezone.make_aware(datetime(2018, 6, 25, 9, 0, 0))
+
+        repeating = CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = start_datetime,
+            end_datetime = start_datetime + timedelta(hours = 2),
+            rrule = "FREQ=WEEKLY;INTERVAL=1;UNTIL=20180731T235959",
+            )
+        CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = start_datetime,
+            end_datetime = start_datetime + timedelta(hours = 2),
+            rrule = "FREQ=DAILY;INTERVAL=1;UNTIL=20180630T235959",
+            )
+        single = CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = start_datetime + timedelta(days = 10),
+            end_datetime = start_datetime + timedelta(days = 10, hours = 1),
+            )
+
+        self.assertEqual(
+            repeating.effective_end,
+            timezone.make_aware(datetime(2018, 8, 1, 0, 59, 59))
+            )
+
+        response = self.client.get(
+            reverse("calendar_time_slot_view"),
+            {
+                "creator" : "philipp",
+                "overlaps_from" : "2018-07-02T00:00:00",
+                "overlaps_to" : "2018-07-09T00:00:00",
+                }
+            )
+
+        self.assertEqual(
+            [time_slot["id"] for time_slot in response.data["results"]],
+            [repeating.id, single.id]
+            )
+
+    @override_settings(MAXIMUM_RECURRENCE_DAYS = 30)
+    def test_until_is_limited(self):
+
+        time_slot = {
+            "creator" : "philipp",
+            "start_datetime" : "2018-06-25T09:00:00",
+            "end_datetime" : "2018-06-25T17:00:00",
+            "frequency" : "DAILY",
+            "interval" : 1,
+            "until" : "2018-07-26",
+            }
+
+        response = self.client.post(
+            reverse("calendar_time_slot_view"), time_slot
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("2018-07-25", response.data["non_field_errors"][0])
+        self.assertFalse(CalendarTimeSlot.objects.exists())
+
+        # The last day allowed bounds the occurrences stored
+        time_slot["until"] = "2018-07-25"
+
+        response = self.client.post(
+            reverse("calendar_time_slot_view"), time_slot
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            CalendarTimeSlot.objects.get().occurrences.count(), 31
+            )
+
+
+class CalendarTimeSlotListPaginationTest(TestCase):
+
+    def setUp(self):
+
+        self.start_datetime = timezone.make_aware(
+            datetime(2018, 6, 25, 9, 0, 0)
+            )
+
+        calendar_users = [
+            CalendarUser.objects.create(
+                username = username, is_interviewer = username == "philipp"
+                )
+            for username in ("philipp", "sarah", "carl")
+            ]
+
+        # Several time slots start at the same time, so the pages are only
+        # stable if the ordering includes the id.
+        for i in range(25):
+            CalendarTimeSlot.objects.create(
+                creator = calendar_users[i % 3],
+                start_datetime = self.start_datetime + timedelta(
+                    hours = 24 - i // 2
+                    ),
+                end_datetime = self.start_datetime + timedelta(
+                    hours = 25 - i // 2
+                    ),
+                )
+
+        self.url = reverse("calendar_time_slot_view")
+
+    def test_pages(self):
+
+        expected_ids = list(
+            CalendarTimeSlot.objects.order_by(
+                "start_datetime", "id"
+                ).values_list("id", flat = True)
+            )
+
+        pages = []
+        url = self.url + "?page_size=10"
+
+        while url is not None:
+            # The creators are fetched in the same query as the time slots,
+            # and no count query is made
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            url = response.data["next"]
+            if len(pages) == 1:
+                # Time slots created while paging don't shift the next pages
+                CalendarTimeSlot.objects.create(
+                    creator = CalendarUser.objects.get(username = "carl"),
+                    start_datetime = self.start_datetime,
+                    end_datetime = self.start_datetime + timedelta(hours = 1),
+                    )
+
+        self.assertEqual(
+            [len(page["results"]) for page in pages], [10, 10, 5]
+            )
+        self.assertEqual(
+            [item["id"] for page in pages for item in page["results"]],
+            expected_ids
+            )
+        self.assertIsNone(pages[0]["previous"])
+
+        response = self.client.get(pages[2]["previous"])
+
+        self.assertEqual(response.data["results"], pages[1]["results"])
+
+
+class CalendarTimeSlotBulkViewTest(TestCase):
+
+    def setUp(self):
+
+        for username in ("philipp", "carl"):
+            CalendarUser.objects.create(
+                username = username, is_interviewer = username == "philipp"
+                )
+
+        self.url = reverse("calendar_time_slot_bulk_view")
+
+    def get_time_slots(self, number_of_time_slots):
+
+        start_datetime = datetime(2018, 6, 25, 9, 0, 0)
+
+        return [
+            {
+                "creator" : ("philipp", "carl")[i % 2],
+                "start_datetime" : (
+                    start_datetime + timedelta(days = i)
+                    ).isoformat(),
+                "end_datetime" : (
+                    start_datetime + timedelta(days = i, hours = 2)
+                    ).isoformat(),
+                "frequency" : "WEEKLY",
+                "interval" : 1,
+                "until" : (
+                    start_datetime + timedelta(days = i + 7)
+                    ).date().isoformat(),
+                }
+            for i in range(number_of_time_slots)
+            ]
+
+    def test_time_slots_are_created(self):
+
+        numbers_of_queries = []
+
+        for number_of_time_slots in (10, 50):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    self.url,
+                    json.dumps(self.get_time_slots(number_of_time_slots)),
+                    content_type = "application/json"
+                    )
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data), number_of_time_slots)
+            numbers_of_queries.append(len(queries))
+
+        # The number of queries does not depend on the number of time slots
+        self.assertEqual(numbers_of_queries[0], numbers_of_queries[1])
+
+        # The ids in the response are those of the stored time slots, and
+        # the occurrences are stored for the right time slots
+        for item in response.data:
+            calendar_time_slot = CalendarTimeSlot.objects.get(pk = item["id"])
+            self.assertEqual(calendar_time_slot.rrule, item["rrule"])
+            self.assertEqual(
+                [
+                    occurrence.start
+                    for occurrence in calendar_time_slot.occurrences.order_by(
+                        "start"
+                        )
+                    ],
+                [
+                    calendar_time_slot.start_datetime,
+                    calendar_time_slot.start_datetime + timedelta(days = 7),
+                    ]
+                )
+
+        self.assertEqual(
+            CalendarUser.objects.get(username = "carl").schedule_version, 2
+            )
+
+    def test_invalid_time_slots(self):
+
+        time_slots = self.get_time_slots(3)
+        time_slots[1]["creator"] = "nobody"
+        del time_slots[2]["until"]
+
+        response = self.client.post(
+            self.url, json.dumps(time_slots),
+            content_type = "application/json"
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0], {})
+        self.assertEqual(
+            response.data["errors"][1]["creator"],
+            ["The username does not exist"]
+            )
+        self.assertIn("non_field_errors", response.data["errors"][2])
+        self.assertFalse(CalendarTimeSlot.objects.exists())
+
+    def test_request_body_must_be_a_list(self):
+
+        response = self.client.post(
+            self.url, json.dumps(self.get_time_slots(1)[0]),
+            content_type = "application/json"
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["error"],
+            "The request body must be a list of time slots."
+            )
+
+
+class CalendarTimeSlotImportTest(TestCase):
+
+    def setUp(self):
+
+        for username in ("philipp", "carl"):
+            CalendarUser.objects.create(
+                username = username, is_interviewer = username == "philipp"
+                )
+
+        self.url = reverse("calendar_time_slot_import_view")
+
+    def get_ical_file(self, *events):
+
+        return "\r\n".join(
+            ["BEGIN:VCALENDAR", "VERSION:2.0"] +
+            [
+                content_line
+                for event in events
+                for content_line in ["BEGIN:VEVENT"] + event + ["END:VEVENT"]
+                ] +
+            ["END:VCALENDAR", ""]
+            ).encode("utf-8")
+
+    def import_ical_file(self, username, ical_file):
+
+        return self.client.post(
+            self.url,
+            {
+                "creator" : username,
+                "file" : SimpleUploadedFile("calendar.ics", ical_file),
+                }
+            )
+
+    def test_round_trip(self):
+
+        response = self.import_ical_file(
+            "philipp",
+            self.get_ical_file(
+                [
+                    "UID:weekly",
+                    "DTSTART;TZID=Europe/Berlin:20180625T110000",
+                    "DURATION:PT2H",
+                    "RRULE:FREQ=WEEKLY;INTERVAL=2;UNTIL=20180801T235959Z",
+                    ]
+                )
+            )
+
+        self.assertEqual(
+            response.data, {"imported" : 1, "skipped" : 0, "errors" : []}
+            )
+
+        calendar_time_slot = CalendarTimeSlot.objects.get()
+
+        self.assertEqual(
+            calendar_time_slot.start_datetime,
+            datetime(2018, 6, 25, 9, 0, 0, tzinfo = pytz.utc)
+            )
+        self.assertEqual(
+            calendar_time_slot.end_datetime,
+            datetime(2018, 6, 25, 11, 0, 0, tzinfo = pytz.utc)
+            )
+        self.assertEqual(
+            calendar_time_slot.rrule,
+            "FREQ=WEEKLY;INTERVAL=2;UNTIL=20180801T235959"
+            )
+        self.assertEqual(calendar_time_slot.occurrences.count(), 3)
+
+        # Importing the calendar feed of philipp gives the same time slot
+        feed = b"".join(
+            self.client.get(
+                reverse(
+                    "calendar_user_calendar_feed_view",
+                    kwargs = {"username" : "philipp"}
+                    )
+                ).streaming_content
+            )
+        response = self.import_ical_file("carl", feed)
+
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(
+            CalendarTimeSlot.objects.filter(
+                creator__username = "carl"
+                ).values_list("start_datetime", "end_datetime", "rrule").get(),
+            (
+                calendar_time_slot.start_datetime,
+                calendar_time_slot.end_datetime,
+                calendar_time_slot.rrule,
+                )
+            )
+
+    def test_unsupported_events_are_skipped(self):
+
+        response = self.import_ical_file(
+            "philipp",
+            self.get_ical_file(
+                [
+                    "UID:forever",
+                    "DTSTART:20180625T090000Z",
+                    "DTEND:20180625T110000Z",
+                    "RRULE:FREQ=DAILY",
+                    ],
+                [
+                    "UID:weekdays",
+                    "DTSTART:20180625T090000Z",
+                    "DTEND:20180625T110000Z",
+                    "RRULE:FREQ=WEEKLY;BYDAY=MO,TU;UNTIL=20180801",
+                    ],
+                [
+                    "UID:half-hour",
+                    "DTSTART:20180625T093000Z",
+                    "DTEND:20180625T110000Z",
+                    ],
+                [
+                    "UID:too-long",
+                    "DTSTART:20180625T090000Z",
+                    "DTEND:20180625T110000Z",
+                    "RRULE:FREQ=DAILY;UNTIL=20991231",
+                    ],
+                [
+                    "DTSTART:20180625T090000Z",
+                    "DTEND:20180625T100000Z",
+                    ],
+                )
+            )
+
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(response.data["skipped"], 4)
+        self.assertEqual(
+            [
+                (error["event"], error["uid"], error["error"])
+                for error in response.data["errors"]
+                ],
+            [
+                (
+                    1, "forever",
+                    "Recurrence rules without UNTIL are not supported"
+                    ),
+                (2, "weekdays", "Unsupported recurrence rule keywords: BYDAY"),
+                (
+                    3, "half-hour",
+                    "The time slot should start at the beginning of an hour"
+                    ),
+                (
+                    4, "too-long",
+                    "Time slots can repeat until 2020-06-24 at the latest"
+                    ),
+                ]
+            )
+        self.assertEqual(CalendarTimeSlot.objects.count(), 1)
+
+    def test_occurrences_are_written_in_chunks(self):
+
+        with mock.patch(
+                "time_slots.occurrences.MAXIMUM_BUFFERED_OCCURRENCES", 10):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.import_ical_file(
+                    "philipp",
+                    self.get_ical_file(
+                        *[
+                            [
+                                "DTSTART:201806{0}T090000Z".format(day),
+                                "DTEND:201806{0}T110000Z".format(day),
+                                "RRULE:FREQ=DAILY;UNTIL=20180731",
+                                ]
+                            for day in (25, 26, 27)
+                            ]
+                        )
+                    )
+
+        self.assertEqual(response.data["imported"], 3)
+        self.assertEqual(
+            [
+                calendar_time_slot.occurrences.count()
+                for calendar_time_slot in CalendarTimeSlot.objects.order_by(
+                    "start_datetime"
+                    )
+                ],
+            [37, 36, 35]
+            )
+
+        # The occurrences of each time slot are written before the next time
+        # slot is expanded
+        self.assertEqual(
+            len(
+                [
+                    query for query in queries
+                    if query["sql"].startswith(
+                        "INSERT INTO \"time_slots_timeslotoccurrence\""
+                        )
+                    ]
+                ),
+            3
+            )
+
+    def test_folded_lines(self):
+
+        response = self.import_ical_file(
+            "philipp",
+            self.get_ical_file(
+                [
+                    "DTSTART:20180625T090000Z",
+                    "DTEND:20180625T110000Z",
+                    "RRULE:FREQ=DAILY;INTER",
+                    " VAL=2;UNTIL=20180",
+                    "\t701T235959Z",
+                    ]
+                )
+            )
+
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(
+            CalendarTimeSlot.objects.get().rrule,
+            "FREQ=DAILY;INTERVAL=2;UNTIL=20180701T235959"
+            )
+
+    def test_import_ics_command(self):
+
+        with tempfile.NamedTemporaryFile(suffix = ".ics") as ical_file:
+            ical_file.write(
+                self.get_ical_file(
+                    [
+                        "DTSTART:20180625T090000Z",
+                        "DTEND:20180625T110000Z",
+                        ],
+                    ["UID:forever", "DTSTART:20180625T090000Z"],
+                    )
+                )
+            ical_file.flush()
+
+            stdout = StringIO()
+            stderr = StringIO()
+            call_command(
+                "import_ics", ical_file.name, "--creator", "carl",
+                stdout = stdout, stderr = stderr
+                )
+
+            with self.assertRaisesMessage(
+                    CommandError, "User nobody does not exist"):
+                call_command(
+                    "import_ics", ical_file.name, "--creator", "nobody"
+                    )
+
+        self.assertIn(
+            "Imported 1 time slots, skipped 1 events.", stdout.getvalue()
+            )
+        self.assertIn(
+            "Skipped event 2 (UID forever): DTEND and DURATION are missing",
+            stderr.getvalue()
+            )
+        self.assertEqual(
+            CalendarTimeSlot.objects.filter(creator__username = "carl").count(),
+            1
+            )
+
+
+class GenerateCalendarDataTest(TestCase):
+
+    def get_time_slots(self, username_prefix):
+
+        return [
+            (
+                creator__username[len(username_prefix):],
+                start_datetime, end_datetime, rrule
+                )
+            for creator__username, start_datetime, end_datetime, rrule in (
+                CalendarTimeSlot.objects.filter(
+                    creator__username__startswith = username_prefix
+                    ).order_by("id").values_list(
+                    "creator__username", "start_datetime", "end_datetime",
+                    "rrule"
+                    )
+                )
+            ]
+
+    def test_same_seed_gives_same_data(self):
+
+        for username_prefix in ("first", "second"):
+            generate_calendar_data(
+                5, 40, seed = 1, username_prefix = username_prefix,
+                batch_size = 15
+                )
+
+        self.assertEqual(len(self.get_time_slots("first")), 40)
+        self.assertEqual(
+            self.get_time_slots("first"), self.get_time_slots("second")
+            )
+
+        # The occurrences of the time slots are stored
+        for calendar_time_slot in CalendarTimeSlot.objects.all():
+            self.assertEqual(
+                list(
+                    calendar_time_slot.occurrences.order_by(
+                        "start"
+                        ).values_list("start", "end")
+                    ),
+                calendar_time_slot.get_one_hour_time_slot_intervals()
+                )
+
+    def test_clear_only_deletes_generated_users(self):
+
+        CalendarUser.objects.create(username = "bench_fan", is_interviewer = True)
+
+        for _ in range(2):
+            call_command(
+                "generate_calendar_data", "--users", "3", "--time-slots", "10",
+                "--clear", stdout = StringIO()
+                )
+
+        self.assertEqual(
+            sorted(
+                CalendarUser.objects.values_list("username", flat = True)
+                ),
+            ["bench0", "bench1", "bench2", "bench_fan"]
+            )
+        self.assertEqual(CalendarTimeSlot.objects.count(), 10)
+
+        with self.assertRaisesMessage(CommandError, "Use --clear"):
+            call_command(
+                "generate_calendar_data", "--users", "3", "--time-slots", "10"
+                )
+
+        # Users with a generated username are not replaced unless they were
+        # generated
+        CalendarUser.objects.filter(username = "bench2").update(email = "")
+
+        with self.assertRaisesMessage(
+                CommandError, "User bench2 already exists"):
+            call_command(
+                "generate_calendar_data", "--users", "3", "--time-slots", "10",
+                "--clear"
+                )
+
+        self.assertEqual(CalendarUser.objects.count(), 4)
+
+
+class CalendarTimeSlotExpansionPropertyTest(SimpleTestCase):
+
+    def get_random_time_slot(self, random_generator, frequency = None):
+
+        start_datetime = datetime(2018, 1, 1, tzinfo = pytz.utc) + timedelta(
+            days = random_generator.randrange(365),
+            hours = random_generator.randrange(24)
+            )
+
+        # End of month days exercise the months skipped by MONTHLY rules.
+        if (random_generator.random() < 0.2 and
+                start_datetime.month in (1, 3, 5, 7, 8, 10, 12)):
+            start_datetime = start_datetime.replace(
+                day = random_generator.choice([29, 30, 31])
+                )
+
+        end_datetime = start_datetime + timedelta(
+            hours = random_generator.randint(1, 30)
+            )
+
+        rrule = None
+
+        if random_generator.random() < 0.9:
+            until = start_datetime + timedelta(
+                days = random_generator.randint(0, 120),
+                hours = random_generator.randint(-30, 30)
+                )
+            rrule = "FREQ={0};INTERVAL={1};UNTIL={2}".format(
+                frequency or random_generator.choice(
+                    ["DAILY", "WEEKLY", "MONTHLY", "YEARLY"]
+                    ),
+                random_generator.randint(1, 3),
+                until.strftime("%Y%m%dT%H%M%S")
+                )
+
+        return CalendarTimeSlot(
+            start_datetime = start_datetime,
+            end_datetime = end_datetime,
+            rrule = rrule,
+            )
+
+    def get_expected_one_hour_time_slots(self, calendar_time_slot):
+
+        # get_all_one_hour_time_slots() returns naive UTC datetimes for
+        # repeating time slots.
+        return set(
+            dt if dt.tzinfo is not None else dt.replace(tzinfo = pytz.utc)
+            for dt in calendar_time_slot.get_all_one_hour_time_slots()
+            )
+
+    def test_expansion_matches_get_all_one_hour_time_slots(self):
+
+        random_generator = random.Random(0)
+
+        for _ in range(300):
+            calendar_time_slot = self.get_random_time_slot(random_generator)
+            self.assertEqual(
+                set(
+                    split_into_one_hour_time_slots(
+                        calendar_time_slot.get_one_hour_time_slot_intervals()
+                        )
+                    ),
+                self.get_expected_one_hour_time_slots(calendar_time_slot),
+                calendar_time_slot
+                )
+
+    @override_settings(
+        SCHEDULE_EXPANSION_EXECUTOR = "process",
+        SCHEDULE_EXPANSION_WORKERS = 2,
+        SCHEDULE_EXPANSION_MINIMUM = 10,
+        )
+    def test_process_executor_matches_serial_expansion(self):
+
+        random_generator = random.Random(0)
+
+        calendar_time_slots = []
+
+        for _ in range(100):
+            calendar_time_slot = self.get_random_time_slot(random_generator)
+            calendar_time_slot.update_rrule()
+            calendar_time_slots.append(calendar_time_slot)
+
+        self.assertEqual(
+            list(expand_time_slots(calendar_time_slots)),
+            [
+                calendar_time_slot.get_one_hour_time_slot_intervals()
+                for calendar_time_slot in calendar_time_slots
+                ]
+            )
+
+        with override_settings(SCHEDULE_EXPANSION_EXECUTOR = "threads"):
+            with self.assertRaises(ImproperlyConfigured):
+                expand_time_slots(calendar_time_slots)
+
+    def test_intersection_matches_set_intersection(self):
+
+        # The intervals of each user are merged and intersected, and must
+        # give the same one hour time slots as intersecting the sets of one
+        # hour time slots returned by get_all_one_hour_time_slots().
+
+        random_generator = random.Random(2)
+
+        for frequency in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY"):
+            for _ in range(50):
+                interval_lists = []
+                one_hour_time_slot_sets = []
+                for _ in range(random_generator.randint(2, 3)):
+                    calendar_time_slots = [
+                        self.get_random_time_slot(random_generator, frequency)
+                        for _ in range(random_generator.randint(1, 4))
+                        ]
+                    interval_lists.append(
+                        merge_one_hour_time_slot_intervals(
+                            interval
+                            for calendar_time_slot in calendar_time_slots
+                            for interval in (
+                                calendar_time_slot.
+                                get_one_hour_time_slot_intervals()
+                                )
+                            )
+                        )
+                    one_hour_time_slot_sets.append(
+                        set().union(
+                            *[
+                                self.get_expected_one_hour_time_slots(
+                                    calendar_time_slot
+                                    )
+                                for calendar_time_slot in calendar_time_slots
+                                ]
+                            )
+                        )
+                self.assertEqual(
+                    sorted(
+                        split_into_one_hour_time_slots(
+                            get_common_one_hour_time_slot_intervals(
+                                interval_lists
+                                )
+                            )
+                        ),
+                    sorted(set.intersection(*one_hour_time_slot_sets)),
+                    frequency
+                    )
+
+
+class BitmapIntersectionBackendTest(SimpleTestCase):
+
+    def get_random_interval_lists(self, random_generator, minutes):
+
+        base = datetime(2018, 6, 25, 0, 0, 0, tzinfo = pytz.utc)
+        interval_lists = []
+
+        for minute in minutes:
+            intervals = []
+            for _ in range(random_generator.randint(0, 20)):
+                start = base + timedelta(
+                    hours = random_generator.randrange(24 * 30),
+                    minutes = minute
+                    )
+                duration = timedelta(hours = random_generator.randint(1, 30))
+                intervals.append((start, start + duration))
+            interval_lists.append(
+                merge_one_hour_time_slot_intervals(intervals)
+                )
+
+        return interval_lists
+
+    @skipUnless(numpy, "numpy is not installed")
+    def test_bitmaps_match_intervals(self):
+
+        random_generator = random.Random(3)
+
+        for _ in range(300):
+            number_of_users = random_generator.randint(1, 5)
+            # Mostly time slots starting on the hour. Otherwise, time slots
+            # starting at different minutes use the interval backend.
+            minutes = [
+                random_generator.choice([0, 0, 0, 30])
+                for _ in range(number_of_users)
+                ]
+            interval_lists = self.get_random_interval_lists(
+                random_generator, minutes
+                )
+            self.assertEqual(
+                list(
+                    split_into_one_hour_time_slots(
+                        get_common_one_hour_time_slot_intervals_with_bitmaps(
+                            interval_lists
+                            )
+                        )
+                    ),
+                list(
+                    split_into_one_hour_time_slots(
+                        get_common_one_hour_time_slot_intervals(interval_lists)
+                        )
+                    ),
+                interval_lists
+                )
+
+    def test_numpy_is_required(self):
+
+        interval_lists = self.get_random_interval_lists(
+            random.Random(4), [0, 0]
+            )
+
+        with mock.patch("utils.bitmap_ops.numpy", None):
+            with self.assertRaises(ImproperlyConfigured):
+                get_common_one_hour_time_slot_intervals_with_bitmaps(
+                    interval_lists
+                    )
@@ -1,11 +1,22 @@
 from django.urls import path, re_path
 
-from time_slots.views import CalendarTimeSlotView, CalendarTimeSlotDetailView
+from time_slots.views import (
+    CalendarTimeSlotView, CalendarTimeSlotBulkView, CalendarTimeSlotDetailView,
+    CalendarTimeSlotImportView
+    )
 
 urlpatterns = [
     re_path("^$", CalendarTimeSlotView.as_view(),
         name = "calendar_time_slot_view"
         ),
+    path(
+        "bulk/", view = CalendarTimeSlotBulkView.as_view(),
+        name = "calendar_time_slot_bulk_view"
+        ),
+    path(
+        "import/", view = CalendarTimeSlotImportView.as_view(),
+        name = "calendar_time_slot_import_view"
+        ),
     path(
         "<int:pk>/", view = CalendarTimeSlotDetailView.as_view(),
         name = "calendar_time_slot_detail_view"
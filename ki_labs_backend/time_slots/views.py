@@ -1,15 +1,57 @@
-from datetime import datetime, timedelta
+import collections
+from datetime import timedelta
+import hashlib
+import itertools
+import json
 
 import coreapi
+import pytz
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_duration
+from django.utils.http import quote_etag
 from rest_framework.schemas import AutoSchema
 from rest_framework import generics
 from rest_framework import status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from time_slots.models import CalendarTimeSlot
-from time_slots.serializers import CalendarTimeSlotSerializer
+from ki_labs_backend.metrics import metrics_registry
+from ki_labs_backend.renderers import COMPACT_RENDERER_CLASSES, is_compact
+from time_slots.bulk import bulk_create_time_slots
+from time_slots.ical import import_ical_file
+from time_slots.models import CalendarTimeSlot, TimeSlotOccurrence
+from time_slots.occurrences import (
+    MAXIMUM_OCCURRENCE_DURATION, iterate_time_slot_occurrence_intervals
+    )
+from time_slots.pagination import CalendarTimeSlotCursorPagination
+from time_slots.schedule_cache import (
+    get_availability_interval_lists, schedule_cache
+    )
+from time_slots.serializers import (
+    CalendarTimeSlotSerializer, CompactCalendarTimeSlotSerializer
+    )
 from users.models import CalendarUser
+from utils.bitmap_ops import (
+    get_common_one_hour_time_slot_intervals_with_bitmaps
+    )
+from utils.datetime_ops import parse_query_datetime
+from utils.http_ops import get_not_modified_response
+from utils.interval_ops import (
+    ONE_HOUR, count_common_one_hour_time_slots, drop_short_ranges,
+    get_common_one_hour_time_slot_intervals, get_hour_phase,
+    get_quorum_one_hour_time_slot_intervals, group_intervals_by_phase,
+    iterate_common_values, iterate_one_hour_time_slots, merge_intervals,
+    split_into_one_hour_time_slots
+    )
+from utils.timing_ops import timing_phase
+
+DEFAULT_NEXT_INTERSECTION_LIMIT = 10
+MAXIMUM_NEXT_INTERSECTION_LIMIT = 1000
+MAXIMUM_AVAILABILITY_WINDOW = timedelta(days = 7)
 
 class CalendarUserTimeSlotAutoSchema(AutoSchema):
 
@@ -26,7 +68,34 @@ class CalendarUserTimeSlotAutoSchema(AutoSchema):
                     description = (
                         "Filter by creator. Value should be username."
                         ),
-                    )
+                    ),
+                coreapi.Field(
+                    name = "active",
+                    required = False,
+                    location = "query",
+                    description = (
+                        "Set to 1 to leave out time slots whose last "
+                        "occurrence has ended."
+                        ),
+                    ),
+                coreapi.Field(
+                    name = "overlaps_from",
+                    required = False,
+                    location = "query",
+                    description = (
+                        "Only return time slots with occurrences which may "
+                        "end after this datetime (YYYY-MM-DDThh:mm:ss)."
+                        ),
+                    ),
+                coreapi.Field(
+                    name = "overlaps_to",
+                    required = False,
+                    location = "query",
+                    description = (
+                        "Only return time slots with occurrences which may "
+                        "start before this datetime (YYYY-MM-DDThh:mm:ss)."
+                        ),
+                    ),
                 ]
 
         manual_fields = super(
@@ -39,23 +108,50 @@ class CalendarUserTimeSlotAutoSchema(AutoSchema):
 class CalendarTimeSlotView(generics.ListCreateAPIView):
     """
     get:
-    Returns a list of all time slots in the system.
+    Returns a list of all time slots in the system, ordered by start datetime.
 
     You can use the optional url query parameter `creator` to filter time slots
     created by a particular user. The value of the query parameter should be
     the username of the user, e.g., `?creator=philipp` or `?creator=carl`.
 
+    Use the optional url query parameter `active=1` to leave out time slots
+    whose last occurrence has already ended.
+
+    Use the optional url query parameters `overlaps_from` and `overlaps_to`
+    to only get the time slots with occurrences which may overlap a window,
+    e.g. `?overlaps_from=2018-06-25T00:00:00&overlaps_to=2018-07-02T00:00:00`.
+    Either of them can be left out to leave that end of the window open.
+    Repeating time slots are returned if their recurrence rule starts
+    before the window and ends after it, even if no occurrence falls inside
+    it.
+
+    The list is paginated. Follow the `next` and `previous` URLs to move
+    between pages. You can use the optional url query parameter `page_size`
+    to change the number of time slots per page (at most 1000).
+
+    Send the `Accept` header `application/vnd.ki-labs.compact+json` (or
+    `?format=compact`) for a compact representation, where each time slot is
+    `{"id", "creator", "start", "end", "rrule"}`, with the username of the
+    creator and Unix timestamps. `application/msgpack` (or `?format=msgpack`)
+    returns the same in MessagePack, if msgpack is installed on the server.
+
     ###Response schema
-        [
-            {
-                "id" : Unique ID for the time slot,
-                "creator" : The username and type of the creator,
-                "start_datetime" : Start of the time slot (YYYY-MM-DDThh:mm:ss),
-                "end_datetime" : End of the time slot (YYYY-MM-DDThh:mm:ss),
-                "rrule" : Recurrence rule for repeating events, following
-                          https://tools.ietf.org/html/rfc5545#section-3.8.5,
-                },...
-            ]
+        {
+            "next" : URL of the next page, or null,
+            "previous" : URL of the previous page, or null,
+            "results" : [
+                {
+                    "id" : Unique ID for the time slot,
+                    "creator" : The username and type of the creator,
+                    "start_datetime" : Start of the time slot
+                                       (YYYY-MM-DDThh:mm:ss),
+                    "end_datetime" : End of the time slot
+                                     (YYYY-MM-DDThh:mm:ss),
+                    "rrule" : Recurrence rule for repeating events, following
+                              https://tools.ietf.org/html/rfc5545#section-3.8.5,
+                    },...
+                ],
+            }
 
     post:
     Creates a time slot.
@@ -74,20 +170,218 @@ class CalendarTimeSlotView(generics.ListCreateAPIView):
 
     schema = CalendarUserTimeSlotAutoSchema()
 
-    queryset = CalendarTimeSlot.objects.all()
+    # The representation of each time slot includes the username and type of
+    # its creator, so the creators are fetched in the same query.
+    queryset = CalendarTimeSlot.objects.select_related("creator")
     serializer_class = CalendarTimeSlotSerializer
+    pagination_class = CalendarTimeSlotCursorPagination
+    renderer_classes = COMPACT_RENDERER_CLASSES
+
+    def get_serializer_class(self):
+
+        if self.request.method == "GET" and is_compact(self.request):
+            return CompactCalendarTimeSlotSerializer
+
+        return super(CalendarTimeSlotView, self).get_serializer_class()
+
+    def get_queryset(self):
+
+        queryset = super(CalendarTimeSlotView, self).get_queryset()
+
+        # Time slots which ended in the past are filtered out by the
+        # database, using the until column for repeating time slots.
+        if self.request.GET.get("active", None) in ("1", "true"):
+            queryset = queryset.active()
+
+        return queryset
 
     def list(self, request):
 
-        username = request.GET.get("creator", None)
+        queryset = self.filter_queryset(self.get_queryset())
 
-        # If the url query parameter "creator" is not present, return the
-        # entire list of users.
-        if username is None:
-            return super(CalendarTimeSlotView, self).list(request)
+        username = request.GET.get("creator", None)
 
         # If the url query paramter "creator" is present, return only the
         # time slots created by that user.
+        if username is not None:
+            try:
+                creator = CalendarUser.objects.get(username = username)
+            except CalendarUser.DoesNotExist:
+                return Response(
+                    {
+                        "error" : (
+                            "The creator does not exist"
+                            ),
+                        },
+                        status = status.HTTP_400_BAD_REQUEST
+                    )
+            queryset = queryset.filter(creator = creator)
+
+        # The optional url query parameters "overlaps_from" and
+        # "overlaps_to" are answered from the start_datetime and
+        # effective_end columns, so the database leaves out the other time
+        # slots without any recurrence rule being expanded.
+
+        window = {}
+
+        for parameter in ("overlaps_from", "overlaps_to"):
+            value = request.GET.get(parameter, None)
+            if value is None:
+                window[parameter] = None
+                continue
+            try:
+                window[parameter] = parse_query_datetime(value)
+            except ValueError:
+                return Response(
+                    {
+                        "error" : (
+                            "Invalid value for the '{0}' url parameter. "
+                            "Please specify a datetime formatted as "
+                            "YYYY-MM-DDThh:mm:ss e.g. 2018-06-22T15:00:00."
+                            ).format(parameter),
+                        },
+                        status = status.HTTP_400_BAD_REQUEST
+                    )
+
+        queryset = queryset.overlapping(
+            window["overlaps_from"], window["overlaps_to"]
+            )
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many = True)
+        return self.get_paginated_response(serializer.data)
+
+
+class CalendarTimeSlotBulkView(generics.GenericAPIView):
+    """
+    post:
+    Creates many time slots at once. The request body must be a JSON list of
+    time slots, each with the same fields as accepted by `POST /time-slots/`.
+
+    The time slots are validated first. If any of them is invalid, none are
+    created, and the response lists the errors of each time slot in the
+    order of the request (an empty object for valid time slots). Otherwise,
+    all time slots are created in a single transaction.
+
+    ###Response schema
+
+        [
+            {
+                "id" : Unique ID for the created time slot,
+                "creator" : The username and type of the creator,
+                "start_datetime" : Start of the time slot (YYYY-MM-DDThh:mm:ss),
+                "end_datetime" : End of the time slot (YYYY-MM-DDThh:mm:ss),
+                "rrule" : Recurrence rule for repeating events, following
+                          https://tools.ietf.org/html/rfc5545#section-3.8.5,
+                },...
+            ]
+    """
+
+    queryset = CalendarTimeSlot.objects.all()
+    serializer_class = CalendarTimeSlotSerializer
+
+    def post(self, request, format = None):
+
+        if not isinstance(request.data, list):
+            return Response(
+                {
+                    "error" : (
+                        "The request body must be a list of time slots."
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        # Resolve the creators of all time slots with a single query
+
+        usernames = set(
+            item["creator"] for item in request.data
+            if isinstance(item, dict) and isinstance(item.get("creator"), str)
+            )
+
+        calendar_users_by_username = {
+            calendar_user.username : calendar_user
+            for calendar_user in CalendarUser.objects.filter(
+                username__in = usernames
+                )
+            }
+
+        serializer = CalendarTimeSlotSerializer(
+            data = request.data,
+            many = True,
+            context = {
+                "request" : request,
+                "calendar_users_by_username" : calendar_users_by_username,
+                }
+            )
+
+        if not serializer.is_valid():
+            return Response(
+                {"errors" : serializer.errors},
+                status = status.HTTP_400_BAD_REQUEST
+                )
+
+        calendar_time_slots = bulk_create_time_slots(
+            [
+                serializer.child.build_time_slot(validated_data)
+                for validated_data in serializer.validated_data
+                ]
+            )
+
+        return Response(
+            CalendarTimeSlotSerializer(calendar_time_slots, many = True).data,
+            status = status.HTTP_201_CREATED
+            )
+
+
+class CalendarTimeSlotImportView(APIView):
+    """
+    post:
+    Creates time slots from an iCalendar (.ics) file, uploaded as
+    multipart/form-data in the field `file`. The field `creator` must contain
+    the username of the user who will own the time slots.
+
+    `DTSTART`, `DTEND` (or `DURATION`) and `RRULE` of each `VEVENT` are mapped
+    to a time slot. Like time slots created with `POST /time-slots/`, they
+    must start and end at the beginning of an hour, and recurrence rules
+    may only use `FREQ`, `INTERVAL` and `UNTIL`. Other events are skipped.
+    The file is processed incrementally and the time slots are written in
+    batches.
+
+    ###Response schema
+
+        {
+            "imported" : Number of time slots created,
+            "skipped" : Number of events skipped,
+            "errors" : [
+                {
+                    "event" : Position of the event in the file, from 1,
+                    "uid" : UID of the event, if any,
+                    "error" : Why the event was skipped,
+                    },...
+                ],
+            }
+    """
+
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request, format = None):
+
+        username = request.data.get("creator", None)
+        ical_file = request.FILES.get("file", None)
+
+        if username is None or ical_file is None:
+            return Response(
+                {
+                    "error" : (
+                        "Please upload the .ics file in the field 'file' and "
+                        "specify the username of its owner in the field "
+                        "'creator'."
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
         try:
             creator = CalendarUser.objects.get(username = username)
         except CalendarUser.DoesNotExist:
@@ -100,11 +394,9 @@ class CalendarTimeSlotView(generics.ListCreateAPIView):
                     status = status.HTTP_400_BAD_REQUEST
                 )
 
-        queryset = self.get_queryset()
-        queryset = queryset.filter(creator = creator)
+        result = import_ical_file(ical_file, creator)
 
-        serializer = CalendarTimeSlotSerializer(queryset, many = True)
-        return Response(serializer.data)
+        return Response(result)
 
 
 class CalendarTimeSlotDetailView(generics.RetrieveDestroyAPIView):
@@ -131,6 +423,166 @@ class CalendarTimeSlotDetailView(generics.RetrieveDestroyAPIView):
     serializer_class = CalendarTimeSlotSerializer
 
 
+def get_usernames_list(request):
+    """
+    Read the url query parameter "users", which must be a comma separated
+    list of at least 2 usernames.
+
+    Input: The request.
+    Output: A tuple of the list of usernames and None, or of None and a
+            Response object describing the error.
+    """
+
+    usernames_string = request.GET.get("users", None)
+
+    if usernames_string is None:
+        return None, Response(
+            {
+                "error" : (
+                    "No users specified. Please specify users using the "
+                    "url parameter 'users' e.g. ?users=<user1>,<user2>."
+                    ),
+                },
+                status = status.HTTP_400_BAD_REQUEST
+            )
+
+    usernames_list = usernames_string.split(",")
+
+    if len(usernames_list) == 1:
+        return None, Response(
+            {
+                "error" : (
+                    "Only one user specified. Please specify at least two "
+                    "users e.g. ?users=<user1>,<user2>."
+                    ),
+                },
+                status = status.HTTP_400_BAD_REQUEST
+            )
+
+    return usernames_list, None
+
+
+def get_calendar_users(usernames_list):
+    """
+    Resolve usernames with a single query.
+
+    Input: A list of usernames.
+    Output: A tuple of the list of CalendarUser objects, in the order of
+            usernames_list, and None, or of None and a Response object
+            naming the first user who does not exist.
+    """
+
+    calendar_users_by_username = {
+        calendar_user.username : calendar_user
+        for calendar_user in CalendarUser.objects.filter(
+            username__in = usernames_list
+            )
+        }
+
+    for username in usernames_list:
+        if username not in calendar_users_by_username:
+            return None, Response(
+                {
+                    "error" : (
+                        "User {0} does not exist".format(username)
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+    return [
+        calendar_users_by_username[username] for username in usernames_list
+        ], None
+
+
+def get_window(request):
+    """
+    Read the optional url query parameters "from" and "to", which restrict
+    a computation to a window. Either of them can be left out to leave that
+    end of the window open.
+
+    Input: The request.
+    Output: A tuple of a (window_start, window_end) tuple of datetime
+            objects or None, and None, or of (None, None) and a Response
+            object describing the error.
+    """
+
+    window = {}
+
+    for parameter in ("from", "to"):
+        value = request.GET.get(parameter, None)
+        if value is None:
+            window[parameter] = None
+            continue
+        try:
+            window[parameter] = parse_query_datetime(value)
+        except ValueError:
+            return (None, None), Response(
+                {
+                    "error" : (
+                        "Invalid value for the '{0}' url parameter. "
+                        "Please specify a datetime formatted as "
+                        "YYYY-MM-DDThh:mm:ss e.g. 2018-06-22T15:00:00."
+                        ).format(parameter),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+    window_start = window["from"]
+    window_end = window["to"]
+
+    if (window_start is not None and window_end is not None and
+            window_start >= window_end):
+        return (None, None), Response(
+            {
+                "error" : (
+                    "The 'from' datetime must be earlier than the 'to' "
+                    "datetime."
+                    ),
+                },
+                status = status.HTTP_400_BAD_REQUEST
+            )
+
+    return (window_start, window_end), None
+
+
+def generate_time_slot_intersection_json(
+    usernames_list, intersecting_intervals, chunk_size = 500
+    ):
+    """
+    Generate the JSON response of TimeSlotIntersectionView piece by piece.
+    The output is the same document as the non streaming response, rendered
+    with the same compact separators as the JSON renderer.
+
+    Input: The list of usernames, the intersecting intervals, and the number
+           of one hour time slots written per chunk.
+    Output: A generator of strings.
+    """
+
+    yield '{{"users":{0},"intersecting one hour time slots":['.format(
+        json.dumps(usernames_list, ensure_ascii = False, separators = (",", ":"))
+        )
+
+    chunk = []
+    separator = ""
+
+    for dt in split_into_one_hour_time_slots(intersecting_intervals):
+        chunk.append(
+            '{{"start":"{0}","end":"{1}"}}'.format(
+                dt.ctime(), (dt + timedelta(hours = 1)).ctime()
+                )
+            )
+        if len(chunk) == chunk_size:
+            yield separator + ",".join(chunk)
+            chunk = []
+            separator = ","
+
+    if chunk:
+        yield separator + ",".join(chunk)
+
+    yield "]}"
+
+
 class TimeSlotIntersectionView(APIView):
     """
     get:
@@ -143,6 +595,36 @@ class TimeSlotIntersectionView(APIView):
     and carl, while `?users=philipp,sarah,carl` will compute the time slots
     common to all three users.**
 
+    You can use the optional url query parameters `from` and `to` to only
+    compute the time slots lying within a window, e.g.
+    `?users=philipp,carl&from=2018-06-25T00:00:00&to=2018-07-09T00:00:00`.
+    Either of them can be left out to leave that end of the window open.
+
+    Use the optional url query parameter `output=ranges` to get ranges of
+    consecutive common time slots instead of one hour time slots, e.g. a
+    free afternoon is returned as a single range. Ranges are sorted and
+    their datetimes are formatted in ISO 8601. Use the optional url query
+    parameter `min_duration`, e.g. `min_duration=02:00:00`, to leave out
+    time slots which are not part of a range lasting at least that long.
+
+    Use the optional url query parameter `stream=1` for large results. The
+    response is then sent in chunks while it is being computed, which keeps
+    the memory used by the server bounded. The response body is the same.
+    Ranges and compact responses are never streamed.
+
+    Send the `Accept` header `application/vnd.ki-labs.compact+json` (or
+    `?format=compact`) for a compact response. The one hour time slots are
+    then returned as `"slots" : [[start, number of hours],...]`, one pair
+    per run of consecutive time slots, and ranges as
+    `"ranges" : [[start, end],...]`, with datetimes as Unix timestamps.
+    `application/msgpack` (or `?format=msgpack`) returns the same in
+    MessagePack, if msgpack is installed on the server.
+
+    Responses have an `ETag` header, which only changes when a time slot of
+    one of the users is created or deleted. Send it back in the
+    `If-None-Match` header to get an empty `304 Not Modified` response while
+    the result is unchanged.
+
     ###Response schema
         [
             {
@@ -160,6 +642,19 @@ class TimeSlotIntersectionView(APIView):
 
             ]
 
+    ###Response schema with `output=ranges`
+        {
+            "users" : List of users for whom time slot intersections is
+                      being computed,
+            "intersecting ranges" : [
+                {
+                    "start" : Start of a range of common one hour time
+                              slots (YYYY-MM-DDThh:mm:ss+hh:mm),
+                    "end" : End of the range (YYYY-MM-DDThh:mm:ss+hh:mm),
+                    },...
+                ],
+            }
+
     """
 
     schema = AutoSchema(
@@ -169,100 +664,984 @@ class TimeSlotIntersectionView(APIView):
                 required = True,
                 location = "query",
                 description = "Comma separated list of usernames.",
-                )
+                ),
+            coreapi.Field(
+                name = "from",
+                required = False,
+                location = "query",
+                description = (
+                    "Only return time slots starting at or after this "
+                    "datetime (YYYY-MM-DDThh:mm:ss)."
+                    ),
+                ),
+            coreapi.Field(
+                name = "to",
+                required = False,
+                location = "query",
+                description = (
+                    "Only return time slots ending at or before this "
+                    "datetime (YYYY-MM-DDThh:mm:ss)."
+                    ),
+                ),
+            coreapi.Field(
+                name = "output",
+                required = False,
+                location = "query",
+                description = (
+                    "Set to 'ranges' to return ranges of consecutive time "
+                    "slots instead of one hour time slots."
+                    ),
+                ),
+            coreapi.Field(
+                name = "min_duration",
+                required = False,
+                location = "query",
+                description = (
+                    "Only return time slots which are part of a range "
+                    "lasting at least this long (hh:mm:ss)."
+                    ),
+                ),
+            coreapi.Field(
+                name = "stream",
+                required = False,
+                location = "query",
+                description = (
+                    "Set to 1 to stream the response in chunks."
+                    ),
+                ),
             ]
         )
 
+    renderer_classes = COMPACT_RENDERER_CLASSES
+
     def get(self, request, format = None):
 
-        usernames_string = request.GET.get("users", None)
+        usernames_list, error_response = get_usernames_list(request)
 
-        # This endpoint requires a value for the url query parameter "users"
+        if error_response is not None:
+            return error_response
 
-        if usernames_string is None:
-            return Response(
-                {
-                    "error" : (
-                        "No users specified. Please specify users using the "
-                        "url parameter 'users' e.g. ?users=<user1>,<user2>."
-                        ),
-                    },
-                    status = status.HTTP_400_BAD_REQUEST
-                )
+        # The optional url query parameters "from" and "to" restrict the
+        # computation to a window.
 
-        usernames_list = usernames_string.split(",")
+        (window_start, window_end), error_response = get_window(request)
 
-        # The url query parameter "user" must be a comma separated list of
-        # at least 2 usernames.
+        if error_response is not None:
+            return error_response
 
-        if len(usernames_list) == 1:
+        output = request.GET.get("output", "hours")
+
+        if output not in ("hours", "ranges"):
             return Response(
                 {
                     "error" : (
-                        "Only one user specified. Please specify at least two "
-                        "users e.g. ?users=<user1>,<user2>."
+                        "Invalid value for the 'output' url parameter. "
+                        "Please specify 'hours' or 'ranges'."
                         ),
                     },
                     status = status.HTTP_400_BAD_REQUEST
                 )
 
-        calendar_users = []
+        min_duration = request.GET.get("min_duration", None)
 
-        for username in usernames_list:
-            try:
-                calendar_user = CalendarUser.objects.get(username = username)
-                calendar_users.append(calendar_user)
-            except CalendarUser.DoesNotExist:
+        if min_duration is not None:
+            min_duration = parse_duration(min_duration)
+            if min_duration is None or min_duration <= timedelta(0):
                 return Response(
                     {
                         "error" : (
-                            "User {0} does not exist".format(username)
+                            "Invalid value for the 'min_duration' url "
+                            "parameter. Please specify a positive duration "
+                            "formatted as hh:mm:ss e.g. 02:00:00."
                             ),
                         },
                         status = status.HTTP_400_BAD_REQUEST
                     )
 
-        # Collect sets of all one hour time slots for each user in a list
+        calendar_users, error_response = get_calendar_users(usernames_list)
 
-        one_hour_time_slot_sets = []
+        if error_response is not None:
+            return error_response
 
-        for calendar_user in calendar_users:
+        # The response only depends on the schedules of the users, which
+        # change their schedule_version whenever they change, and on the
+        # query parameters. Clients which already have the current response
+        # get a 304 before any availability is read.
+
+        etag = quote_etag(
+            hashlib.sha1(
+                json.dumps(
+                    [
+                        [
+                            [calendar_user.id, calendar_user.schedule_version]
+                            for calendar_user in calendar_users
+                            ],
+                        usernames_list,
+                        window_start and window_start.isoformat(),
+                        window_end and window_end.isoformat(),
+                        output,
+                        min_duration and min_duration.total_seconds(),
+                        request.accepted_renderer.format,
+                        ]
+                    ).encode("utf-8")
+                ).hexdigest()
+            )
+
+        not_modified_response = get_not_modified_response(request, etag)
+
+        if not_modified_response is not None:
+            return not_modified_response
 
-            one_hour_time_slot_set_for_this_calendar_user = set()
+        # Collect the availability of each user as a list of intervals.
+        # The occurrences of each time slot are expanded when the time slot
+        # is created and stored in the TimeSlotOccurrence table, so no
+        # recurrence rule has to be expanded here. The merged intervals of
+        # each user are kept in the schedule cache until the user's schedule
+        # changes, and the users missing from the cache are read with a
+        # single query.
 
-            calendar_time_slots = CalendarTimeSlot.objects.filter(
-                creator = calendar_user
+        with timing_phase("availability"):
+            interval_lists = get_availability_interval_lists(
+                calendar_users, window_start, window_end
                 )
 
-            for calendar_time_slot in calendar_time_slots:
-                set_of_all_one_hour_time_slots = set(
-                    calendar_time_slot.get_all_one_hour_time_slots()
-                    )
-                one_hour_time_slot_set_for_this_calendar_user = (
-                    one_hour_time_slot_set_for_this_calendar_user.union(
-                        set_of_all_one_hour_time_slots
+        # Compute the common one hour time slots. By default, the intervals
+        # of each user are merged and intersected with a sweep line, so the
+        # cost depends on the number of occurrences rather than on the number
+        # of hours.
+
+        with timing_phase("intersect"):
+            if settings.TIME_SLOT_INTERSECTION_BACKEND == "bitmap":
+                intersecting_intervals = (
+                    get_common_one_hour_time_slot_intervals_with_bitmaps(
+                        interval_lists
                         )
                     )
+            else:
+                intersecting_intervals = (
+                    get_common_one_hour_time_slot_intervals(interval_lists)
+                    )
+            if min_duration is not None:
+                intersecting_intervals = drop_short_ranges(
+                    intersecting_intervals, min_duration
+                    )
 
-            one_hour_time_slot_sets.append(
-                one_hour_time_slot_set_for_this_calendar_user
+        metrics_registry.observe(
+            "time_slot_intersection_result_size",
+            sum(
+                (end - start) // ONE_HOUR
+                for start, end in intersecting_intervals
                 )
+            )
 
-        # Compute the common one hour time slots
+        # Compact responses have one pair of numbers per run of one hour time
+        # slots, so they stay small without streaming.
 
-        intersecting_one_hour_time_slots  = set.intersection(
-            *one_hour_time_slot_sets
-            )
+        if is_compact(request):
+            with timing_phase("serialize"):
+                if output == "ranges":
+                    response = {
+                        "users" : usernames_list,
+                        "ranges" : [
+                            [int(start.timestamp()), int(end.timestamp())]
+                            for start, end in merge_intervals(
+                                intersecting_intervals
+                                )
+                            ]
+                        }
+                else:
+                    response = {
+                        "users" : usernames_list,
+                        "slots" : [
+                            [int(start.timestamp()), (end - start) // ONE_HOUR]
+                            for start, end in intersecting_intervals
+                            ]
+                        }
+            return Response(response, headers = {"ETag" : etag})
 
-        response = {
-            "users" : usernames_list,
-            "intersecting one hour time slots" : [
-                {
-                    "start" : dt.ctime(),
-                    "end" : (dt + timedelta(hours = 1)).ctime()
+        # Intervals of different offsets from the beginning of the hour can
+        # overlap, so they are merged again into ranges.
+
+        if output == "ranges":
+            with timing_phase("serialize"):
+                response = {
+                    "users" : usernames_list,
+                    "intersecting ranges" : [
+                        {
+                            "start" : timezone.localtime(start).isoformat(),
+                            "end" : timezone.localtime(end).isoformat(),
+                            }
+                        for start, end in merge_intervals(
+                            intersecting_intervals
+                            )
+                        ]
                     }
-                    for dt in intersecting_one_hour_time_slots
-                ]
-            }
+            return Response(response, headers = {"ETag" : etag})
 
-        return Response(response)
+        # In streaming mode, the response is written out while the one hour
+        # time slots are being generated, so the memory used does not grow
+        # with the size of the result.
+
+        if request.GET.get("stream", None) in ("1", "true"):
+            response = StreamingHttpResponse(
+                generate_time_slot_intersection_json(
+                    usernames_list, intersecting_intervals
+                    ),
+                content_type = "application/json"
+                )
+            response["ETag"] = etag
+            return response
+
+        with timing_phase("serialize"):
+            response = {
+                "users" : usernames_list,
+                "intersecting one hour time slots" : [
+                    {
+                        "start" : dt.ctime(),
+                        "end" : (dt + timedelta(hours = 1)).ctime()
+                        }
+                        for dt in split_into_one_hour_time_slots(
+                            intersecting_intervals
+                            )
+                    ]
+                }
+
+        return Response(response, headers = {"ETag" : etag})
+
+
+class TimeSlotNextIntersectionView(APIView):
+    """
+    get:
+    Returns the first one hour time slots common to two or more users,
+    starting at or after a given datetime.
+
+    **You must supply the required url query parameter `users`, a comma
+    separated string of at least two usernames, like for
+    `/time-slot-intersections/`.**
+
+    Use the optional url query parameter `after` to choose where to start
+    looking, e.g. `?users=philipp,carl&after=2018-06-25T00:00:00`. It
+    defaults to now. Use the optional url query parameter `limit` to choose
+    how many time slots to return (10 by default, at most 1000).
+
+    The occurrences of each user are read in time order, and the search
+    stops as soon as enough common time slots are found, so the response
+    time depends on `limit` rather than on how far the calendars go.
+
+    Compact responses, like for `/time-slot-intersections/`, return the
+    starts of the time slots as `"slots" : [start,...]`, with Unix
+    timestamps.
+
+    ###Response schema
+        {
+            "users" : List of users for whom time slot intersections is
+                      being computed,
+            "intersecting one hour time slots" : [
+                {
+                    "start" : Start of a common one hour time slot
+                              (YYYY-MM-DDThh:mm:ss),
+                    "end" : End of the common one hour time slot
+                            (YYYY-MM-DDThh:mm:ss),
+                    },...
+                ],
+            }
+    """
+
+    schema = AutoSchema(
+        manual_fields = [
+            coreapi.Field(
+                name = "users",
+                required = True,
+                location = "query",
+                description = "Comma separated list of usernames.",
+                ),
+            coreapi.Field(
+                name = "after",
+                required = False,
+                location = "query",
+                description = (
+                    "Only return time slots starting at or after this "
+                    "datetime (YYYY-MM-DDThh:mm:ss). Defaults to now."
+                    ),
+                ),
+            coreapi.Field(
+                name = "limit",
+                required = False,
+                location = "query",
+                description = (
+                    "Number of time slots to return (at most {0}).".format(
+                        MAXIMUM_NEXT_INTERSECTION_LIMIT
+                        )
+                    ),
+                ),
+            ]
+        )
+
+    renderer_classes = COMPACT_RENDERER_CLASSES
+
+    def get(self, request, format = None):
+
+        usernames_list, error_response = get_usernames_list(request)
+
+        if error_response is not None:
+            return error_response
+
+        after = request.GET.get("after", None)
+
+        if after is None:
+            after = timezone.now()
+        else:
+            try:
+                after = parse_query_datetime(after)
+            except ValueError:
+                return Response(
+                    {
+                        "error" : (
+                            "Invalid value for the 'after' url parameter. "
+                            "Please specify a datetime formatted as "
+                            "YYYY-MM-DDThh:mm:ss e.g. 2018-06-22T15:00:00."
+                            ),
+                        },
+                        status = status.HTTP_400_BAD_REQUEST
+                    )
+
+        try:
+            limit = int(request.GET.get("limit", DEFAULT_NEXT_INTERSECTION_LIMIT))
+        except ValueError:
+            limit = 0
+
+        if not 1 <= limit <= MAXIMUM_NEXT_INTERSECTION_LIMIT:
+            return Response(
+                {
+                    "error" : (
+                        "Invalid value for the 'limit' url parameter. Please "
+                        "specify a number between 1 and {0}.".format(
+                            MAXIMUM_NEXT_INTERSECTION_LIMIT
+                            )
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        calendar_users, error_response = get_calendar_users(usernames_list)
+
+        if error_response is not None:
+            return error_response
+
+        # Every user's occurrences are read lazily in time order and turned
+        # into a stream of one hour time slots. The streams are then
+        # intersected by advancing each of them only as far as the others,
+        # and the search stops after limit common time slots.
+
+        one_hour_time_slot_iterators = [
+            (
+                one_hour_time_slot
+                for one_hour_time_slot in iterate_one_hour_time_slots(
+                    iterate_time_slot_occurrence_intervals(
+                        calendar_user.id, after
+                        )
+                    )
+                if one_hour_time_slot >= after
+                )
+            for calendar_user in calendar_users
+            ]
+
+        with timing_phase("intersect"):
+            common_one_hour_time_slots = list(
+                itertools.islice(
+                    iterate_common_values(one_hour_time_slot_iterators), limit
+                    )
+                )
+
+        metrics_registry.observe(
+            "time_slot_intersection_result_size",
+            len(common_one_hour_time_slots)
+            )
+
+        if is_compact(request):
+            response = {
+                "users" : usernames_list,
+                "slots" : [
+                    int(dt.timestamp()) for dt in common_one_hour_time_slots
+                    ],
+                }
+        else:
+            response = {
+                "users" : usernames_list,
+                "intersecting one hour time slots" : [
+                    {
+                        "start" : dt.ctime(),
+                        "end" : (dt + timedelta(hours = 1)).ctime()
+                        }
+                        for dt in common_one_hour_time_slots
+                    ]
+                }
+
+        return Response(response)
+
+
+class TimeSlotQuorumView(APIView):
+    """
+    get:
+    Returns the one hour time slots when at least a given number of users
+    are available, and which users are available in each of them.
+
+    **You must supply the required url query parameter `users`, a comma
+    separated string of at least two usernames, like for
+    `/time-slot-intersections/`.**
+
+    Use the optional url query parameter `min_users` for the number of users
+    who must be available (all of them by default), and `required` for a
+    comma separated list of those users who must be available in every time
+    slot. For example,
+    `?users=carl,philipp,sarah,anna&required=carl&min_users=3` returns the
+    time slots when carl and any two of philipp, sarah and anna are
+    available. The optional url query parameters `from` and `to` restrict
+    the time slots to a window, like for `/time-slot-intersections/`.
+
+    ###Response schema
+        {
+            "users" : List of users considered,
+            "required users" : List of users who must be available,
+            "min_users" : Minimum number of available users,
+            "one hour time slots" : [
+                {
+                    "start" : Start of a one hour time slot
+                              (YYYY-MM-DDThh:mm:ss),
+                    "end" : End of the one hour time slot
+                            (YYYY-MM-DDThh:mm:ss),
+                    "available users" : List of users available in this
+                                        time slot,
+                    },...
+                ],
+            }
+    """
+
+    schema = AutoSchema(
+        manual_fields = [
+            coreapi.Field(
+                name = "users",
+                required = True,
+                location = "query",
+                description = "Comma separated list of usernames.",
+                ),
+            coreapi.Field(
+                name = "min_users",
+                required = False,
+                location = "query",
+                description = (
+                    "Minimum number of available users. Defaults to all "
+                    "users."
+                    ),
+                ),
+            coreapi.Field(
+                name = "required",
+                required = False,
+                location = "query",
+                description = (
+                    "Comma separated list of usernames who must be "
+                    "available."
+                    ),
+                ),
+            coreapi.Field(
+                name = "from",
+                required = False,
+                location = "query",
+                description = (
+                    "Only return time slots starting at or after this "
+                    "datetime (YYYY-MM-DDThh:mm:ss)."
+                    ),
+                ),
+            coreapi.Field(
+                name = "to",
+                required = False,
+                location = "query",
+                description = (
+                    "Only return time slots ending at or before this "
+                    "datetime (YYYY-MM-DDThh:mm:ss)."
+                    ),
+                ),
+            ]
+        )
+
+    def get(self, request, format = None):
+
+        usernames_list, error_response = get_usernames_list(request)
+
+        if error_response is not None:
+            return error_response
+
+        # Each user is only counted once.
+        usernames_list = list(collections.OrderedDict.fromkeys(usernames_list))
+
+        required_usernames = request.GET.get("required", "")
+        required_usernames = [
+            username for username in required_usernames.split(",") if username
+            ]
+
+        for username in required_usernames:
+            if username not in usernames_list:
+                return Response(
+                    {
+                        "error" : (
+                            "Required user {0} is not one of the users. "
+                            "Please also add them to the 'users' url "
+                            "parameter.".format(username)
+                            ),
+                        },
+                        status = status.HTTP_400_BAD_REQUEST
+                    )
+
+        try:
+            min_users = int(request.GET.get("min_users", len(usernames_list)))
+        except ValueError:
+            min_users = 0
+
+        if not 1 <= min_users <= len(usernames_list):
+            return Response(
+                {
+                    "error" : (
+                        "Invalid value for the 'min_users' url parameter. "
+                        "Please specify a number between 1 and the number "
+                        "of users."
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        (window_start, window_end), error_response = get_window(request)
+
+        if error_response is not None:
+            return error_response
+
+        calendar_users, error_response = get_calendar_users(usernames_list)
+
+        if error_response is not None:
+            return error_response
+
+        with timing_phase("availability"):
+            interval_lists = get_availability_interval_lists(
+                calendar_users, window_start, window_end
+                )
+
+        # A single sweep over the availability of all users counts how many
+        # of them are available at any time, instead of intersecting every
+        # subset of min_users users.
+
+        with timing_phase("intersect"):
+            quorum_intervals = get_quorum_one_hour_time_slot_intervals(
+                interval_lists, min_users,
+                [
+                    usernames_list.index(username)
+                    for username in required_usernames
+                    ]
+                )
+
+        with timing_phase("serialize"):
+            one_hour_time_slots = []
+            for start, end, indices in quorum_intervals:
+                available_usernames = [usernames_list[i] for i in indices]
+                for dt in split_into_one_hour_time_slots([(start, end)]):
+                    one_hour_time_slots.append(
+                        {
+                            "start" : dt.ctime(),
+                            "end" : (dt + timedelta(hours = 1)).ctime(),
+                            "available users" : available_usernames,
+                            }
+                        )
+
+        metrics_registry.observe(
+            "time_slot_intersection_result_size", len(one_hour_time_slots)
+            )
+
+        response = {
+            "users" : usernames_list,
+            "required users" : required_usernames,
+            "min_users" : min_users,
+            "one hour time slots" : one_hour_time_slots,
+            }
+
+        return Response(response)
+
+
+class TimeSlotOverlapRankingView(APIView):
+    """
+    get:
+    Returns the interviewers who have one hour time slots in common with a
+    candidate, ranked by the number of common one hour time slots.
+
+    **You must supply the required url query parameter `candidate`, the
+    username of a user, e.g., `?candidate=carl`.**
+
+    All interviewers are compared with the candidate in a single request.
+    Use the optional url query parameter `limit` to only return the best
+    ranked interviewers, e.g., `?candidate=carl&limit=10`. The optional url
+    query parameters `from` and `to` only count the one hour time slots
+    inside a window, like for `/time-slot-intersections/`.
+
+    ###Response schema
+        {
+            "candidate" : Username of the candidate,
+            "interviewers" : [
+                {
+                    "username" : Username of an interviewer,
+                    "overlapping hours" : Number of one hour time slots
+                                          common to the interviewer and
+                                          the candidate,
+                    },...
+                ],
+            }
+    """
+
+    schema = AutoSchema(
+        manual_fields = [
+            coreapi.Field(
+                name = "candidate",
+                required = True,
+                location = "query",
+                description = "Username of the candidate.",
+                ),
+            coreapi.Field(
+                name = "limit",
+                required = False,
+                location = "query",
+                description = (
+                    "Maximum number of interviewers to return. Defaults to "
+                    "all interviewers with common time slots."
+                    ),
+                ),
+            coreapi.Field(
+                name = "from",
+                required = False,
+                location = "query",
+                description = (
+                    "Only count time slots starting at or after this "
+                    "datetime (YYYY-MM-DDThh:mm:ss)."
+                    ),
+                ),
+            coreapi.Field(
+                name = "to",
+                required = False,
+                location = "query",
+                description = (
+                    "Only count time slots ending at or before this "
+                    "datetime (YYYY-MM-DDThh:mm:ss)."
+                    ),
+                ),
+            ]
+        )
+
+    def get(self, request, format = None):
+
+        candidate_username = request.GET.get("candidate", None)
+
+        if not candidate_username:
+            return Response(
+                {
+                    "error" : (
+                        "No candidate specified. Please specify the candidate "
+                        "using the url parameter 'candidate' e.g. "
+                        "?candidate=<user>."
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        limit = request.GET.get("limit", None)
+
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return Response(
+                    {
+                        "error" : (
+                            "Invalid value for the 'limit' url parameter. "
+                            "Please specify a positive number."
+                            ),
+                        },
+                        status = status.HTTP_400_BAD_REQUEST
+                    )
+
+        (window_start, window_end), error_response = get_window(request)
+
+        if error_response is not None:
+            return error_response
+
+        # The candidate and all interviewers are read with a single query.
+
+        calendar_users = CalendarUser.objects.filter(
+            Q(username = candidate_username) | Q(is_interviewer = True)
+            ).order_by("username")
+
+        candidate = None
+        interviewers = []
+
+        for calendar_user in calendar_users:
+            if calendar_user.username == candidate_username:
+                candidate = calendar_user
+            else:
+                interviewers.append(calendar_user)
+
+        if candidate is None:
+            return Response(
+                {
+                    "error" : (
+                        "User {0} does not exist".format(candidate_username)
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        with timing_phase("availability"):
+            interval_lists = get_availability_interval_lists(
+                [candidate] + interviewers, window_start, window_end
+                )
+
+        # The availability of the candidate is grouped by hour phase once,
+        # and then compared with every interviewer.
+
+        with timing_phase("intersect"):
+            candidate_intervals_by_phase = group_intervals_by_phase(
+                interval_lists[0]
+                )
+            ranking = []
+            for interviewer, intervals in zip(
+                    interviewers, interval_lists[1:]):
+                overlapping_hours = count_common_one_hour_time_slots(
+                    candidate_intervals_by_phase, intervals
+                    )
+                if overlapping_hours:
+                    ranking.append((overlapping_hours, interviewer.username))
+
+        # Interviewers with the same number of overlapping hours are ranked
+        # by username.
+
+        ranking.sort(key = lambda item: (-item[0], item[1]))
+
+        if limit is not None:
+            ranking = ranking[:limit]
+
+        metrics_registry.observe(
+            "time_slot_intersection_result_size", len(ranking)
+            )
+
+        response = {
+            "candidate" : candidate_username,
+            "interviewers" : [
+                {
+                    "username" : username,
+                    "overlapping hours" : overlapping_hours,
+                    }
+                for overlapping_hours, username in ranking
+                ],
+            }
+
+        return Response(response)
+
+
+class AvailabilityView(APIView):
+    """
+    get:
+    Returns the users who are available during a one hour time slot, or
+    during a whole window of one hour time slots.
+
+    **You must supply either the url query parameter `at`, the start of a
+    one hour time slot, e.g., `?at=2018-06-25T14:00:00`, or both url query
+    parameters `from` and `to`, e.g.,
+    `?from=2018-06-25T14:00:00&to=2018-06-25T17:00:00`.** The window must
+    start at the beginning of an hour in UTC, last a whole number of hours,
+    and at most a week.
+
+    Use the optional url query parameter `type` to only return interviewers
+    (`?type=interviewer`) or candidates (`?type=candidate`).
+
+    ###Response schema
+        {
+            "from" : Start of the window (YYYY-MM-DDThh:mm:ss),
+            "to" : End of the window (YYYY-MM-DDThh:mm:ss),
+            "users" : List of users available during the whole window,
+            }
+    """
+
+    schema = AutoSchema(
+        manual_fields = [
+            coreapi.Field(
+                name = "at",
+                required = False,
+                location = "query",
+                description = (
+                    "Start of a one hour time slot (YYYY-MM-DDThh:mm:ss)."
+                    ),
+                ),
+            coreapi.Field(
+                name = "from",
+                required = False,
+                location = "query",
+                description = "Start of the window (YYYY-MM-DDThh:mm:ss).",
+                ),
+            coreapi.Field(
+                name = "to",
+                required = False,
+                location = "query",
+                description = "End of the window (YYYY-MM-DDThh:mm:ss).",
+                ),
+            coreapi.Field(
+                name = "type",
+                required = False,
+                location = "query",
+                description = (
+                    "Only return users of this type. Value should be "
+                    "'interviewer' or 'candidate'."
+                    ),
+                ),
+            ]
+        )
+
+    def get(self, request, format = None):
+
+        at = request.GET.get("at", None)
+
+        if at is not None:
+            try:
+                window_start = parse_query_datetime(at)
+            except ValueError:
+                return Response(
+                    {
+                        "error" : (
+                            "Invalid value for the 'at' url parameter. "
+                            "Please specify a datetime formatted as "
+                            "YYYY-MM-DDThh:mm:ss e.g. 2018-06-22T15:00:00."
+                            ),
+                        },
+                        status = status.HTTP_400_BAD_REQUEST
+                    )
+            window_end = window_start + ONE_HOUR
+        else:
+            (window_start, window_end), error_response = get_window(request)
+            if error_response is not None:
+                return error_response
+            if window_start is None or window_end is None:
+                return Response(
+                    {
+                        "error" : (
+                            "No time specified. Please specify a one hour "
+                            "time slot using the url parameter 'at', or a "
+                            "window using the url parameters 'from' and "
+                            "'to'."
+                            ),
+                        },
+                        status = status.HTTP_400_BAD_REQUEST
+                    )
+
+        # Time slots are created with one hour time slots starting at the
+        # beginning of an hour in UTC, so other windows would always be
+        # empty.
+
+        if get_hour_phase(window_start.astimezone(pytz.utc)):
+            return Response(
+                {
+                    "error" : (
+                        "Invalid value for the '{0}' url parameter. The "
+                        "availability of users is only known for one hour "
+                        "time slots starting at the beginning of an hour in "
+                        "UTC e.g. 2018-06-22T15:00:00."
+                        ).format("at" if at is not None else "from"),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        if ((window_end - window_start) % ONE_HOUR or
+                window_end - window_start > MAXIMUM_AVAILABILITY_WINDOW):
+            return Response(
+                {
+                    "error" : (
+                        "The window must last a whole number of hours, and "
+                        "at most {0} days.".format(
+                            MAXIMUM_AVAILABILITY_WINDOW.days
+                            )
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        user_type = request.GET.get("type", None)
+
+        if user_type not in (None, "interviewer", "candidate"):
+            return Response(
+                {
+                    "error" : (
+                        "Invalid value for the 'type' url parameter. Please "
+                        "specify 'interviewer' or 'candidate'."
+                        ),
+                    },
+                    status = status.HTTP_400_BAD_REQUEST
+                )
+
+        # A user is available during the window if their occurrences cover
+        # it. Occurrences are always shorter than a day, so bounding start
+        # from below keeps the query a range scan on the start index, which
+        # only reads the occurrences overlapping the window. Like the one
+        # hour time slots of the window, only those of occurrences starting
+        # at the beginning of an hour in UTC can coincide with them.
+
+        time_slot_occurrences = TimeSlotOccurrence.objects.filter(
+            start__gt = window_start - MAXIMUM_OCCURRENCE_DURATION,
+            start__lt = window_end,
+            end__gt = window_start,
+            )
+
+        if user_type is not None:
+            time_slot_occurrences = time_slot_occurrences.filter(
+                creator__is_interviewer = user_type == "interviewer"
+                )
+
+        with timing_phase("availability"):
+            usernames_list = []
+            for username, rows in itertools.groupby(
+                time_slot_occurrences.order_by(
+                    "creator__username", "start"
+                    ).values_list("creator__username", "start", "end"),
+                key = lambda row: row[0]
+                ):
+                intervals = merge_intervals(
+                    (start, end) for _, start, end in rows
+                    if not get_hour_phase(start)
+                    )
+                if any(
+                    start <= window_start and end >= window_end
+                    for start, end in intervals
+                    ):
+                    usernames_list.append(username)
+
+        response = {
+            "from" : window_start.ctime(),
+            "to" : window_end.ctime(),
+            "users" : usernames_list,
+            }
+
+        return Response(response)
+
+
+class ScheduleCacheView(APIView):
+    """
+    get:
+    Returns statistics about the schedule cache of the worker process
+    serving the request. The schedule cache keeps the merged availability of
+    recently queried users for the time slot intersections endpoint.
+
+    ###Response schema
+        {
+            "hits" : Number of users found in the cache,
+            "misses" : Number of users whose availability had to be read from
+                       the database,
+            "size" : Number of users currently in the cache,
+            "maxsize" : Maximum number of users kept in the cache,
+            }
+    """
+
+    def get(self, request, format = None):
+
+        return Response(schedule_cache.info())
@@ -0,0 +1,18 @@
+# Generated by Django 2.0.6 on 2026-10-18 07:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20180622_1218'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendaruser',
+            name='schedule_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incremented whenever a time slot of this user is created or deleted. Used to validate cached schedules.'),
+        ),
+    ]
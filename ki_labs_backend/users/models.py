@@ -9,6 +9,14 @@ class CalendarUser(User):
             "interviewer, false if user is a candidate"
             )
         )
+    schedule_version = models.PositiveIntegerField(
+        default = 0,
+        editable = False,
+        help_text = (
+            "Incremented whenever a time slot of this user is created or "
+            "deleted. Used to validate cached schedules."
+            )
+        )
 
     def __str__(self):
         return "Username: {0}, Type: {1}".format(
@@ -1,3 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytz
 from django.test import TestCase
+from django.urls import reverse
+
+from time_slots.models import CalendarTimeSlot
+from users.models import CalendarUser
+from utils.ical_ops import iterate_ical_events, parse_ical_datetime
+
+class CalendarUserCalendarFeedViewTest(TestCase):
+
+    def setUp(self):
+
+        self.calendar_user = CalendarUser.objects.create(
+            username = "philipp", is_interviewer = True
+            )
+
+        self.start_datetime = datetime(2018, 6, 25, 9, 0, 0, tzinfo = pytz.utc)
+
+        self.calendar_time_slot = CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = self.start_datetime,
+            end_datetime = self.start_datetime + timedelta(hours = 2),
+            rrule = "FREQ=WEEKLY;INTERVAL=2;UNTIL=20180801T235959",
+            )
+        CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = self.start_datetime + timedelta(days = 1),
+            end_datetime = self.start_datetime + timedelta(days = 1, hours = 1),
+            )
+
+        self.url = reverse(
+            "calendar_user_calendar_feed_view",
+            kwargs = {"username" : "philipp"}
+            )
+
+    def test_feed_is_parsed_back(self):
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Type"], "text/calendar; charset=utf-8"
+            )
+
+        events = list(
+            iterate_ical_events(
+                b"".join(response.streaming_content).splitlines()
+                )
+            )
+
+        self.assertEqual(
+            [
+                (
+                    parse_ical_datetime(*event["DTSTART"]),
+                    parse_ical_datetime(*event["DTEND"]),
+                    event.get("RRULE", ({}, None))[1],
+                    )
+                for event in events
+                ],
+            [
+                (
+                    self.start_datetime,
+                    self.start_datetime + timedelta(hours = 2),
+                    "FREQ=WEEKLY;INTERVAL=2;UNTIL=20180801T235959Z",
+                    ),
+                (
+                    self.start_datetime + timedelta(days = 1),
+                    self.start_datetime + timedelta(days = 1, hours = 1),
+                    None,
+                    ),
+                ]
+            )
+
+    def test_unchanged_feed_is_not_generated_again(self):
+
+        etag = self.client.get(self.url)["ETag"]
+
+        # Only the user is read
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_with_time_slots(self):
+
+        etags = [self.client.get(self.url)["ETag"]]
+
+        CalendarTimeSlot.objects.create(
+            creator = self.calendar_user,
+            start_datetime = self.start_datetime + timedelta(days = 2),
+            end_datetime = self.start_datetime + timedelta(days = 2, hours = 1),
+            )
+        etags.append(self.client.get(self.url)["ETag"])
+
+        self.calendar_time_slot.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etags[1])
+        etags.append(response["ETag"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(set(etags)), 3)
+
+    def test_missing_user(self):
+
+        response = self.client.get(
+            reverse(
+                "calendar_user_calendar_feed_view",
+                kwargs = {"username" : "nobody"}
+                )
+            )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 404)
@@ -1,6 +1,8 @@
 from django.urls import re_path, path
 
-from users.views import CalendarUserView, CalendarUserDetailView
+from users.views import (
+    CalendarUserView, CalendarUserDetailView, CalendarUserCalendarFeedView
+    )
 
 urlpatterns = [
     re_path(
@@ -11,4 +13,8 @@ urlpatterns = [
         "<str:username>/", CalendarUserDetailView.as_view(),
         name = "calendar_user_detail_view"
         ),
+    path(
+        "<str:username>/calendar.ics", CalendarUserCalendarFeedView.as_view(),
+        name = "calendar_user_calendar_feed_view"
+        ),
     ]
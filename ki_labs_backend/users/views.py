@@ -1,11 +1,17 @@
 import coreapi
+from django.http import Http404, StreamingHttpResponse
+from django.utils.http import quote_etag
 from rest_framework.schemas import AutoSchema
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from time_slots.ical import generate_ical_calendar
+from time_slots.models import CalendarTimeSlot
 from users.models import CalendarUser
 from users.serializers import CalendarUserSerializer
+from utils.http_ops import get_not_modified_response
 
 class CalendarUserAutoSchema(AutoSchema):
 
@@ -117,3 +123,59 @@ class CalendarUserDetailView(generics.RetrieveDestroyAPIView):
     serializer_class = CalendarUserSerializer
     lookup_field = "username"
     lookup_url_kwarg = "username"
+
+
+class CalendarUserCalendarFeedView(APIView):
+    """
+    get:
+    Returns the time slots of an user as an iCalendar (.ics) feed, which can
+    be subscribed to from calendar applications. Recurring time slots are
+    exported with their recurrence rule.
+
+    The response has an `ETag` header which changes whenever a time slot of
+    the user is created or deleted. Send it back in the `If-None-Match`
+    header to get an empty `304 Not Modified` response while the feed is
+    unchanged.
+    """
+
+    def get(self, request, username, format = None):
+
+        # Only the user is read here. The time slots are not touched unless
+        # the feed has changed.
+
+        calendar_user = CalendarUser.objects.filter(
+            username = username
+            ).values("id", "schedule_version").first()
+
+        if calendar_user is None:
+            raise Http404("User {0} does not exist".format(username))
+
+        # The DTSTAMP of the events is the time the feed is generated, so
+        # feeds with the same schedule version are only equivalent, not
+        # identical. This makes the ETag a weak validator.
+
+        etag = "W/" + quote_etag(
+            "{0}-{1}".format(
+                calendar_user["id"], calendar_user["schedule_version"]
+                )
+            )
+
+        not_modified_response = get_not_modified_response(request, etag)
+
+        if not_modified_response is not None:
+            return not_modified_response
+
+        calendar_time_slots = CalendarTimeSlot.objects.filter(
+            creator_id = calendar_user["id"]
+            ).order_by("start_datetime", "id").iterator()
+
+        response = StreamingHttpResponse(
+            generate_ical_calendar(calendar_time_slots, username),
+            content_type = "text/calendar; charset=utf-8"
+            )
+        response["ETag"] = etag
+        response["Content-Disposition"] = (
+            'attachment; filename="{0}.ics"'.format(username)
+            )
+
+        return response
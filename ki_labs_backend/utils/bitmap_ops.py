@@ -0,0 +1,121 @@
+from django.core.exceptions import ImproperlyConfigured
+
+from utils.interval_ops import (
+    ONE_HOUR, get_common_one_hour_time_slot_intervals, get_hour_phase
+    )
+
+# numpy is an optional dependency, only needed for the bitmap backend of
+# TimeSlotIntersectionView.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def get_availability_bitmaps(interval_lists, base, number_of_hours):
+    """
+    Represent the availability of several users as a boolean matrix with one
+    row per user and one column per hour, counted from base.
+
+    Input: A list of lists of (start, end) tuples, one list per user. All
+           starts and ends must lie a whole number of hours away from base.
+           The number of columns of the matrix.
+    Output: A numpy boolean array of shape
+            (len(interval_lists), number_of_hours).
+    """
+
+    bitmaps = numpy.zeros((len(interval_lists), number_of_hours), dtype = bool)
+
+    for row, intervals in enumerate(interval_lists):
+
+        # Mark the start and the end of every interval in a difference array.
+        # After a cumulative sum, an hour is available if it is covered by at
+        # least one interval.
+
+        starts = []
+        ends = []
+
+        for start, end in intervals:
+            starts.append((start - base) // ONE_HOUR)
+            ends.append((end - base) // ONE_HOUR)
+
+        starts = numpy.clip(starts, 0, number_of_hours).astype(numpy.int64)
+        ends = numpy.clip(ends, 0, number_of_hours).astype(numpy.int64)
+
+        differences = numpy.zeros(number_of_hours + 1, dtype = numpy.int64)
+        numpy.add.at(differences, starts, 1)
+        numpy.add.at(differences, ends, -1)
+
+        bitmaps[row] = numpy.cumsum(differences[:-1]) > 0
+
+    return bitmaps
+
+
+def get_intervals_from_bitmap(bitmap, base):
+    """
+    Inverse of get_availability_bitmaps() for a single row.
+
+    Input: A one dimensional numpy boolean array, and the datetime of its
+           first hour.
+    Output: A sorted list of disjoint (start, end) tuples.
+    """
+
+    padded_bitmap = numpy.concatenate(([False], bitmap, [False]))
+    edges = numpy.flatnonzero(padded_bitmap[1:] != padded_bitmap[:-1])
+
+    return [
+        (base + int(start) * ONE_HOUR, base + int(end) * ONE_HOUR)
+        for start, end in zip(edges[::2], edges[1::2])
+        ]
+
+
+def get_common_one_hour_time_slot_intervals_with_bitmaps(interval_lists):
+    """
+    Bitmap backend for get_common_one_hour_time_slot_intervals(), with the
+    same input and output.
+
+    Every user's availability becomes a row of a boolean hour matrix, and
+    the common one hour time slots are found with a single vectorized
+    logical_and across the rows. Time slots are expected to start at the
+    beginning of an hour. If they don't all share the same offset from the
+    beginning of the hour, the interval backend is used instead.
+    """
+
+    if numpy is None:
+        raise ImproperlyConfigured(
+            "The bitmap backend for time slot intersections requires numpy. "
+            "Install numpy or set TIME_SLOT_INTERSECTION_BACKEND to "
+            "'intervals'."
+            )
+
+    if not interval_lists or not all(interval_lists):
+        return []
+
+    phases = set(
+        get_hour_phase(start)
+        for intervals in interval_lists
+        for start, end in intervals
+        )
+
+    if len(phases) > 1:
+        return get_common_one_hour_time_slot_intervals(interval_lists)
+
+    # Hours outside of the span covered by every user can not be common, so
+    # the matrix only needs to cover the overlap of the spans.
+
+    base = max(
+        min(start for start, end in intervals) for intervals in interval_lists
+        )
+    horizon = min(
+        max(end for start, end in intervals) for intervals in interval_lists
+        )
+
+    if base >= horizon:
+        return []
+
+    bitmaps = get_availability_bitmaps(
+        interval_lists, base, (horizon - base) // ONE_HOUR
+        )
+
+    return get_intervals_from_bitmap(
+        numpy.logical_and.reduce(bitmaps, axis = 0), base
+        )
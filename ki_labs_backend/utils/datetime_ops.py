@@ -1,3 +1,10 @@
+from datetime import datetime
+import itertools
+import re
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
 def get_rrule_format(datetime):
     """
     The rrulestr() function in the dateutils library requires a particular
@@ -9,3 +16,114 @@ def get_rrule_format(datetime):
     """
 
     return datetime.strftime("%Y%m%dT%H%M%S")
+
+
+def parse_rrule_format(value):
+    """
+    Inverse of get_rrule_format(). Parses a datetime formatted the way
+    rrulestr() expects it. A trailing Z (UTC marker) is ignored, since the
+    recurrence rules are expanded with naive datetimes.
+
+    Input: A string e.g. 20180623T090000
+    Output: A datetime object e.g. datetime.datetime(2018, 06, 23, 9, 0, 0)
+    """
+
+    return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+
+
+def get_rrule_until(rrule):
+    """
+    Extract the UNTIL keyword from a recurrence rule string.
+
+    Input: A string e.g. FREQ=DAILY;INTERVAL=1;UNTIL=20180630T235959
+    Output: A datetime object e.g. datetime.datetime(2018, 06, 30, 23, 59, 59)
+            or None if the recurrence rule does not have an UNTIL keyword.
+    """
+
+    match = re.search(r"UNTIL=([0-9TZ]+)", rrule, re.IGNORECASE)
+
+    if match is None:
+        return None
+
+    return parse_rrule_format(match.group(1))
+
+
+def parse_rrule(rrule):
+    """
+    Split a recurrence rule string into its FREQ, INTERVAL and UNTIL
+    keywords.
+
+    Input: A string e.g. FREQ=DAILY;INTERVAL=1;UNTIL=20180630T235959
+    Output: A dictionary e.g.
+
+        {
+            "frequency" : "DAILY",
+            "interval" : 1,
+            "until" : datetime.datetime(2018, 06, 30, 23, 59, 59),
+            }
+
+    A missing INTERVAL is 1, and a missing UNTIL is None.
+    """
+
+    parts = dict(
+        (key.upper(), value)
+        for key, _, value in (
+            part.partition("=") for part in rrule.split(";") if part
+            )
+        )
+
+    return {
+        "frequency" : parts["FREQ"].upper(),
+        "interval" : int(parts.get("INTERVAL", "1")),
+        "until" : (
+            parse_rrule_format(parts["UNTIL"]) if "UNTIL" in parts else None
+            ),
+        }
+
+
+def get_arithmetic_occurrences(dtstart, step, until = None):
+    """
+    Occurrences of a recurrence rule repeating at a fixed step, like DAILY
+    and WEEKLY rules, computed directly instead of iterating with dateutil.
+    The occurrences are the same as those of
+    rrule(..., dtstart = dtstart, until = until).
+
+    Input: Naive datetime objects dtstart, and optionally until, and the
+           step as a timedelta object e.g. timedelta(days = 14) for
+           FREQ=WEEKLY;INTERVAL=2.
+    Output: An iterable of naive datetime objects, in increasing order. It is
+            infinite if until is not given.
+    """
+
+    if until is None:
+        return (dtstart + i * step for i in itertools.count())
+
+    if until < dtstart:
+        return []
+
+    return [
+        dtstart + i * step for i in range((until - dtstart) // step + 1)
+        ]
+
+
+def parse_query_datetime(value):
+    """
+    Parse a datetime supplied as a url query parameter. Naive datetimes are
+    interpreted in the current time zone, like the datetimes accepted by the
+    serializers.
+
+    Input: A string e.g. 2018-06-23T09:00:00
+    Output: A timezone aware datetime object.
+
+    Raises ValueError if the string is not a valid datetime.
+    """
+
+    parsed_datetime = parse_datetime(value)
+
+    if parsed_datetime is None:
+        raise ValueError("{0} is not a valid datetime".format(value))
+
+    if timezone.is_naive(parsed_datetime):
+        parsed_datetime = timezone.make_aware(parsed_datetime)
+
+    return parsed_datetime
@@ -0,0 +1,19 @@
+from django.utils.cache import get_conditional_response
+
+def get_not_modified_response(request, etag):
+    """
+    Answer conditional GET requests before doing any expensive work.
+
+    Input: The request, and the ETag of the response it would get, quoted
+           e.g. '"5-12"' or 'W/"5-12"'.
+    Output: A 304 Not Modified response carrying the ETag if the request's
+            If-None-Match header matches it (a 412 Precondition Failed
+            response if an If-Match header doesn't), otherwise None.
+    """
+
+    response = get_conditional_response(request, etag = etag)
+
+    if response is not None:
+        response["ETag"] = etag
+
+    return response
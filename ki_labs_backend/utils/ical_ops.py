@@ -0,0 +1,213 @@
+from datetime import datetime, time, timedelta
+import re
+
+import pytz
+from django.utils import timezone
+
+def iterate_ical_lines(ical_file):
+    """
+    Read the content lines of an iCalendar file one at a time, joining the
+    lines folded according to
+    https://tools.ietf.org/html/rfc5545#section-3.1. Only one content line is
+    held in memory at a time, so files of any size can be read.
+
+    Input: An iterable of lines, as bytes or strings e.g. an open file.
+    Output: A generator of strings e.g. "DTSTART:20180625T090000Z".
+    """
+
+    content_line = None
+
+    for line in ical_file:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors = "replace")
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if content_line is not None:
+                content_line += line[1:]
+            continue
+        if content_line is not None:
+            yield content_line
+        content_line = line
+
+    if content_line:
+        yield content_line
+
+
+def parse_ical_content_line(content_line):
+    """
+    Split a content line into its name, parameters and value.
+
+    Input: A string e.g. "DTSTART;TZID=Europe/Berlin:20180625T090000"
+    Output: A tuple e.g. ("DTSTART", {"TZID" : "Europe/Berlin"}, "20180625T090000")
+    """
+
+    # The value starts at the first colon which is not inside a quoted
+    # parameter value.
+    match = re.match(r'((?:[^:"]|"[^"]*")*):(.*)', content_line)
+
+    if match is None:
+        return content_line.upper(), {}, ""
+
+    name_and_parameters, value = match.groups()
+    name, *parameters = name_and_parameters.split(";")
+
+    parameters = dict(
+        (key.upper(), parameter_value.strip('"'))
+        for key, _, parameter_value in (
+            parameter.partition("=") for parameter in parameters
+            )
+        )
+
+    return name.upper(), parameters, value
+
+
+def iterate_ical_events(ical_file):
+    """
+    Read the VEVENT components of an iCalendar file one at a time. Nested
+    components like VALARM are skipped.
+
+    Input: An iterable of lines, as bytes or strings e.g. an open file.
+    Output: A generator of dictionaries mapping property names to
+            (parameters, value) tuples e.g.
+
+        {
+            "DTSTART" : ({}, "20180625T090000Z"),
+            "DTEND" : ({}, "20180625T110000Z"),
+            "RRULE" : ({}, "FREQ=WEEKLY;UNTIL=20180801T000000Z"),...
+            }
+    """
+
+    event = None
+    nested_components = 0
+
+    for content_line in iterate_ical_lines(ical_file):
+        name, parameters, value = parse_ical_content_line(content_line)
+        value_upper = value.upper()
+
+        if name == "BEGIN" and value_upper == "VEVENT":
+            event = {}
+            nested_components = 0
+        elif event is None:
+            continue
+        elif name == "END" and value_upper == "VEVENT":
+            yield event
+            event = None
+        elif name == "BEGIN":
+            nested_components += 1
+        elif name == "END":
+            nested_components -= 1
+        elif nested_components == 0:
+            event.setdefault(name, (parameters, value))
+
+
+def parse_ical_datetime(parameters, value):
+    """
+    Parse a DATE or DATE-TIME value. Floating times are interpreted in the
+    current time zone. Dates are interpreted as midnight.
+
+    Input: The parameters and value of a property e.g.
+           ({"TZID" : "Europe/Berlin"}, "20180625T090000")
+    Output: A timezone aware datetime object.
+
+    Raises ValueError if the value can't be parsed.
+    """
+
+    if parameters.get("VALUE", "").upper() == "DATE" or "T" not in value:
+        return timezone.make_aware(
+            datetime.combine(datetime.strptime(value, "%Y%m%d"), time())
+            )
+
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(
+            tzinfo = pytz.utc
+            )
+
+    naive_datetime = datetime.strptime(value, "%Y%m%dT%H%M%S")
+
+    if "TZID" in parameters:
+        try:
+            tzinfo = pytz.timezone(parameters["TZID"])
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(
+                "Unknown time zone {0}".format(parameters["TZID"])
+                )
+        return tzinfo.localize(naive_datetime)
+
+    return timezone.make_aware(naive_datetime)
+
+
+def parse_ical_duration(value):
+    """
+    Parse a DURATION value like P1D, PT2H or PT1H30M. Weeks, days, hours,
+    minutes and seconds are supported.
+
+    Input: A string e.g. "PT2H"
+    Output: A timedelta object e.g. datetime.timedelta(seconds = 7200)
+
+    Raises ValueError if the value can't be parsed.
+    """
+
+    match = re.match(
+        r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$",
+        value
+        )
+
+    if match is None:
+        raise ValueError("Invalid duration {0}".format(value))
+
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+
+    duration = timedelta(
+        weeks = int(weeks or 0), days = int(days or 0),
+        hours = int(hours or 0), minutes = int(minutes or 0),
+        seconds = int(seconds or 0)
+        )
+
+    return -duration if sign == "-" else duration
+
+
+def fold_ical_content_line(content_line):
+    """
+    Fold a content line into lines of at most 75 octets, according to
+    https://tools.ietf.org/html/rfc5545#section-3.1.
+
+    Input: A string.
+    Output: A string of CRLF terminated lines.
+    """
+
+    encoded_line = content_line.encode("utf-8")
+
+    if len(encoded_line) <= 75:
+        return content_line + "\r\n"
+
+    # Continuation lines start with a space, which counts towards their
+    # 75 octets. Characters are never split across lines.
+
+    lines = []
+    line = ""
+    line_length = 0
+
+    for character in content_line:
+        character_length = len(character.encode("utf-8"))
+        if line_length + character_length > 75:
+            lines.append(line)
+            line = " "
+            line_length = 1
+        line += character
+        line_length += character_length
+
+    lines.append(line)
+
+    return "\r\n".join(lines) + "\r\n"
+
+
+def format_ical_datetime(value):
+    """
+    Format a timezone aware datetime as an iCalendar DATE-TIME in UTC.
+
+    Input: A datetime object e.g. datetime.datetime(2018, 06, 23, 9, 0, 0,
+           tzinfo = <UTC>)
+    Output: A string e.g. 20180623T090000Z
+    """
+
+    return value.astimezone(pytz.utc).strftime("%Y%m%dT%H%M%SZ")
@@ -0,0 +1,571 @@
+import bisect
+from datetime import timedelta
+import heapq
+import math
+
+ONE_HOUR = timedelta(hours = 1)
+
+def get_hour_phase(datetime):
+    """
+    One hour time slots can only coincide if they start at the same offset
+    from the beginning of an hour. This function returns that offset.
+
+    Input: A datetime object e.g. datetime.datetime(2018, 06, 23, 9, 30, 0)
+    Output: A timedelta object e.g. datetime.timedelta(seconds = 1800)
+    """
+
+    return datetime - datetime.replace(minute = 0, second = 0, microsecond = 0)
+
+
+def merge_intervals(intervals):
+    """
+    Sort intervals and coalesce the ones that overlap or touch each other.
+
+    Input: An iterable of (start, end) tuples e.g.
+
+        [
+            (datetime(2018, 6, 25, 10, 0), datetime(2018, 6, 25, 12, 0)),
+            (datetime(2018, 6, 25, 9, 0), datetime(2018, 6, 25, 11, 0)),
+            (datetime(2018, 6, 25, 14, 0), datetime(2018, 6, 25, 15, 0)),
+            ]
+
+    Output: A sorted list of disjoint (start, end) tuples e.g.
+
+        [
+            (datetime(2018, 6, 25, 9, 0), datetime(2018, 6, 25, 12, 0)),
+            (datetime(2018, 6, 25, 14, 0), datetime(2018, 6, 25, 15, 0)),
+            ]
+    """
+
+    merged_intervals = []
+
+    for start, end in sorted(intervals):
+        if start >= end:
+            continue
+        if merged_intervals and start <= merged_intervals[-1][1]:
+            if end > merged_intervals[-1][1]:
+                merged_intervals[-1] = (merged_intervals[-1][0], end)
+        else:
+            merged_intervals.append((start, end))
+
+    return merged_intervals
+
+
+def merge_one_hour_time_slot_intervals(intervals):
+    """
+    Like merge_intervals(), but only coalesces intervals whose one hour time
+    slots start at the same offset from the beginning of the hour (see
+    get_common_one_hour_time_slot_intervals()).
+
+    Input: An iterable of (start, end) tuples.
+    Output: A list of (start, end) tuples sorted by start.
+    """
+
+    intervals_by_phase = {}
+
+    for start, end in intervals:
+        intervals_by_phase.setdefault(get_hour_phase(start), []).append(
+            (start, end)
+            )
+
+    if len(intervals_by_phase) == 1:
+        return merge_intervals(intervals_by_phase.popitem()[1])
+
+    merged_intervals = []
+
+    for intervals_with_same_phase in intervals_by_phase.values():
+        merged_intervals += merge_intervals(intervals_with_same_phase)
+
+    return sorted(merged_intervals)
+
+
+def intersect_intervals(interval_lists):
+    """
+    Compute the intersection of several lists of intervals with a sweep line.
+
+    Every list must be sorted and coalesced, as returned by merge_intervals(),
+    so that at most one interval of each list covers any point in time.
+    The sweep then only has to find the stretches where all lists are
+    covering at once.
+
+    Input: A list of lists of (start, end) tuples, one list per user.
+    Output: A sorted list of disjoint (start, end) tuples covered by every list.
+    """
+
+    if not interval_lists:
+        return []
+
+    # Ends sort before starts at the same point in time, so that intervals
+    # which merely touch each other do not count as intersecting.
+
+    events = []
+
+    for intervals in interval_lists:
+        for start, end in intervals:
+            events.append((start, 1))
+            events.append((end, -1))
+
+    events.sort()
+
+    required_count = len(interval_lists)
+    count = 0
+    intersection_start = None
+    intersecting_intervals = []
+
+    for point, delta in events:
+        count += delta
+        if count == required_count:
+            intersection_start = point
+        elif intersection_start is not None:
+            if intersection_start < point:
+                intersecting_intervals.append((intersection_start, point))
+            intersection_start = None
+
+    return intersecting_intervals
+
+
+def get_common_one_hour_time_slot_intervals(interval_lists):
+    """
+    Compute the one hour time slots common to several users.
+
+    Each user's availability is given as (start, end) intervals, where an
+    interval stands for the one hour time slots starting at start,
+    start + 1 hour, ... up to end. Two one hour time slots are only common
+    if they start at exactly the same datetime, so intervals are grouped by
+    their offset from the beginning of the hour before being merged and
+    intersected.
+
+    Input: A list of lists of (start, end) tuples, one list per user.
+    Output: A sorted list of disjoint (start, end) tuples.
+    """
+
+    intervals_by_phase_list = []
+
+    for intervals in interval_lists:
+        intervals_by_phase = {}
+        for start, end in intervals:
+            intervals_by_phase.setdefault(get_hour_phase(start), []).append(
+                (start, end)
+                )
+        intervals_by_phase_list.append(intervals_by_phase)
+
+    if not intervals_by_phase_list:
+        return []
+
+    common_phases = set.intersection(
+        *[set(intervals_by_phase) for intervals_by_phase in
+            intervals_by_phase_list]
+        )
+
+    common_intervals = []
+
+    for phase in common_phases:
+        common_intervals += intersect_intervals(
+            [
+                merge_intervals(intervals_by_phase[phase])
+                for intervals_by_phase in intervals_by_phase_list
+                ]
+            )
+
+    return sorted(common_intervals)
+
+
+def split_into_one_hour_time_slots(intervals):
+    """
+    Split intervals into the one hour time slots they are made of.
+
+    Input: An iterable of (start, end) tuples e.g.
+
+        [(datetime(2018, 6, 25, 9, 0), datetime(2018, 6, 25, 11, 0))]
+
+    Output: A generator of datetime objects marking the beginning of each one
+            hour time slot e.g.
+
+        datetime(2018, 6, 25, 9, 0), datetime(2018, 6, 25, 10, 0)
+    """
+
+    for start, end in intervals:
+        one_hour_time_slot = start
+        while one_hour_time_slot + ONE_HOUR <= end:
+            yield one_hour_time_slot
+            one_hour_time_slot += ONE_HOUR
+
+
+def clip_intervals(intervals, window_start = None, window_end = None):
+    """
+    Restrict intervals to the one hour time slots lying entirely inside a
+    window. Either end of the window can be left open by passing None.
+
+    Input: An iterable of (start, end) tuples, and the window boundaries as
+           datetime objects e.g.
+
+        [(datetime(2018, 6, 25, 9, 0), datetime(2018, 6, 25, 17, 0))],
+        datetime(2018, 6, 25, 10, 30),
+        datetime(2018, 6, 25, 14, 0)
+
+    Output: A list of (start, end) tuples e.g.
+
+        [(datetime(2018, 6, 25, 11, 0), datetime(2018, 6, 25, 14, 0))]
+    """
+
+    clipped_intervals = []
+
+    # Start and end are moved by whole hours, so that they still mark the
+    # boundaries of one hour time slots.
+
+    for start, end in intervals:
+        if window_start is not None and start < window_start:
+            start += math.ceil((window_start - start) / ONE_HOUR) * ONE_HOUR
+        if window_end is not None and end > window_end:
+            end -= math.ceil((end - window_end) / ONE_HOUR) * ONE_HOUR
+        if start < end:
+            clipped_intervals.append((start, end))
+
+    return clipped_intervals
+
+
+def iterate_one_hour_time_slots(intervals):
+    """
+    Lazy counterpart of split_into_one_hour_time_slots() for overlapping
+    intervals. The intervals are read one at a time, and each one hour time
+    slot is generated once, in time order.
+
+    Input: An iterable of (start, end) tuples sorted by start.
+    Output: A generator of datetime objects marking the beginning of each one
+            hour time slot, in increasing order and without duplicates.
+    """
+
+    # The heap holds the next one hour time slot of every interval which
+    # has started, together with the end of that interval.
+
+    heap = []
+    intervals = iter(intervals)
+    next_interval = next(intervals, None)
+    last_one_hour_time_slot = None
+
+    while heap or next_interval is not None:
+
+        # Intervals starting before the earliest pending one hour time slot
+        # must be read first, since they may contribute an earlier one.
+
+        while next_interval is not None and (
+                not heap or next_interval[0] <= heap[0][0]):
+            start, end = next_interval
+            if start + ONE_HOUR <= end:
+                heapq.heappush(heap, (start, end))
+            next_interval = next(intervals, None)
+
+        if not heap:
+            continue
+
+        one_hour_time_slot, end = heapq.heappop(heap)
+
+        if one_hour_time_slot + 2 * ONE_HOUR <= end:
+            heapq.heappush(heap, (one_hour_time_slot + ONE_HOUR, end))
+
+        if one_hour_time_slot != last_one_hour_time_slot:
+            last_one_hour_time_slot = one_hour_time_slot
+            yield one_hour_time_slot
+
+
+def iterate_common_values(iterators):
+    """
+    Lazily intersect several increasing sequences, advancing each of them
+    only as far as needed.
+
+    Input: A list of iterators of values in increasing order, without
+           duplicates e.g. as generated by iterate_one_hour_time_slots().
+    Output: A generator of the values present in every iterator, in
+            increasing order.
+    """
+
+    if not iterators:
+        return
+
+    heads = []
+
+    for iterator in iterators:
+        head = next(iterator, None)
+        if head is None:
+            return
+        heads.append(head)
+
+    while True:
+
+        # Every iterator is advanced to the largest head. When all heads
+        # are equal, the value is common to all iterators.
+
+        target = max(heads)
+
+        for i, iterator in enumerate(iterators):
+            while heads[i] < target:
+                heads[i] = next(iterator, None)
+                if heads[i] is None:
+                    return
+
+        if all(head == target for head in heads):
+            yield target
+            for i, iterator in enumerate(iterators):
+                heads[i] = next(iterator, None)
+                if heads[i] is None:
+                    return
+
+
+def count_intervals(interval_lists, min_count, required_indices = ()):
+    """
+    Find the stretches of time covered by at least min_count of several
+    lists of intervals, including all of the required lists, with a single
+    counting sweep.
+
+    Every list must be sorted and coalesced, as returned by merge_intervals().
+
+    Input: A list of lists of (start, end) tuples, one list per user, the
+           minimum number of lists covering a stretch, and the indices of
+           the lists which must cover it.
+    Output: A sorted list of disjoint (start, end, indices) tuples, where
+            indices is a sorted tuple of the indices of the lists covering
+            the stretch from start to end.
+    """
+
+    events = []
+
+    for index, intervals in enumerate(interval_lists):
+        for start, end in intervals:
+            events.append((start, 1, index))
+            events.append((end, -1, index))
+
+    # Ends sort before starts at the same point in time, so that intervals
+    # which merely touch each other do not count as overlapping.
+
+    events.sort()
+
+    required_indices = set(required_indices)
+    covering_indices = set()
+    counted_intervals = []
+    i = 0
+
+    while i < len(events):
+
+        # Apply all events at the same point in time, then look at the
+        # stretch until the next point in time.
+
+        point = events[i][0]
+
+        while i < len(events) and events[i][0] == point:
+            _, delta, index = events[i]
+            if delta == 1:
+                covering_indices.add(index)
+            else:
+                covering_indices.discard(index)
+            i += 1
+
+        if i == len(events):
+            break
+
+        if (len(covering_indices) < min_count or
+                not required_indices <= covering_indices):
+            continue
+
+        indices = tuple(sorted(covering_indices))
+
+        if (counted_intervals and counted_intervals[-1][1] == point and
+                counted_intervals[-1][2] == indices):
+            counted_intervals[-1] = (
+                counted_intervals[-1][0], events[i][0], indices
+                )
+        else:
+            counted_intervals.append((point, events[i][0], indices))
+
+    return counted_intervals
+
+
+def get_quorum_one_hour_time_slot_intervals(
+    interval_lists, min_count, required_indices = ()
+    ):
+    """
+    Compute the one hour time slots when at least min_count of several users
+    are available, including all of the required users. Like in
+    get_common_one_hour_time_slot_intervals(), intervals are grouped by
+    their offset from the beginning of the hour.
+
+    Input: A list of lists of (start, end) tuples, one list per user, the
+           minimum number of available users, and the indices of the
+           required users in interval_lists.
+    Output: A sorted list of (start, end, indices) tuples, where indices is
+            a sorted tuple of the indices of the users available from start
+            to end. start and end mark the boundaries of one hour time
+            slots.
+    """
+
+    phases = set()
+    intervals_by_phase_list = []
+
+    for intervals in interval_lists:
+        intervals_by_phase = {}
+        for start, end in intervals:
+            intervals_by_phase.setdefault(get_hour_phase(start), []).append(
+                (start, end)
+                )
+        phases.update(intervals_by_phase)
+        intervals_by_phase_list.append(intervals_by_phase)
+
+    quorum_intervals = []
+
+    for phase in phases:
+        quorum_intervals += count_intervals(
+            [
+                merge_intervals(intervals_by_phase.get(phase, []))
+                for intervals_by_phase in intervals_by_phase_list
+                ],
+            min_count, required_indices
+            )
+
+    return sorted(quorum_intervals)
+
+
+def group_intervals_by_phase(intervals):
+    """
+    Group intervals by their offset from the beginning of the hour, and merge
+    the intervals of each group.
+
+    Input: An iterable of (start, end) tuples.
+    Output: A dictionary mapping timedelta objects to sorted lists of
+            disjoint (start, end) tuples.
+    """
+
+    intervals_by_phase = {}
+
+    for start, end in intervals:
+        intervals_by_phase.setdefault(get_hour_phase(start), []).append(
+            (start, end)
+            )
+
+    return {
+        phase : merge_intervals(intervals_with_same_phase)
+        for phase, intervals_with_same_phase in intervals_by_phase.items()
+        }
+
+
+def count_common_one_hour_time_slots(intervals_by_phase, other_intervals):
+    """
+    Count the one hour time slots common to two users, when the availability
+    of the first user is shared by many such counts and was grouped once
+    with group_intervals_by_phase().
+
+    Input: The grouped intervals of the first user, and a list of (start,
+           end) tuples of the second user.
+    Output: The number of common one hour time slots.
+    """
+
+    count = 0
+
+    for phase, other_intervals_with_same_phase in group_intervals_by_phase(
+            other_intervals).items():
+
+        intervals = intervals_by_phase.get(phase, None)
+
+        if intervals is None:
+            continue
+
+        # Both lists are sorted and disjoint, so they can be walked side by
+        # side, always advancing the interval which ends first.
+
+        i = j = 0
+
+        while i < len(intervals) and j < len(other_intervals_with_same_phase):
+            start = max(intervals[i][0], other_intervals_with_same_phase[j][0])
+            end = min(intervals[i][1], other_intervals_with_same_phase[j][1])
+            if start < end:
+                count += (end - start) // ONE_HOUR
+            if intervals[i][1] < other_intervals_with_same_phase[j][1]:
+                i += 1
+            else:
+                j += 1
+
+    return count
+
+
+def drop_short_ranges(intervals, min_duration):
+    """
+    Drop the intervals which are not part of a long enough range. A range is
+    a stretch of time covered without a gap by intervals which overlap or
+    touch each other, as returned by merge_intervals().
+
+    Input: A sorted list of (start, end) tuples e.g. as returned by
+           get_common_one_hour_time_slot_intervals(), and a timedelta object.
+    Output: A sorted list of the (start, end) tuples lying inside a range
+            lasting at least min_duration.
+    """
+
+    long_ranges = [
+        (start, end) for start, end in merge_intervals(intervals)
+        if end - start >= min_duration
+        ]
+
+    kept_intervals = []
+    i = 0
+
+    # Ranges and intervals are both sorted, and every interval lies inside
+    # exactly one range.
+
+    for start, end in intervals:
+        while i < len(long_ranges) and long_ranges[i][1] < end:
+            i += 1
+        if i == len(long_ranges):
+            break
+        if long_ranges[i][0] <= start:
+            kept_intervals.append((start, end))
+
+    return kept_intervals
+
+
+def get_interval_index(intervals):
+    """
+    Index intervals for clip_indexed_intervals().
+
+    Input: A list of (start, end) tuples sorted by start.
+    Output: A tuple of the list of starts, and of the list of the largest
+            end of the intervals up to each position. Both lists are sorted.
+    """
+
+    starts = []
+    max_ends = []
+    max_end = None
+
+    for start, end in intervals:
+        starts.append(start)
+        if max_end is None or end > max_end:
+            max_end = end
+        max_ends.append(max_end)
+
+    return starts, max_ends
+
+
+def clip_indexed_intervals(
+    intervals, interval_index, window_start = None, window_end = None
+    ):
+    """
+    Like clip_intervals(), but only looks at the intervals which can overlap
+    the window, found by binary search, so the cost depends on the size of
+    the window rather than on the number of intervals.
+
+    Input: A list of (start, end) tuples sorted by start, its index as
+           returned by get_interval_index(), and the window boundaries as
+           datetime objects or None.
+    Output: A list of (start, end) tuples.
+    """
+
+    starts, max_ends = interval_index
+
+    # Intervals before lower all end at or before window_start, and
+    # intervals from upper on all start at or after window_end.
+
+    lower = 0
+    upper = len(intervals)
+
+    if window_start is not None:
+        lower = bisect.bisect_right(max_ends, window_start)
+    if window_end is not None:
+        upper = bisect.bisect_left(starts, window_end)
+
+    return clip_intervals(intervals[lower:upper], window_start, window_end)
@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+import threading
+import timeit
+
+# Durations of the phases of the request being served by the current thread,
+# recorded by timing_phase() while the server timing middleware is active.
+_local = threading.local()
+
+def start_timing():
+    """
+    Start recording the phases of a request in the current thread, dropping
+    any phases recorded before.
+    """
+
+    _local.phases = {}
+
+
+def stop_timing():
+    """
+    Stop recording the phases of a request in the current thread.
+
+    Output: A dictionary mapping phase names to [duration in
+            seconds, number of times the phase was entered] lists, in the
+            order in which the phases were first entered.
+    """
+
+    phases = getattr(_local, "phases", None)
+    _local.phases = None
+
+    return phases or {}
+
+
+def add_timing(name, duration):
+    """
+    Add a duration to a phase of the request being recorded, if any.
+
+    Input: The name of the phase, and a duration in seconds.
+    """
+
+    phases = getattr(_local, "phases", None)
+
+    if phases is None:
+        return
+
+    phase = phases.setdefault(name, [0.0, 0])
+    phase[0] += duration
+    phase[1] += 1
+
+
+@contextmanager
+def timing_phase(name):
+    """
+    Time the enclosed block as a phase of the request being recorded, e.g.
+
+        with timing_phase("intersect"):
+            ...
+
+    Phases entered several times add up. Outside of a recorded request, the
+    block just runs.
+
+    Input: The name of the phase, reported in the Server-Timing header.
+    """
+
+    if getattr(_local, "phases", None) is None:
+        yield
+        return
+
+    started = timeit.default_timer()
+
+    try:
+        yield
+    finally:
+        add_timing(name, timeit.default_timer() - started)
+
+
+def format_server_timing(phases):
+    """
+    Format recorded phases as the value of a Server-Timing header, see
+    https://www.w3.org/TR/server-timing/.
+
+    Input: A dictionary mapping phase names to (duration in seconds,
+           description) tuples. The description may be None.
+    Output: A string e.g. 'db;dur=3.2;desc="4 queries", total;dur=12.5'
+    """
+
+    metrics = []
+
+    for name, (duration, description) in phases.items():
+        metric = "{0};dur={1:.1f}".format(name, duration * 1000)
+        if description is not None:
+            metric += ';desc="{0}"'.format(description.replace('"', "'"))
+        metrics.append(metric)
+
+    return ", ".join(metrics)